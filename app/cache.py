@@ -0,0 +1,129 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Tuple
+
+from fastapi import Response
+
+from app import config
+from app.serialization import JSONBytesResponse
+from app.storage.database import db
+
+# Injectable clock so tests can control expiry
+clock = time.monotonic
+
+
+class ResponseCache:
+    """LRU cache of encoded responses with a TTL and explicit invalidation.
+
+    Entries are keyed by ``(kind, id)`` and hold the JSON body with its
+    ETag. Writers invalidate exactly the keys they affect. A body computed
+    while an invalidation happened is not stored, so a reader racing a
+    writer cannot park a stale entry in the cache.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[bytes, str, float]]" = OrderedDict()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_set(self, key: Hashable, producer: Callable[[], bytes]) -> Tuple[bytes, str]:
+        now = clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0], entry[1]
+            self.misses += 1
+            generation = self._generation
+
+        body = producer()
+        etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = (body, etag, now + self.ttl)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return body, etag
+
+    def invalidate(self, *keys: Hashable) -> None:
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "maxEntries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRatio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+response_cache = ResponseCache(config.CACHE_MAX_ENTRIES, config.CACHE_TTL_SECONDS)
+
+def player_key(player_id: str) -> tuple:
+    return ("player", player_id)
+
+def team_key(team_id: str) -> tuple:
+    return ("team", team_id)
+
+def invalidate_replayed(operations: Optional[list], previous: Optional[list]) -> None:
+    # Commits replayed from other processes invalidate the same keys their writers did
+    if operations is None:
+        response_cache.clear()
+        return
+    keys = []
+    for operation, before in zip(operations, previous):
+        if operation[0] != "update":
+            continue
+        if operation[1] == "teams":
+            keys.append(team_key(operation[2]))
+        elif operation[1] == "players":
+            # Teams embed their players: drop the team the player is in and the one it left
+            keys.append(player_key(operation[2]))
+            teams = {db.players.get(operation[2])["team"], before.get("team")} - {None}
+            keys.extend(team_key(team_id) for team_id in teams)
+    if keys:
+        response_cache.invalidate(*keys)
+
+db.replay_listeners.append(invalidate_replayed)
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+def cached_json_response(key: Hashable, producer: Callable[[], bytes], if_none_match: Optional[str]) -> Response:
+    # Serve from the cache, answering 304 when the client already holds this version
+    body, etag = response_cache.get_or_set(key, producer)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return JSONBytesResponse(body, headers={"ETag": etag})
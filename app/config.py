@@ -0,0 +1,27 @@
+import os
+
+# Storage backend: "memory" keeps everything in process, "wal" persists to DATA_DIR,
+# "shared" persists to DATA_DIR for several worker processes
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "memory")
+DATA_DIR = os.getenv("DATA_DIR", "data")
+
+# Write-ahead log tuning: commits between compacted snapshots, and whether to fsync every commit
+SNAPSHOT_INTERVAL = int(os.getenv("SNAPSHOT_INTERVAL", "100000"))
+WAL_FSYNC = os.getenv("WAL_FSYNC", "false").lower() in ("1", "true", "yes")
+
+# Matchmaking: Elo window a team accepts on arrival, how fast it widens while waiting, and its cap
+MATCHMAKING_WINDOW = float(os.getenv("MATCHMAKING_WINDOW", "100"))
+MATCHMAKING_WIDEN_PER_SECOND = float(os.getenv("MATCHMAKING_WIDEN_PER_SECOND", "10"))
+MATCHMAKING_MAX_WINDOW = float(os.getenv("MATCHMAKING_MAX_WINDOW", "1000"))
+# Pairings kept for GET /matchmaking/pairings; older ones are trimmed
+MATCHMAKING_PAIRINGS_KEPT = int(os.getenv("MATCHMAKING_PAIRINGS_KEPT", "10000"))
+
+# Response cache for GET /players/{id} and GET /teams/{id}
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "100000"))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "300"))
+
+# Service and per-route latency histograms plus per-request storage counts; off skips all timing
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Rating rules applied to match results (see app/services/rating.py ENGINES)
+RATING_ENGINE = os.getenv("RATING_ENGINE", "elo")
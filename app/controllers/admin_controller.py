@@ -0,0 +1,27 @@
+import tempfile
+
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.cache import response_cache
+from app.services.backup_service import export_chunks, import_file
+
+router = APIRouter()
+
+@router.get("/cache")
+def get_cache_stats():
+    return response_cache.stats()
+
+@router.get("/export")
+def export_state():
+    return StreamingResponse(export_chunks(), media_type="application/x-ndjson")
+
+@router.post("/import")
+async def import_state(request: Request):
+    # Spool the body to disk as it arrives, then load it in one worker thread, which holds the store's lock throughout
+    with tempfile.TemporaryFile() as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        return await run_in_threadpool(import_file, spool)
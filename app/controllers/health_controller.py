@@ -0,0 +1,10 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+router = APIRouter()
+
+@router.get("/ready")
+def get_readiness(request: Request):
+    # 200 once the store is loaded; 503 while it loads, or if loading failed
+    status = request.app.state.warm_up.status()
+    return JSONResponse(status, status_code=200 if status["status"] == "ready" else 503)
@@ -1,6 +1,7 @@
 from fastapi import APIRouter
+from typing import List
 from app.models.match import Match
-from app.services.match_service import create_match
+from app.services.match_service import create_match, create_matches_bulk, get_match
 
 router = APIRouter()
 
@@ -8,3 +9,10 @@ router = APIRouter()
 def create_new_match(match: Match):
     return create_match(match)
 
+@router.post("/bulk", response_model=List[Match])
+def create_matches_in_bulk(matches: List[Match]):
+    return create_matches_bulk(matches)
+
+@router.get("/{match_id}", response_model=Match)
+def get_match_by_id(match_id: str):
+    return get_match(match_id)
@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Query
+from typing import List, Optional
+from app.models.matchmaking import Pairing, QueueRequest, QueueStatus
+from app.services.matchmaking_service import enqueue_team, get_pairings, leave_queue
+
+router = APIRouter()
+
+@router.post("/queue", response_model=QueueStatus)
+def enqueue_team_endpoint(request: QueueRequest):
+    return enqueue_team(request.teamId)
+
+@router.delete("/queue/{team_id}", status_code=204)
+def leave_queue_endpoint(team_id: str):
+    leave_queue(team_id)
+
+@router.get("/pairings", response_model=List[Pairing])
+def get_pairings_endpoint(limit: int = Query(100, ge=1, le=1000), after: Optional[str] = None):
+    return get_pairings(limit, after)
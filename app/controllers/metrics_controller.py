@@ -0,0 +1,23 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app import metrics
+from app.cache import response_cache
+
+router = APIRouter()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    # Prometheus text format; cache statistics are included as gauges
+    cache = response_cache.stats()
+    return PlainTextResponse(
+        metrics.render({
+            "response_cache_entries": cache["entries"],
+            "response_cache_max_entries": cache["maxEntries"],
+            "response_cache_hits": cache["hits"],
+            "response_cache_misses": cache["misses"],
+            "response_cache_hit_ratio": cache["hitRatio"],
+            "response_cache_evictions": cache["evictions"],
+            "response_cache_invalidations": cache["invalidations"],
+        }),
+        media_type="text/plain; version=0.0.4",
+    )
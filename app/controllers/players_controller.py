@@ -1,7 +1,15 @@
-from fastapi import APIRouter
-from app.services.player_service import create_player, get_player, get_all_players
+from fastapi import APIRouter, Header, Query, Response
+from fastapi.responses import StreamingResponse
+from app.services.player_service import (
+    create_player, create_players_bulk, get_player_json, get_players_page, iter_players, get_leaderboard,
+    get_player_rank,
+)
+from app.services.match_service import get_player_matches
+from app.models.match import Match
 from app.models.player import Player
-from typing import List
+from app.models.ranking import PlayerRank
+from app.cache import cached_json_response, player_key
+from typing import List, Optional
 
 router = APIRouter()
 
@@ -9,10 +17,58 @@ router = APIRouter()
 def create_new_player(player: Player):
     return create_player(player)
 
+@router.post("/bulk", response_model=List[Player])
+def create_players_in_bulk(players: List[Player]):
+    return create_players_bulk(players)
+
+@router.get("/leaderboard", response_model=List[PlayerRank])
+def get_leaderboard_endpoint(limit: int = Query(10, ge=1, le=1000), offset: int = Query(0, ge=0)):
+    return get_leaderboard(limit, offset)
+
+@router.get("/{player_id}/rank", response_model=PlayerRank)
+def get_player_rank_endpoint(player_id: str):
+    return get_player_rank(player_id)
+
+@router.get("/{player_id}/matches", response_model=List[Match])
+def get_player_match_history(
+    player_id: str,
+    response: Response,
+    limit: int = Query(20, ge=1, le=1000),
+    before: Optional[str] = None,
+):
+    matches, next_cursor = get_player_matches(player_id, limit, before)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return matches
+
 @router.get("/{player_id}", response_model=Player)
-def get_player_by_id(player_id: str):
-    return get_player(player_id)
+def get_player_by_id(player_id: str, if_none_match: Optional[str] = Header(None)):
+    return cached_json_response(player_key(player_id), lambda: get_player_json(player_id), if_none_match)
 
 @router.get("", response_model=List[Player])  
-def get_all_players_endpoint():
-    return get_all_players()
\ No newline at end of file
+def get_all_players_endpoint(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    after: Optional[str] = None,
+    stream: bool = False,
+):
+    # NDJSON streaming of the whole table, one player per line
+    if stream:
+        return StreamingResponse(ndjson_chunks(), media_type="application/x-ndjson")
+
+    players, next_cursor = get_players_page(limit, after)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return players
+
+
+def ndjson_chunks(chunk_size: int = 1000):
+    # Group lines so a large roster is not sent one tiny chunk per player
+    chunk = []
+    for player in iter_players(chunk_size):
+        chunk.append(player.model_dump_json())
+        if len(chunk) == chunk_size:
+            yield "\n".join(chunk) + "\n"
+            chunk = []
+    if chunk:
+        yield "\n".join(chunk) + "\n"
@@ -0,0 +1,9 @@
+from fastapi import APIRouter
+from app.services.stats_service import get_league_stats
+from app.models.stats import LeagueStats
+
+router = APIRouter()
+
+@router.get("/league", response_model=LeagueStats)
+def get_league_stats_endpoint():
+    return get_league_stats()
@@ -1,6 +1,12 @@
-from fastapi import APIRouter, HTTPException
-from app.services.team_service import create_team, get_team_by_id
-from app.models.team import Team
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from typing import List, Optional
+from app.services.match_service import get_team_matches
+from app.services.team_service import create_team, create_teams_bulk, get_team_json
+from app.services.stats_service import get_team_stats
+from app.models.match import Match
+from app.models.stats import TeamStats
+from app.models.team import Team, TeamCreate
+from app.cache import cached_json_response, team_key
 
 router = APIRouter()
 
@@ -12,9 +18,29 @@ def create_team_endpoint(team_data: dict):
     except HTTPException as e:
         raise e
 
+@router.post("/bulk", response_model=List[Team])
+def create_teams_in_bulk(teams: List[TeamCreate]):
+    return create_teams_bulk(teams)
+
 @router.get("/{team_id}", response_model=Team)
-def get_team(team_id: str):
+def get_team(team_id: str, if_none_match: Optional[str] = Header(None)):
     try:
-        return get_team_by_id(team_id)
+        return cached_json_response(team_key(team_id), lambda: get_team_json(team_id), if_none_match)
     except HTTPException as e:
-        raise e
\ No newline at end of file
+        raise e
+
+@router.get("/{team_id}/stats", response_model=TeamStats)
+def get_team_stats_endpoint(team_id: str):
+    return get_team_stats(team_id)
+
+@router.get("/{team_id}/matches", response_model=List[Match])
+def get_team_match_history(
+    team_id: str,
+    response: Response,
+    limit: int = Query(20, ge=1, le=1000),
+    before: Optional[str] = None,
+):
+    matches, next_cursor = get_team_matches(team_id, limit, before)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return matches
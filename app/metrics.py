@@ -0,0 +1,246 @@
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app import config
+
+# Latency buckets in seconds, from 50us in-process calls to multi-second bulk requests
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+# Storage operations per request
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 1000)
+
+
+class _Metric:
+    """Base for metrics recorded without a lock on the hot path.
+
+    Each thread records into its own shard, so an observation is a few list
+    increments with no lock and no lost updates; readers merge the shards.
+    Shards of threads that have exited are folded into one retired series
+    set, so thread churn in the worker pool does not grow memory.
+    """
+
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._shards: List[Tuple[threading.Thread, Dict[tuple, list]]] = []
+        self._retired: Dict[tuple, list] = {}
+
+    def _series(self, labels: tuple) -> list:
+        # This thread's series for ``labels``, created on first use
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._retire_dead_shards()
+                self._shards.append((threading.current_thread(), shard))
+        series = shard.get(labels)
+        if series is None:
+            series = shard[labels] = self._new_series()
+        return series
+
+    def _retire_dead_shards(self) -> None:
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                self._fold(self._retired, shard)
+        self._shards = live
+
+    def _merged(self) -> Dict[tuple, list]:
+        with self._lock:
+            self._retire_dead_shards()
+            merged: Dict[tuple, list] = {}
+            self._fold(merged, self._retired)
+            for _, shard in self._shards:
+                self._fold(merged, shard)
+        return merged
+
+    def _fold(self, into: Dict[tuple, list], shard: Dict[tuple, list]) -> None:
+        for labels, series in list(shard.items()):
+            target = into.get(labels)
+            if target is None:
+                target = into[labels] = self._new_series()
+            self._add(target, series)
+
+    def _new_series(self) -> list:
+        raise NotImplementedError
+
+    def _add(self, target: list, series: list) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        with self._lock:
+            self._retired.clear()
+            for _, shard in self._shards:
+                shard.clear()
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, labels: tuple = ()) -> None:
+        try:
+            series = self._local.shard[labels]
+        except (AttributeError, KeyError):
+            series = self._series(labels)
+        series[0] += amount
+
+    def value(self, labels: tuple = ()) -> float:
+        return self._merged().get(labels, [0])[0]
+
+    def _new_series(self) -> list:
+        return [0]
+
+    def _add(self, target: list, series: list) -> None:
+        target[0] += series[0]
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for labels, (value,) in sorted(self._merged().items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram; an observation is a bisect and three increments."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = buckets
+
+    def observe(self, value: float, labels: tuple = ()) -> None:
+        try:
+            series = self._local.shard[labels]
+        except (AttributeError, KeyError):
+            series = self._series(labels)
+        # [per-bucket counts (the last one is +Inf), sum, count]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, labels: tuple = ()) -> int:
+        return self._merged().get(labels, (None, 0, 0))[2]
+
+    def _new_series(self) -> list:
+        return [[0] * (len(self.buckets) + 1), 0.0, 0]
+
+    def _add(self, target: list, series: list) -> None:
+        counts = target[0]
+        for i, count in enumerate(series[0]):
+            counts[i] += count
+        target[1] += series[1]
+        target[2] += series[2]
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for labels, (counts, total, count) in sorted(self._merged().items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames + ('le',), labels + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{str(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency by route.",
+                            ("method", "route", "status"))
+REQUEST_STORAGE_READS = Histogram("http_request_storage_reads", "Storage reads per HTTP request.",
+                                  ("method", "route"), COUNT_BUCKETS)
+REQUEST_STORAGE_WRITES = Histogram("http_request_storage_writes", "Storage writes per HTTP request.",
+                                   ("method", "route"), COUNT_BUCKETS)
+SERVICE_LATENCY = Histogram("service_call_duration_seconds", "Service function latency.", ("function",))
+STORAGE_OPERATIONS = Counter("storage_operations_total", "Storage reads and writes served to HTTP requests.",
+                             ("kind",))
+MATCHES_PROCESSED = Counter("matches_processed_total", "Matches recorded, single and bulk.")
+
+METRICS = (REQUEST_LATENCY, REQUEST_STORAGE_READS, REQUEST_STORAGE_WRITES, SERVICE_LATENCY,
+           STORAGE_OPERATIONS, MATCHES_PROCESSED)
+
+
+class RequestProfile:
+    """Storage counts and, when profiling was asked for, timed spans of one request."""
+
+    __slots__ = ("reads", "writes", "spans")
+
+    def __init__(self, spans: bool = False):
+        self.reads = 0
+        self.writes = 0
+        self.spans: Optional[List[Tuple[str, float]]] = [] if spans else None
+
+
+# The profile of the request being served, if any. The threadpool running sync
+# endpoints copies the context, so the endpoint thread updates the same object.
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+def count_reads(n: int = 1) -> None:
+    profile = current_profile.get()
+    if profile is not None:
+        profile.reads += n
+
+def count_writes(n: int = 1) -> None:
+    profile = current_profile.get()
+    if profile is not None:
+        profile.writes += n
+
+def timed(fn: Callable) -> Callable:
+    # Record a service function's latency, and a span when the request is being profiled
+    if not config.METRICS_ENABLED:
+        return fn
+    name = fn.__name__
+    labels = (name,)
+    # Bound once; this wrapper runs several times per match
+    perf_counter, observe, get_profile = time.perf_counter, SERVICE_LATENCY.observe, current_profile.get
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = perf_counter() - start
+            observe(elapsed, labels)
+            profile = get_profile()
+            if profile is not None and profile.spans is not None:
+                profile.spans.append((name, elapsed))
+    return wrapper
+
+
+def render(extra: Dict[str, float] = None) -> str:
+    # Prometheus text exposition format; ``extra`` values are rendered as gauges
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    for name, value in (extra or {}).items():
+        lines.extend((f"# TYPE {name} gauge", f"{name} {_number(value)}"))
+    return "\n".join(lines) + "\n"
+
+def clear() -> None:
+    for metric in METRICS:
+        metric.clear()
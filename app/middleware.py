@@ -0,0 +1,126 @@
+import time
+
+from starlette.concurrency import run_in_threadpool
+
+from app.metrics import (
+    REQUEST_LATENCY, REQUEST_STORAGE_READS, REQUEST_STORAGE_WRITES, STORAGE_OPERATIONS, RequestProfile, current_profile,
+)
+
+PROFILE_HEADER = b"x-profile"
+
+
+class MetricsMiddleware:
+    """Per-route latency and storage counts for every HTTP request.
+
+    Written against raw ASGI rather than BaseHTTPMiddleware, which would add
+    a task and a response copy to each request. Routes are labelled by their
+    path template (``/players/{player_id}``), so label cardinality stays
+    bounded. A request sent with ``X-Profile: 1`` gets its span breakdown
+    back in a ``Server-Timing`` header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profiling = False
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                profiling = value not in (b"", b"0")
+        profile = RequestProfile(spans=profiling)
+        token = current_profile.set(profile)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if profiling:
+                    total = time.perf_counter() - start
+                    headers = list(message.get("headers", ()))
+                    headers.append((b"server-timing", server_timing(profile, total).encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_profile.reset(token)
+            elapsed = time.perf_counter() - start
+            path = route_template(scope)
+            method = scope["method"]
+            REQUEST_LATENCY.observe(elapsed, (method, path, str(status)))
+            REQUEST_STORAGE_READS.observe(profile.reads, (method, path))
+            REQUEST_STORAGE_WRITES.observe(profile.writes, (method, path))
+            if profile.reads:
+                STORAGE_OPERATIONS.inc(profile.reads, ("read",))
+            if profile.writes:
+                STORAGE_OPERATIONS.inc(profile.writes, ("write",))
+
+
+class ReplicaRefreshMiddleware:
+    """Brings this worker's replica up to date before each HTTP request.
+
+    Used with the ``shared`` storage backend, where several worker processes
+    each hold the whole store. When no other worker committed since the last
+    request the check is a single ``stat`` of the log, made on the event
+    loop. Otherwise replaying the new records runs in the threadpool: it
+    waits for this process's writers, and for the file lock when a whole
+    compaction was missed, and must not stall every other connection while
+    it does. Nothing is refreshed before the replica's initial load is done.
+    """
+
+    def __init__(self, app, database):
+        self.app = app
+        self.database = database
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and self.database.ready.is_set() and self.database.behind():
+            await run_in_threadpool(self.database.refresh)
+        await self.app(scope, receive, send)
+
+
+class ReadinessMiddleware:
+    """Answers 503 to HTTP requests until the store is loaded.
+
+    Used with persistent backends, whose data is loaded in the background
+    after startup: a request served earlier would see a partial store.
+    Paths in ``exempt`` (the readiness probe, metrics) always go through.
+    Once ready, the check is a single flag test.
+    """
+
+    def __init__(self, app, database, exempt=("/ready", "/metrics")):
+        self.app = app
+        self.database = database
+        self.exempt = frozenset(exempt)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and not self.database.ready.is_set() and scope["path"] not in self.exempt:
+            await send({"type": "http.response.start", "status": 503, "headers": [
+                (b"content-type", b"application/json"), (b"retry-after", b"1"),
+            ]})
+            await send({"type": "http.response.body", "body": b'{"detail":"Store is loading"}'})
+            return
+        await self.app(scope, receive, send)
+
+
+def route_template(scope) -> str:
+    # Newer FastAPI keeps included routes unprefixed and records the full path separately
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    if context is not None:
+        return context.path
+    route = scope.get("route")
+    return route.path if route is not None else "unmatched"
+
+
+def server_timing(profile: RequestProfile, total: float) -> str:
+    # Server-Timing durations are in milliseconds; nested spans are listed in completion order
+    entries = [f"{name};dur={elapsed * 1000:.3f}" for name, elapsed in profile.spans]
+    entries.append(f'storage;desc="reads={profile.reads} writes={profile.writes}"')
+    entries.append(f"total;dur={total * 1000:.3f}")
+    return ", ".join(entries)
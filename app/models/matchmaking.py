@@ -0,0 +1,19 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from uuid import uuid4
+
+class QueueRequest(BaseModel):
+    teamId: str
+
+class Pairing(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid4()))
+    team1Id: str
+    team2Id: str
+    eloDifference: float
+    expectedScore: float  # Expected score of team1 against team2
+
+class QueueStatus(BaseModel):
+    teamId: str
+    averageElo: float
+    status: str  # "queued" or "paired"
+    pairing: Optional[Pairing] = None
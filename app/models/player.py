@@ -1,13 +1,20 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Annotated, Optional
 from uuid import uuid4
 
+# Counters are stored in signed 64-bit columns
+Int64 = Annotated[int, Field(ge=-2 ** 63, le=2 ** 63 - 1)]
+
 class Player(BaseModel):
     id: str= Field(default_factory=lambda: str(uuid4()))
     nickname: str
-    wins: int = 0
-    losses: int = 0
-    elo: float = 0
-    hoursPlayed: int = 0
+    wins: Int64 = 0
+    losses: Int64 = 0
+    # A NaN or infinite rating would have no place in the leaderboard order
+    elo: float = Field(0, allow_inf_nan=False)
+    hoursPlayed: Int64 = 0
     team: Optional[str] = None
-    ratingAdjustment: int = 50
\ No newline at end of file
+    ratingAdjustment: Int64 = 50
+    # The rating the replay of the match history starts the player from; the rating they are
+    # created with when not given
+    initialElo: Optional[float] = Field(None, allow_inf_nan=False)
\ No newline at end of file
@@ -0,0 +1,6 @@
+from pydantic import BaseModel
+from app.models.player import Player
+
+class PlayerRank(BaseModel):
+    rank: int  # 1-based; players tied on elo, wins and hoursPlayed share a rank
+    player: Player
@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+from typing import List
+
+class TeamStats(BaseModel):
+    teamId: str
+    teamName: str
+    players: int
+    averageElo: float
+    totalHoursPlayed: int  # Sum of the players' hoursPlayed
+    matchesPlayed: int
+    wins: int
+    losses: int
+    draws: int
+    winRate: float  # Wins over matches played; 0 before the first match
+
+class EloBucket(BaseModel):
+    minElo: float  # Inclusive
+    maxElo: float  # Exclusive
+    players: int
+
+class LeagueStats(BaseModel):
+    players: int
+    teams: int
+    matches: int
+    draws: int
+    averageElo: float
+    totalHoursPlayed: int  # Sum of every player's hoursPlayed
+    totalMatchHours: int  # Sum of match durations
+    eloHistogram: List[EloBucket]  # Non-empty buckets, lowest first
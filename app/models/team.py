@@ -6,4 +6,8 @@ from app.models.player import Player
 class Team(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid4()))
     teamName: str
-    players: List[Player]
\ No newline at end of file
+    players: List[Player]
+
+class TeamCreate(BaseModel):
+    teamName: str
+    players: List[str]  # Player IDs
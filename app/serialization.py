@@ -0,0 +1,31 @@
+from typing import Iterable
+
+import orjson
+from fastapi import Response
+
+from app.models.player import Player
+
+# Stored player records are pre-validated model dumps; only these keys are part of the API
+PLAYER_FIELDS = tuple(Player.model_fields)
+
+
+class JSONBytesResponse(Response):
+    """Response for a body that is already encoded JSON.
+
+    Returning it from a route skips FastAPI's response_model validation and
+    re-encoding, which would only repeat work done when the record was stored.
+    """
+
+    media_type = "application/json"
+
+
+def player_json(record: dict) -> bytes:
+    return orjson.dumps({field: record[field] for field in PLAYER_FIELDS})
+
+
+def team_json(team_record: dict, player_records: Iterable[dict]) -> bytes:
+    return orjson.dumps({
+        "id": team_record["id"],
+        "teamName": team_record["teamName"],
+        "players": [{field: record[field] for field in PLAYER_FIELDS} for record in player_records],
+    })
@@ -0,0 +1,136 @@
+"""Export the whole store as NDJSON, or load such an export into an empty store.
+
+Run with ``python -m app.services.backup_service export league.ndjson`` or
+``python -m app.services.backup_service import league.ndjson`` (``-`` for
+stdout/stdin). It opens the store configured by STORAGE_BACKEND/DATA_DIR,
+like the app does, so with the ``wal`` backend an import is journaled and
+persists.
+
+The format is the snapshot format of the write-ahead log: a header line,
+then one ``{"table": ..., "doc": ...}`` line per document, players first,
+then teams, then matches. A WAL ``snapshot.ndjson`` can be imported as is.
+"""
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from typing import BinaryIO, Dict, Iterator, List, Tuple
+
+import orjson
+from fastapi import HTTPException
+
+from app.cache import response_cache
+from app.metrics import timed
+from app.storage.database import db
+
+EXPORT_FORMAT = "league-export/1"
+
+
+def export_chunks(batch_size: int = 1000) -> Iterator[bytes]:
+    # Each table is read a page at a time, so memory is bounded by the batch size. Documents
+    # inserted after the export started are left out; updates committed meanwhile may be included,
+    # so an exact copy needs a pause in writes.
+    counts = {table.name: len(table) for table in db.tables()}
+    yield orjson.dumps({"format": EXPORT_FORMAT, "counts": counts}) + b"\n"
+    for table in db.tables():
+        remaining = counts[table.name]
+        after = None
+        while remaining > 0:
+            records = table.page(after=after, limit=min(batch_size, remaining))
+            if not records:
+                break
+            yield b"".join(orjson.dumps({"table": table.name, "doc": record}) + b"\n" for record in records)
+            remaining -= len(records)
+            after = records[-1]["id"]
+
+
+def read_batches(source: BinaryIO, batch_size: int) -> Iterator[Tuple[str, List[dict], int, int]]:
+    # (table name, documents, first line, last line) for each run of up to batch_size documents of one table
+    name, docs, first, last = None, [], 0, 0
+    for number, line in enumerate(source, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = orjson.loads(line)
+            if "table" not in record:
+                # A header line, from an export or a WAL snapshot
+                continue
+            table_name, doc = record["table"], record["doc"]
+            db.table(table_name)
+        except (ValueError, KeyError, TypeError) as error:
+            raise HTTPException(status_code=400, detail=f"Import rejected at line {number}: {error!s}")
+        if docs and (table_name != name or len(docs) >= batch_size):
+            yield name, docs, first, last
+            docs = []
+        if not docs:
+            name, first = table_name, number
+        docs.append(doc)
+        last = number
+    if docs:
+        yield name, docs, first, last
+
+
+@timed
+def import_file(source: BinaryIO, batch_size: int = 10_000) -> Dict[str, int]:
+    # Bulk-load straight into the tables: documents are trusted as exported, so there are no
+    # models and no service checks, only the tables' own constraints. The whole file is checked
+    # first, batch by batch, keeping only ids and unique values; a bad line rejects the import with
+    # nothing written. Then every batch is one commit, which can no longer fail on a constraint, so
+    # it skips the checks.
+    with db.lock:
+        if any(len(table) for table in db.tables()):
+            raise HTTPException(status_code=409, detail="Import needs an empty store")
+        pending: Dict[str, Dict[str, set]] = {table.name: {} for table in db.tables()}
+        for name, docs, first, last in read_batches(source, batch_size):
+            try:
+                db.table(name).check_insert_many(docs, pending[name])
+            except (ValueError, KeyError, TypeError) as error:
+                raise HTTPException(status_code=400, detail=f"Import rejected in lines {first}-{last}: {error}")
+        del pending
+
+        source.seek(0)
+        counts = {table.name: 0 for table in db.tables()}
+        try:
+            for name, docs, _, _ in read_batches(source, batch_size):
+                unit = db.unit_of_work()
+                for doc in docs:
+                    unit.insert(db.table(name), doc)
+                unit.commit(checked=True)
+                counts[name] += len(docs)
+        finally:
+            response_cache.clear()
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("action", choices=("export", "import"))
+    parser.add_argument("path", help="NDJSON file, or - for stdout/stdin")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="documents per commit on import")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        db.open()
+        if args.action == "export":
+            output = sys.stdout.buffer if args.path == "-" else open(args.path, "wb")
+            with output:
+                for chunk in export_chunks():
+                    output.write(chunk)
+            summary = {table.name: len(table) for table in db.tables()}
+        else:
+            # The file is read twice, checked then loaded, so stdin is spooled first
+            source = tempfile.TemporaryFile() if args.path == "-" else open(args.path, "rb")
+            with source:
+                if args.path == "-":
+                    shutil.copyfileobj(sys.stdin.buffer, source)
+                    source.seek(0)
+                summary = import_file(source, args.batch_size)
+    except HTTPException as error:
+        sys.exit(f"{args.action} failed: {error.detail}")
+    finally:
+        db.close()
+    elapsed = time.perf_counter() - start
+    print(f"{args.action}ed {', '.join(f'{count:,} {name}' for name, count in summary.items())} in {elapsed:.1f}s",
+          file=sys.stderr)
@@ -1,86 +1,234 @@
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
 from app.models.match import Match
 from app.models.player import Player
 from app.models.team import Team
 from app.services.team_service import get_team_by_id
-from app.services.player_service import  update_player_in_db
+from app.services.rating import Roster, rating_engine
 from fastapi import HTTPException
-from tinydb import TinyDB, Query
-from tinydb.storages import MemoryStorage  # Using in-memory storage for TinyDB
+from app.cache import player_key, response_cache, team_key
+from app.storage.database import db
+from app.metrics import MATCHES_PROCESSED, timed
 
-# Initialize in-memory database
-db = TinyDB(storage=MemoryStorage)
-matches_table = db.table("matches")
+# Matches live in the shared store
+matches_table = db.matches
+players_table = db.players
 
 
+@timed
 def create_match(match: Match) -> Match:
     # Validate duration
     if match.duration < 1:
         raise HTTPException(status_code=400, detail="Duration must be at least 1 hour")
 
-    # Fetch the teams
-    team1 = get_team_by_id(match.team1Id)
-    team2 = get_team_by_id(match.team2Id)
-
-    if not team1:
-        raise HTTPException(status_code=404, detail=f"Team1 with ID {match.team1Id} not found")
-    if not team2:
-        raise HTTPException(status_code=404, detail=f"Team2 with ID {match.team2Id} not found")
-
-    # Add match duration to players' hoursPlayed
-    for player in team1.players + team2.players:
-        player.hoursPlayed += match.duration
-        update_player_in_db(player)
-
-    # Update Elo, wins, and losses based on the match result
-    if match.winningTeamId:
-        if match.winningTeamId == team1.id:
-            winning_team = team1
-            losing_team = team2
-        elif match.winningTeamId == team2.id:
-            winning_team = team2
-            losing_team = team1
-        else:
-            raise HTTPException(status_code=400, detail="Invalid winningTeamId")
-        update_team_stats(winning_team, losing_team, S=1, duration=match.duration)
-        update_team_stats(losing_team, winning_team, S=0, duration=match.duration)
-    else:  # Draw case
-        update_team_stats(team1, team2, S=0.5, duration=match.duration)
-        update_team_stats(team2, team1, S=0.5, duration=match.duration)
-
-    # Save the match to the matches table
-    matches_table.insert(match.model_dump())
+    # The same roster on both sides would be rated against itself, as in the bulk path
+    if match.team1Id == match.team2Id:
+        raise HTTPException(status_code=400, detail="A team cannot play itself")
+
+    # Reading the players, applying the result and committing is one write
+    with db.lock:
+        # Fetch the teams
+        team1 = get_team_by_id(match.team1Id)
+        team2 = get_team_by_id(match.team2Id)
+
+        if not team1:
+            raise HTTPException(status_code=404, detail=f"Team1 with ID {match.team1Id} not found")
+        if not team2:
+            raise HTTPException(status_code=404, detail=f"Team2 with ID {match.team2Id} not found")
+
+        # Resolve the result before anything is changed
+        if match.winningTeamId:
+            if match.winningTeamId == team1.id:
+                winning_team = team1
+                losing_team = team2
+            elif match.winningTeamId == team2.id:
+                winning_team = team2
+                losing_team = team1
+            else:
+                raise HTTPException(status_code=400, detail="Invalid winningTeamId")
+
+        # Add match duration to players' hoursPlayed
+        for player in team1.players + team2.players:
+            player.hoursPlayed += match.duration
+
+        # Update Elo, wins, and losses based on the match result: the winner (or team1 in a draw) first
+        if match.winningTeamId:
+            update_match_stats(winning_team, losing_team, S=1)
+        else:  # Draw case
+            update_match_stats(team1, team2, S=0.5)
+
+        # Commit every player delta and the match record as one batch
+        unit = db.unit_of_work()
+        for player in team1.players + team2.players:
+            unit.update(players_table, player.id, player_stats(player))
+        unit.insert(matches_table, match_record(
+            match, [player.id for player in team1.players], [player.id for player in team2.players]
+        ))
+        commit_match_unit(unit)
+
+        # Both teams and all ten players changed
+        response_cache.invalidate(
+            team_key(team1.id), team_key(team2.id),
+            *(player_key(player.id) for player in team1.players + team2.players),
+        )
+    MATCHES_PROCESSED.inc()
     return match
 
-def update_team_stats(team: Team, opponent_team: Team, S: float, duration: int):
-    # Calculate average Elo for the opponent team
-    opponent_elo = sum(player.elo for player in opponent_team.players) / len(opponent_team.players)
-
-    for player in team.players:
-        # Calculate expected score (E)
-        E = 1 / (1 + 10 ** (round((opponent_elo - player.elo) / 400)))
-
-        # Determine K-factor (rating adjustment based on hours played)
-        if player.hoursPlayed < 500:
-            K = 50
-        elif player.hoursPlayed < 1000:
-            K = 40
-        elif player.hoursPlayed < 3000:
-            K = 30
-        elif player.hoursPlayed < 5000:
-            K = 20
-        else:
-            K = 10
+def commit_match_unit(unit) -> None:
+    # The store rejects a result it cannot hold (a duplicate match id, hours past the 64-bit range)
+    # before anything is written or journaled
+    try:
+        unit.commit()
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+
+@timed
+def get_match(match_id: str) -> Match:
+    record = matches_table.get(match_id)
+    if not record:
+        raise HTTPException(status_code=404, detail=f"Match with ID {match_id} not found")
+    return Match.model_construct(**record)
+
+@timed
+def get_team_matches(team_id: str, limit: int, before: Optional[str] = None) -> Tuple[List[Match], Optional[str]]:
+    if team_id not in db.teams:
+        raise HTTPException(status_code=404, detail=f"Team with ID {team_id} not found")
+    return match_history("team", team_id, limit, before)
+
+@timed
+def get_player_matches(player_id: str, limit: int, before: Optional[str] = None) -> Tuple[List[Match], Optional[str]]:
+    if player_id not in players_table:
+        raise HTTPException(status_code=404, detail="Player not found")
+    return match_history("player", player_id, limit, before)
 
+def match_history(timeline: str, key: str, limit: int, before: Optional[str]) -> Tuple[List[Match], Optional[str]]:
+    # Newest first, plus the cursor for the next (older) page; None on the last one
+    try:
+        records = matches_table.timeline(timeline, key, before=before, limit=limit + 1)
+    except KeyError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    matches = [Match.model_construct(**record) for record in records[:limit]]
+    next_cursor = matches[-1].id if len(records) > limit else None
+    return matches, next_cursor
+
+def match_record(match: Match, team1_player_ids: List[str], team2_player_ids: List[str]) -> dict:
+    # The stored match also records who played, for the per-player history index
+    record = match.model_dump()
+    record["team1PlayerIds"] = list(team1_player_ids)
+    record["team2PlayerIds"] = list(team2_player_ids)
+    return record
+
+def player_stats(player: Player) -> Dict[str, float]:
+    # The fields a match changes on a player
+    return {
+        "hoursPlayed": player.hoursPlayed,
+        "elo": player.elo,
+        "wins": player.wins,
+        "losses": player.losses,
+    }
+
+def update_match_stats(first: Team, second: Team, S: float) -> None:
+    # Applies the result to the in-memory players; create_match commits them, and its timing covers this.
+    # S is the first team's score. The engine rates flat arrays, so both rosters get handles here.
+    players = first.players + second.players
+    elo = [player.elo for player in players]
+    hours = [player.hoursPlayed for player in players]
+    size = len(first.players)
+    rating_engine.rate_match(elo, hours, Roster(range(size), elo), Roster(range(size, len(players)), elo), S)
+
+    for player, rating in zip(players, elo):
         # Update Elo
-        player.elo += round(K * (S - E))
+        player.elo = rating
 
-        # Update wins/losses
-        if S == 1:
+    # Update wins/losses
+    if S != 0.5:
+        winners, losers = (first, second) if S == 1 else (second, first)
+        for player in winners.players:
             player.wins += 1
-        elif S == 0:
+        for player in losers.players:
             player.losses += 1
 
-        # Save updated player to the database
-        update_player_in_db(player)
 
+@timed
+def create_matches_bulk(matches: List[Match]) -> List[Match]:
+    # Ratings live in flat arrays indexed by a dense per-player handle
+    handles: Dict[str, int] = {}
+    player_ids: List[str] = []
+    elo: List[float] = []
+    hours: List[int] = []
+    wins: List[int] = []
+    losses: List[int] = []
+    # One roster per team; a player is on one team only, so its Elo total stays current across the batch
+    rosters: Dict[str, Roster] = {}
+
+    def roster(team_id: str, label: str, index: int) -> Roster:
+        members = rosters.get(team_id)
+        if members is not None:
+            return members
+        team_data = db.teams.get(team_id)
+        if not team_data:
+            raise HTTPException(status_code=404, detail=f"Match {index}: {label} with ID {team_id} not found")
+        members = []
+        for player_id in team_data["players"]:
+            handle = handles.get(player_id)
+            if handle is None:
+                doc = players_table.get(player_id)
+                handle = handles[player_id] = len(player_ids)
+                player_ids.append(player_id)
+                elo.append(doc["elo"])
+                hours.append(doc["hoursPlayed"])
+                wins.append(doc["wins"])
+                losses.append(doc["losses"])
+            members.append(handle)
+        rosters[team_id] = Roster(members, elo)
+        return rosters[team_id]
+
+    with db.lock:
+        # Replay the batch in order; any invalid match rejects the whole batch
+        for index, match in enumerate(matches):
+            if match.duration < 1:
+                raise HTTPException(status_code=400, detail=f"Match {index}: Duration must be at least 1 hour")
+            team1 = roster(match.team1Id, "Team1", index)
+            team2 = roster(match.team2Id, "Team2", index)
+
+            # Both sides share one set of handles, so a team cannot be replayed against itself
+            if match.team1Id == match.team2Id:
+                raise HTTPException(status_code=400, detail=f"Match {index}: A team cannot play itself")
+            if match.winningTeamId and match.winningTeamId not in (match.team1Id, match.team2Id):
+                raise HTTPException(status_code=400, detail=f"Match {index}: Invalid winningTeamId")
+
+            for h in team1.handles:
+                hours[h] += match.duration
+            for h in team2.handles:
+                hours[h] += match.duration
+
+            # Same rules and order as create_match: the winner (or team1 in a draw) is rated first
+            if not match.winningTeamId:
+                rating_engine.rate_match(elo, hours, team1, team2, S=0.5)
+                continue
+            winners, losers = (team1, team2) if match.winningTeamId == match.team1Id else (team2, team1)
+            rating_engine.rate_match(elo, hours, winners, losers, S=1)
+            for h in winners.handles:
+                wins[h] += 1
+            for h in losers.handles:
+                losses[h] += 1
+
+        # Commit the final state of every touched player and all match records at once
+        unit = db.unit_of_work()
+        for h, player_id in enumerate(player_ids):
+            unit.update(players_table, player_id, {
+                "hoursPlayed": hours[h],
+                "elo": elo[h],
+                "wins": wins[h],
+                "losses": losses[h],
+            })
+        for match in matches:
+            unit.insert(matches_table, match_record(
+                match, db.teams.get(match.team1Id)["players"], db.teams.get(match.team2Id)["players"]
+            ))
+        commit_match_unit(unit)
+        response_cache.invalidate(
+            *(team_key(team_id) for team_id in rosters),
+            *(player_key(player_id) for player_id in player_ids),
+        )
+    MATCHES_PROCESSED.inc(len(matches))
+    return matches
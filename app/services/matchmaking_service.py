@@ -0,0 +1,216 @@
+import heapq
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from fastapi import HTTPException
+from app import config
+from app.models.matchmaking import Pairing, QueueStatus
+from app.services.rating import expected_score
+from app.storage.database import db
+from app.storage.sorted_index import SortedIndex
+from app.metrics import timed
+
+# Injectable clock so tests can control waiting times
+clock = time.monotonic
+
+
+class MatchmakingQueue:
+    """Teams waiting for an opponent, ordered by average Elo.
+
+    A team is paired with its nearest neighbour in Elo, which is also the
+    opponent with the smallest expected-score imbalance. Finding it is an
+    O(log N) lookup in the sorted queue. Each waiting team accepts opponents
+    within a window that widens the longer it waits, so outliers still get a
+    match eventually.
+
+    Only neighbours in the Elo order can pair, and a pair of neighbours
+    becomes acceptable at a known time: when the window of the team that
+    has waited longer reaches their difference. Those times are kept in a
+    heap as neighbours come and go, so a sweep only visits the pairs that
+    are due instead of the whole queue. Entries for pairs that stopped being
+    neighbours are dropped as they come up.
+
+    Pairings are kept for ``GET /matchmaking/pairings``: the latest
+    ``kept`` of them, trimmed in blocks, so the list does not grow forever.
+    """
+
+    def __init__(self, kept: Optional[int] = None):
+        self.kept = kept or config.MATCHMAKING_PAIRINGS_KEPT
+        self._lock = threading.Lock()
+        self._index = SortedIndex()
+        self._queued: Dict[str, Tuple[tuple, float]] = {}
+        # (due time, tie-breaker, left entry, right entry) for neighbours that will accept each other
+        self._due: List[tuple] = []
+        self._pairings: List[Pairing] = []
+        # Pairing id to its position counted from the first pairing ever made; _first is that of _pairings[0]
+        self._positions: Dict[str, int] = {}
+        self._first = 0
+        self._sequence = 0
+
+    def __len__(self) -> int:
+        return len(self._queued)
+
+    def window(self, waited: float) -> float:
+        return min(config.MATCHMAKING_WINDOW + config.MATCHMAKING_WIDEN_PER_SECOND * waited,
+                   config.MATCHMAKING_MAX_WINDOW)
+
+    def enqueue(self, team_id: str, average_elo: float) -> Optional[Pairing]:
+        now = clock()
+        with self._lock:
+            if team_id in self._queued:
+                raise HTTPException(status_code=400, detail=f"Team {team_id} is already queued")
+            # Waiting teams that have become acceptable to each other pair first
+            self._pair_due(now)
+
+            # Only the closest team below and above can be the best opponent
+            key = (average_elo,)
+            position = self._index.count_before(key)
+            neighbours = self._index.slice(max(position - 1, 0), 2)
+            best = None
+            for candidate in neighbours:
+                difference = abs(candidate[0] - average_elo)
+                waited = now - self._queued[candidate[2]][1]
+                if difference <= self.window(waited) and (best is None or difference < best[0]):
+                    best = (difference, candidate)
+
+            if best is not None:
+                return self._pair(best[1], team_id, average_elo)
+
+            self._sequence += 1
+            entry = (average_elo, self._sequence, team_id)
+            self._index.add(entry)
+            self._queued[team_id] = (entry, now)
+            # The new team now sits between the two candidates, or before the first if it is the lowest
+            if position > 0:
+                left, right = neighbours[0], (neighbours[1] if len(neighbours) == 2 else None)
+            else:
+                left, right = None, (neighbours[0] if neighbours else None)
+            if left is not None:
+                self._schedule(left, entry)
+            if right is not None:
+                self._schedule(entry, right)
+            return None
+
+    def sweep(self) -> List[Pairing]:
+        # Pair neighbours whose windows have widened enough while they waited
+        with self._lock:
+            return self._pair_due(clock())
+
+    def leave(self, team_id: str) -> None:
+        with self._lock:
+            if team_id not in self._queued:
+                raise HTTPException(status_code=404, detail=f"Team {team_id} is not queued")
+            self._remove(team_id)
+
+    def pairings(self, limit: int, after: Optional[str] = None) -> List[Pairing]:
+        # From the oldest pairing still kept; a cursor whose pairing was trimmed is invalid
+        with self._lock:
+            if after is None:
+                start = 0
+            elif after in self._positions:
+                start = self._positions[after] + 1 - self._first
+            else:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            return self._pairings[start:start + limit]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._index.clear()
+            self._queued.clear()
+            self._due.clear()
+            self._pairings.clear()
+            self._positions.clear()
+            self._first = 0
+
+    def _pair_due(self, now: float) -> List[Pairing]:
+        made = []
+        while self._due and self._due[0][0] <= now:
+            _, _, left, right = heapq.heappop(self._due)
+            if not self._adjacent(left, right):
+                continue
+            # The team that has waited longer set the window and becomes team1
+            older, newer = (left, right) if self._queued[left[2]][1] <= self._queued[right[2]][1] else (right, left)
+            self._remove(newer[2])
+            made.append(self._pair(older, newer[2], newer[0]))
+        return made
+
+    def _schedule(self, left: tuple, right: tuple) -> None:
+        # Neighbours in the Elo order accept each other once the older one's window reaches their difference
+        difference = right[0] - left[0]
+        if difference > config.MATCHMAKING_MAX_WINDOW:
+            return
+        since = min(self._queued[left[2]][1], self._queued[right[2]][1])
+        widen = max(difference - config.MATCHMAKING_WINDOW, 0)
+        if widen and config.MATCHMAKING_WIDEN_PER_SECOND <= 0:
+            return
+        due = since + (widen / config.MATCHMAKING_WIDEN_PER_SECOND if widen else 0)
+        self._sequence += 1
+        heapq.heappush(self._due, (due, self._sequence, left, right))
+
+    def _adjacent(self, left: tuple, right: tuple) -> bool:
+        # Both still queued, as these entries, with nobody in between
+        for entry in (left, right):
+            queued = self._queued.get(entry[2])
+            if queued is None or queued[0] != entry:
+                return False
+        return self._index.count_before(right) == self._index.count_before(left) + 1
+
+    def _pair(self, waiting: tuple, team_id: str, average_elo: float) -> Pairing:
+        self._remove(waiting[2])
+        pairing = Pairing(
+            team1Id=waiting[2],
+            team2Id=team_id,
+            eloDifference=abs(waiting[0] - average_elo),
+            expectedScore=expected_score(average_elo, waiting[0]),
+        )
+        self._positions[pairing.id] = self._first + len(self._pairings)
+        self._pairings.append(pairing)
+        if len(self._pairings) >= 2 * self.kept:
+            # Trim in blocks, so keeping the window costs O(1) per pairing
+            trimmed = len(self._pairings) - self.kept
+            for old in self._pairings[:trimmed]:
+                del self._positions[old.id]
+            del self._pairings[:trimmed]
+            self._first += trimmed
+        return pairing
+
+    def _remove(self, team_id: str) -> None:
+        entry, _ = self._queued.pop(team_id)
+        position = self._index.count_before(entry)
+        self._index.remove(entry)
+        # Its neighbours now face each other
+        if 0 < position < len(self._index):
+            self._schedule(*self._index.slice(position - 1, 2))
+
+
+matchmaking_queue = MatchmakingQueue()
+
+def check_available() -> None:
+    # The queue lives in this process; with the shared backend each worker would keep its own,
+    # and teams queued on different workers would never be paired
+    if config.STORAGE_BACKEND == "shared":
+        raise HTTPException(status_code=501, detail="Matchmaking is not available with the shared storage backend")
+
+def average_elo(team_id: str) -> float:
+    team_data = db.teams.get(team_id)
+    if not team_data:
+        raise HTTPException(status_code=404, detail=f"Team with ID {team_id} not found")
+    return sum(db.players.get(player_id)["elo"] for player_id in team_data["players"]) / len(team_data["players"])
+
+@timed
+def enqueue_team(team_id: str) -> QueueStatus:
+    check_available()
+    elo = average_elo(team_id)
+    pairing = matchmaking_queue.enqueue(team_id, elo)
+    return QueueStatus(teamId=team_id, averageElo=elo, status="paired" if pairing else "queued", pairing=pairing)
+
+@timed
+def get_pairings(limit: int, after: Optional[str] = None) -> List[Pairing]:
+    check_available()
+    # Give waiting teams whose windows have widened a chance before reporting
+    matchmaking_queue.sweep()
+    return matchmaking_queue.pairings(limit, after)
+
+def leave_queue(team_id: str) -> None:
+    check_available()
+    matchmaking_queue.leave(team_id)
@@ -1,29 +1,78 @@
 from fastapi import HTTPException
-from tinydb import TinyDB, Query
-from tinydb.storages import MemoryStorage
+from typing import Iterator, List, Optional, Tuple
 from app.models.player import Player
-from uuid import uuid4
+from app.models.ranking import PlayerRank
+from app.cache import player_key, response_cache, team_key
+from app.serialization import player_json
+from app.storage.database import db
+from app.metrics import timed
 
-# Initialize the in-memory database
-db = TinyDB(storage=MemoryStorage)  # You can replace MemoryStorage with a file-based storage for persistence
-players_table = db.table("players")
-PlayerQuery = Query()
+# Players live in the shared store, indexed for O(1) lookups by id, nickname and team.
+# Stored records were validated on the way in, so reads build models with model_construct.
+players_table = db.players
 
+@timed
 def create_player(player: Player) -> Player:
-    # Check if nickname already exists
-    if players_table.search(PlayerQuery.nickname == player.nickname):
-        raise HTTPException(status_code=400, detail="Nickname already exists")
+    # The check and the insert form one write, so concurrent signups cannot both pass
+    with db.lock:
+        # Check if nickname already exists
+        if players_table.contains("nickname", player.nickname):
+            raise HTTPException(status_code=400, detail="Nickname already exists")
 
-    # Insert player into the database
-    players_table.insert(player.model_dump())  
-    return player 
+        # Insert player into the database
+        db.insert(players_table, new_player_record(player))
+    return player
+
+@timed
+def create_players_bulk(players: List[Player]) -> List[Player]:
+    # Validate the whole batch against the store and itself, then insert it as one write.
+    # Any invalid item rejects the batch; every invalid item is reported with its index.
+    with db.lock:
+        errors = []
+        nicknames, ids = set(), set()
+        for index, player in enumerate(players):
+            if player.nickname in nicknames or players_table.contains("nickname", player.nickname):
+                errors.append({"index": index, "detail": "Nickname already exists"})
+            elif player.id in ids or player.id in players_table:
+                errors.append({"index": index, "detail": "Player ID already exists"})
+            nicknames.add(player.nickname)
+            ids.add(player.id)
+        if errors:
+            raise HTTPException(status_code=400, detail=errors)
+
+        unit = db.unit_of_work()
+        for player in players:
+            unit.insert(players_table, new_player_record(player))
+        unit.commit()
+    return players
+
+def new_player_record(player: Player) -> dict:
+    # A new player's rating history starts from the rating they are created with, unless given
+    if player.initialElo is None:
+        player.initialElo = player.elo
+    return player.model_dump()
+
+def player_fields(player: Player) -> dict:
+    # The fields a full update writes: without an initialElo, the stored one is kept
+    fields = player.model_dump()
+    if fields["initialElo"] is None:
+        del fields["initialElo"]
+    return fields
 
 def get_player(player_id: str) -> Player:
     # Fetch player by ID
-    result = players_table.search(PlayerQuery.id == player_id)
+    result = players_table.get(player_id)
     if not result:
         raise HTTPException(status_code=404, detail="Player not found")
-    return Player(**result[0])
+    return Player.model_construct(**result)
+
+@timed
+def get_player_json(player_id: str) -> bytes:
+    # Read fast path: encode the stored record straight to JSON, no model in between
+    result = players_table.get(player_id)
+    if not result:
+        raise HTTPException(status_code=404, detail="Player not found")
+    return player_json(result)
 
 def get_all_players() -> list[Player]:
     # Fetch all players
@@ -31,12 +80,58 @@ def get_all_players() -> list[Player]:
     if not records:
         raise HTTPException(status_code=404, detail="No players found")
     
-    return [Player(**record) for record in records]
+    return [Player.model_construct(**record) for record in records]
+
+@timed
+def get_players_page(limit: int, after: Optional[str] = None) -> Tuple[List[Player], Optional[str]]:
+    # One page in insertion order, plus the cursor for the next page (None on the last one)
+    try:
+        records = players_table.page(after=after, limit=limit + 1)
+    except KeyError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not records and after is None:
+        raise HTTPException(status_code=404, detail="No players found")
+
+    players = [Player.model_construct(**record) for record in records[:limit]]
+    next_cursor = players[-1].id if len(records) > limit else None
+    return players, next_cursor
+
+def iter_players(batch_size: int = 1000) -> Iterator[Player]:
+    # Walk the whole table a page at a time, so memory stays bounded by the batch size
+    after = None
+    while True:
+        records = players_table.page(after=after, limit=batch_size)
+        if not records:
+            return
+        for record in records:
+            yield Player.model_construct(**record)
+        after = records[-1]["id"]
+
+@timed
+def get_leaderboard(limit: int, offset: int = 0) -> List[PlayerRank]:
+    # Served from the incrementally maintained leaderboard index, never a full sort
+    records = players_table.ordered("leaderboard", offset=offset, limit=limit)
+    return [
+        PlayerRank(rank=players_table.count_before("leaderboard", record) + 1, player=Player.model_construct(**record))
+        for record in records
+    ]
 
+@timed
+def get_player_rank(player_id: str) -> PlayerRank:
+    record = players_table.get(player_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="Player not found")
+    return PlayerRank(rank=players_table.count_before("leaderboard", record) + 1, player=Player.model_construct(**record))
+
+@timed
 def update_player_in_db(player: Player):
-    from app.services.team_service import update_team_in_db
-    players_table.update(player.model_dump(), PlayerQuery.id == player.id)
-    
-    # Synchronize with the team if the player is part of one
-    if player.team:
-        update_team_in_db(player.team, player)
\ No newline at end of file
+    # Teams reference players by ID, so there is no team copy to synchronize
+    with db.lock:
+        stored = players_table.get(player.id)
+        if not stored:
+            raise HTTPException(status_code=404, detail="Player not found")
+        teams = {stored["team"], player.team} - {None}
+        db.update(players_table, player.id, player_fields(player))
+
+        # Drop the cached responses that embed this player
+        response_cache.invalidate(player_key(player.id), *(team_key(team_id) for team_id in teams))
@@ -0,0 +1,117 @@
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from app import config
+
+# The rating rules. Every path that changes ratings (create_match, the bulk path and
+# the history replay) rates through the configured engine, so a result never depends
+# on which of them recorded the match.
+
+# K-factor ladder: K_FACTORS[i] applies below K_THRESHOLDS[i] hours played
+K_THRESHOLDS = (500, 1000, 3000, 5000)
+K_FACTORS = (50, 40, 30, 20, 10)
+
+# The exponent is rounded to an integer, so expected scores come from a small table
+EXPECTED_SCORES = {exponent: 1 / (1 + 10 ** exponent) for exponent in range(-10, 11)}
+
+def expected_score(opponent_elo: float, elo: float) -> float:
+    exponent = round((opponent_elo - elo) / 400)
+    E = EXPECTED_SCORES.get(exponent)
+    return E if E is not None else 1 / (1 + 10 ** exponent)
+
+def elo_total(elos: Iterable[float]) -> float:
+    # A roster's Elo sum. Engines keep it current by adding each change instead of
+    # re-summing; changes are whole points, so for whole-point ratings the sum stays exact.
+    return sum(elos)
+
+
+class Roster:
+    """One side of a match: player handles into the rating arrays and their Elo total.
+
+    Engines rate array-backed state: ``elo`` and ``hours`` are indexed by a
+    dense player handle. ``total`` is kept current by the engine as it rates
+    the roster, so a team's average is never re-summed.
+    """
+
+    __slots__ = ("handles", "total")
+
+    def __init__(self, handles: Sequence[int], elo: Sequence[float]):
+        self.handles = handles
+        self.total = elo_total(elo[h] for h in handles)
+
+    def __len__(self) -> int:
+        return len(self.handles)
+
+
+class EloEngine:
+    """Team Elo: each player is rated against the opponent team's average.
+
+    The side listed first is rated first, and the second side against the
+    first side's updated average. K comes from a ladder over hours played.
+    Both are precomputed: ``k_by_hours`` maps every hour count below the
+    last threshold to its K, and ``changes[S][K][exponent]`` holds the
+    rounded change for every match score, K and tabled exponent. Exponents
+    outside the table use the exact formula.
+
+    Another rule set (a Glicko-style variant, say) is a class with the same
+    ``rate_match``, registered in ``ENGINES``. It can keep extra per-player
+    arrays, such as a rating deviation, indexed by the same handles.
+    """
+
+    name = "elo"
+
+    def __init__(self, k_thresholds: Sequence[int] = K_THRESHOLDS, k_factors: Sequence[int] = K_FACTORS):
+        self.k_thresholds = tuple(k_thresholds)
+        self.k_factors = tuple(k_factors)
+        self.k_by_hours = tuple(
+            self.k_factors[bisect_right(self.k_thresholds, hours)] for hours in range(self.k_thresholds[-1])
+        )
+        self.changes: Dict[float, Dict[int, Dict[int, int]]] = {
+            S: {K: {exponent: round(K * (S - E)) for exponent, E in EXPECTED_SCORES.items()} for K in self.k_factors}
+            for S in (0, 0.5, 1)
+        }
+
+    def k_factor(self, hours_played: int) -> int:
+        # Rating adjustment based on hours played; past the table every player is on the last rung
+        if hours_played >= len(self.k_by_hours):
+            return self.k_factors[-1]
+        return self.k_by_hours[hours_played] if hours_played >= 0 else self.k_factors[0]
+
+    def elo_change(self, elo: float, hours_played: int, opponent_elo: float, S: float) -> int:
+        # Points a player with ``elo`` gains (or loses) for score S against a team averaging ``opponent_elo``
+        return round(self.k_factor(hours_played) * (S - expected_score(opponent_elo, elo)))
+
+    def rate_roster(self, elo: List[float], hours: Sequence[int], roster: Roster, opponent_elo: float,
+                    S: float) -> None:
+        # elo_change in place for every member, with the table lookups inlined: this is the per-match hot loop
+        by_k = self.changes.get(S)
+        k_by_hours, table_size = self.k_by_hours, len(self.k_by_hours)
+        total = 0
+        for h in roster.handles:
+            hours_played = hours[h]
+            K = k_by_hours[hours_played] if 0 <= hours_played < table_size else self.k_factor(hours_played)
+            change = by_k[K].get(round((opponent_elo - elo[h]) / 400)) if by_k is not None else None
+            if change is None:
+                change = self.elo_change(elo[h], hours_played, opponent_elo, S)
+            elo[h] += change
+            total += change
+        roster.total += total
+
+    def rate_match(self, elo: List[float], hours: Sequence[int], first: Roster, second: Roster, S: float) -> None:
+        # Apply one result in place; S is the first side's score (1 win, 0.5 draw, 0 loss)
+        self.rate_roster(elo, hours, first, second.total / len(second), S)
+        self.rate_roster(elo, hours, second, first.total / len(first), 1 - S)
+
+
+# Engines selectable with the RATING_ENGINE setting
+ENGINES = {EloEngine.name: EloEngine}
+
+def create_engine(name: Optional[str] = None):
+    # Build the rating engine named by the RATING_ENGINE setting
+    name = name or config.RATING_ENGINE
+    if name not in ENGINES:
+        raise ValueError(f"Unknown RATING_ENGINE {name!r}")
+    return ENGINES[name]()
+
+
+rating_engine = create_engine()
@@ -0,0 +1,116 @@
+"""Rebuild every player's rating by replaying the match history.
+
+Run with ``python -m app.services.rating_service [--engine elo] [--initial-elo RATING]``.
+It opens the store configured by STORAGE_BACKEND/DATA_DIR, like the app does,
+so with the ``wal`` backend the rebuilt ratings are journaled and persist.
+"""
+import argparse
+import time
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.cache import response_cache
+from app.metrics import timed
+from app.services.rating import Roster, create_engine, rating_engine
+from app.storage.database import db
+
+players_table = db.players
+matches_table = db.matches
+
+
+def history(batch_size: int) -> Iterator[dict]:
+    # Every match record in insertion order, read a page at a time
+    after: Optional[str] = None
+    while True:
+        records = matches_table.page(after=after, limit=batch_size)
+        if not records:
+            return
+        yield from records
+        after = records[-1]["id"]
+
+def player_handles(record: dict, handles: Dict[str, int]) -> Tuple[List[int], List[int]]:
+    # Both line-ups of a match as handles into the rating arrays
+    try:
+        return ([handles[player_id] for player_id in record["team1PlayerIds"]],
+                [handles[player_id] for player_id in record["team2PlayerIds"]])
+    except KeyError as error:
+        raise ValueError(f"Match {record['id']} references unknown player {error.args[0]}") from None
+
+@timed
+def replay_ratings(engine=None, initial_elo: Optional[float] = None, batch_size: int = 10_000) -> Dict[str, int]:
+    # Rebuilds Elo only. Every player the history mentions restarts at their own initialElo, or at
+    # ``initial_elo`` for everyone when given; the others keep their rating. Hours, wins and losses
+    # are the players' own and are not rewritten: the hours a player had before the history (stored
+    # hours minus what the history added) are where the replay's hours start, so K-factors see the
+    # hours each match was played with.
+    # State is one slot per player in typed arrays, and matches are read a page at a time,
+    # so memory is bounded by the roster however long the history is.
+    engine = engine or rating_engine
+    with db.lock:
+        handles: Dict[str, int] = {}
+        current = array("d")
+        start = array("d")
+        hours = array("q")
+        for h, doc in enumerate(players_table):
+            handles[doc["id"]] = h
+            current.append(doc["elo"])
+            start.append(doc["initialElo"] if initial_elo is None else initial_elo)
+            hours.append(doc["hoursPlayed"])
+        elo = array("d", current)
+
+        for record in history(batch_size):
+            first, second = player_handles(record, handles)
+            for h in first + second:
+                hours[h] -= record["duration"]
+                elo[h] = start[h]
+
+        replayed = 0
+        for record in history(batch_size):
+            first, second = player_handles(record, handles)
+            for h in first + second:
+                hours[h] += record["duration"]
+            team1, team2 = Roster(first, elo), Roster(second, elo)
+
+            # Same order as create_match: the winner (or team1 in a draw) is rated first
+            winner = record["winningTeamId"]
+            if not winner:
+                engine.rate_match(elo, hours, team1, team2, 0.5)
+            elif winner == record["team1Id"]:
+                engine.rate_match(elo, hours, team1, team2, 1)
+            else:
+                engine.rate_match(elo, hours, team2, team1, 1)
+            replayed += 1
+
+        # Write back only the players whose rating changed, a batch per commit. The replay is
+        # deterministic, so after an interrupted run simply running it again finishes the job.
+        updated = 0
+        unit = db.unit_of_work()
+        for player_id, h in handles.items():
+            if elo[h] != current[h]:
+                unit.update(players_table, player_id, {"elo": elo[h]})
+                updated += 1
+            if len(unit) >= batch_size:
+                unit.commit()
+                unit = db.unit_of_work()
+        unit.commit()
+        response_cache.clear()
+    return {"players": len(handles), "matches": replayed, "updated": updated}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engine", default=None, help="rating engine (default: the RATING_ENGINE setting)")
+    parser.add_argument("--initial-elo", type=float, default=None,
+                        help="rating every player in the match history starts from (default: each player's initialElo)")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="matches read, and players written, per batch")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        db.open()
+        result = replay_ratings(create_engine(args.engine), args.initial_elo, args.batch_size)
+    finally:
+        db.close()
+    elapsed = time.perf_counter() - start
+    print(f"replayed {result['matches']:,} matches for {result['players']:,} players in {elapsed:.1f}s; "
+          f"{result['updated']:,} ratings changed")
@@ -0,0 +1,52 @@
+from fastapi import HTTPException
+from app.models.stats import EloBucket, LeagueStats, TeamStats
+from app.storage.database import ELO_BUCKET_WIDTH, db
+from app.metrics import timed
+
+# Statistics are read from the running aggregates the tables keep (see Database), never recomputed
+teams_table = db.teams
+players_table = db.players
+matches_table = db.matches
+
+@timed
+def get_team_stats(team_id: str) -> TeamStats:
+    team_data = teams_table.get(team_id)
+    if not team_data:
+        raise HTTPException(status_code=404, detail=f"Team with ID {team_id} not found")
+
+    players, elo, hours = players_table.totals("team", team_id) or (0, 0, 0)
+    played, wins, losses, _ = matches_table.totals("team", team_id) or (0, 0, 0, 0)
+    return TeamStats(
+        teamId=team_id,
+        teamName=team_data["teamName"],
+        players=players,
+        averageElo=elo / players if players else 0,
+        totalHoursPlayed=hours,
+        matchesPlayed=played,
+        wins=wins,
+        losses=losses,
+        draws=played - wins - losses,
+        winRate=wins / played if played else 0,
+    )
+
+@timed
+def get_league_stats() -> LeagueStats:
+    # The team totals count every player, so their sums over all teams are the league's: O(1),
+    # plus the histogram's buckets
+    players, elo, hours = players_table.total("team") or (0, 0, 0)
+    buckets = sorted(players_table.groups("elo").items())
+    decided = matches_table.totals("outcome", "decided") or (0, 0)
+    draws = matches_table.totals("outcome", "draw") or (0, 0)
+    return LeagueStats(
+        players=players,
+        teams=len(teams_table),
+        matches=decided[0] + draws[0],
+        draws=draws[0],
+        averageElo=elo / players if players else 0,
+        totalHoursPlayed=hours,
+        totalMatchHours=decided[1] + draws[1],
+        eloHistogram=[
+            EloBucket(minElo=bucket, maxElo=bucket + ELO_BUCKET_WIDTH, players=totals[0])
+            for bucket, totals in buckets
+        ],
+    )
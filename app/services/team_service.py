@@ -1,73 +1,130 @@
 from fastapi import HTTPException
-from tinydb import TinyDB, Query
-from app.models.team import Team
+from app.models.team import Team, TeamCreate
 from app.models.player import Player
-from app.services.player_service import get_player  # Assuming player service is correctly working
-from uuid import uuid4
+from app.services.player_service import get_player, player_fields
 from typing import List
-from tinydb.storages import MemoryStorage  # Importing MemoryStorage
+from uuid import uuid4
+from app.cache import player_key, response_cache, team_key
+from app.serialization import team_json
+from app.storage.database import db
+from app.metrics import timed
 
-# Initialize the in-memory database (TinyDB with MemoryStorage)
-db = TinyDB(storage=MemoryStorage)  # You can switch to file-based storage if desired
-teams_table = db.table("teams")
-players_table = db.table("players")  # Define the players_table for reference
-PlayerQuery = Query()  # Define the query for player lookups
-TeamQuery = Query()  # Define the query for team lookups
+# Teams share the single store; a team document holds its player IDs only
+teams_table = db.teams
+players_table = db.players
 
+@timed
 def create_team(team_name: str, player_ids: List[str]) -> Team:
-    # Validation: Team name must be unique
-    if teams_table.search(TeamQuery.teamName == team_name):
-        raise HTTPException(status_code=400, detail="Team name must be unique")
+    with db.lock:
+        # Validation: Team name must be unique
+        if teams_table.contains("teamName", team_name):
+            raise HTTPException(status_code=400, detail="Team name must be unique")
     
-    # Validation: Must have exactly 5 players
-    if len(player_ids) != 5:
-        raise HTTPException(status_code=400, detail="A team must have exactly 5 players")
+        # Validation: Must have exactly 5 players
+        if len(player_ids) != 5:
+            raise HTTPException(status_code=400, detail="A team must have exactly 5 players")
     
-    # Fetch players from player IDs and validate
-    players = []
-    for player_id in player_ids:
-        player = get_player(player_id)  # Using the player service to get player
-        if player.team is not None:
-            raise HTTPException(status_code=400, detail=f"Player {player.nickname} is already in a team")
-        players.append(player)
+        # Fetch players from player IDs and validate
+        players = []
+        for player_id in player_ids:
+            player = get_player(player_id)  # Using the player service to get player
+            if player.team is not None:
+                raise HTTPException(status_code=400, detail=f"Player {player.nickname} is already in a team")
+            players.append(player)
 
-    # Create the team
-    team = Team(teamName=team_name, players=players)
-    teams_table.insert(team.model_dump())  # Store team in the database
+        # Create the team
+        team = Team(teamName=team_name, players=players)
+        unit = db.unit_of_work()
+        unit.insert(teams_table, {"id": team.id, "teamName": team.teamName, "players": list(player_ids)})
 
-    # Assign team ID to players
-    for player in players:
-        player.team = team.id  # Assign the team ID to the `team` attribute
-        # Update player in the player database with new team assignment
-        player_dict = player.model_dump()
-        players_table.update(player_dict, PlayerQuery.id == player.id)
+        # Assign team ID to players
+        for player in players:
+            player.team = team.id  # Assign the team ID to the `team` attribute
+            # Update player in the player database with new team assignment
+            unit.update(players_table, player.id, {"team": team.id})
+        unit.commit()
+        response_cache.invalidate(*(player_key(player.id) for player in players))
 
     return team
 
+@timed
+def create_teams_bulk(teams: List[TeamCreate]) -> List[Team]:
+    # Validate the whole batch against the store and itself, then insert it as one write.
+    # Any invalid item rejects the batch; every invalid item is reported with its index.
+    with db.lock:
+        errors = []
+        names, claimed = set(), set()
+        rosters = []
+        for index, request in enumerate(teams):
+            error = None
+            players = [players_table.get(player_id) for player_id in request.players]
+            if request.teamName in names or teams_table.contains("teamName", request.teamName):
+                error = "Team name must be unique"
+            elif len(request.players) != 5:
+                error = "A team must have exactly 5 players"
+            elif None in players:
+                error = "Player not found"
+            else:
+                for player in players:
+                    if player["team"] is not None:
+                        error = f"Player {player['nickname']} is already in a team"
+                    elif player["id"] in claimed:
+                        error = f"Player {player['nickname']} is listed more than once"
+                    if error:
+                        break
+                    claimed.add(player["id"])
+            if error:
+                errors.append({"index": index, "detail": error})
+            names.add(request.teamName)
+            rosters.append(players)
+        if errors:
+            raise HTTPException(status_code=400, detail=errors)
+
+        created = []
+        unit = db.unit_of_work()
+        for request, players in zip(teams, rosters):
+            team_id = str(uuid4())
+            unit.insert(teams_table, {"id": team_id, "teamName": request.teamName, "players": list(request.players)})
+            for player in players:
+                unit.update(players_table, player["id"], {"team": team_id})
+            team = Team.model_construct(id=team_id, teamName=request.teamName, players=[
+                Player.model_construct(**{**player, "team": team_id}) for player in players
+            ])
+            created.append(team)
+        unit.commit()
+        response_cache.invalidate(*(player_key(player_id) for player_id in claimed))
+    return created
+
 def get_team_by_id(team_id: str) -> Team:
 
-    team_data = teams_table.get(TeamQuery.id == team_id)  # Get team by ID
+    team_data = teams_table.get(team_id)  # Get team by ID
     if not team_data:
         raise HTTPException(status_code=404, detail=f"Team with ID {team_id} not found")
-    return Team(**team_data)
 
-def update_team_in_db(team_id: str, player: Player):
+    # Assemble the response from the pre-validated player documents
+    players = [Player.model_construct(**players_table.get(player_id)) for player_id in team_data["players"]]
+    return Team.model_construct(id=team_data["id"], teamName=team_data["teamName"], players=players)
 
-    # Fetch the team by its ID
-    team_data = teams_table.get(TeamQuery.id == team_id)
+@timed
+def get_team_json(team_id: str) -> bytes:
+    # Read fast path: encode the stored records straight to JSON, no models in between
+    team_data = teams_table.get(team_id)
     if not team_data:
         raise HTTPException(status_code=404, detail=f"Team with ID {team_id} not found")
+    return team_json(team_data, [players_table.get(player_id) for player_id in team_data["players"]])
+
+@timed
+def update_team_in_db(team_id: str, player: Player):
 
-    # Deserialize the team
-    team = Team(**team_data)
+    with db.lock:
+        # Fetch the team by its ID
+        team_data = teams_table.get(team_id)
+        if not team_data:
+            raise HTTPException(status_code=404, detail=f"Team with ID {team_id} not found")
 
-    # Update the player's data in the team's players list
-    for i, team_player in enumerate(team.players):
-        if team_player.id == player.id:
-            team.players[i] = player  # Replace the player's data
-            break
-    else:
-        raise HTTPException(status_code=404, detail=f"Player with ID {player.id} not found in team {team_id}")
+        if player.id not in team_data["players"]:
+            raise HTTPException(status_code=404, detail=f"Player with ID {player.id} not found in team {team_id}")
 
-    # Save the updated team back to the database
-    teams_table.update(team.model_dump(), TeamQuery.id == team.id)
\ No newline at end of file
+        # The team only references the player, so saving the player is enough
+        db.update(players_table, player.id, player_fields(player))
+        response_cache.invalidate(player_key(player.id), team_key(team_id))
@@ -0,0 +1,66 @@
+import gc
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.storage.database import Database
+
+logger = logging.getLogger(__name__)
+
+
+class StoreWarmUp:
+    """Loads the store in a background thread while the server already answers.
+
+    The app's lifespan starts it, so the port opens as soon as the code is
+    imported instead of after the snapshot is read. Until the load is done
+    ``GET /ready`` answers 503 and, with a persistent backend, the readiness
+    gate turns other requests away, so an orchestrator only routes traffic
+    to an instance once its store is loaded and indexed. A failed load
+    leaves the instance unready and is reported by ``/ready``.
+    """
+
+    def __init__(self, database: Database):
+        self.database = database
+        self.error: Optional[str] = None
+        self.seconds: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="store-warm-up", daemon=True)
+        self._thread.start()
+
+    def join(self) -> None:
+        if self._thread is not None:
+            self._thread.join()
+
+    def status(self) -> dict:
+        if self.database.ready.is_set():
+            return {"status": "ready", "loadSeconds": self.seconds}
+        if self.error is not None:
+            return {"status": "failed", "detail": self.error}
+        return {"status": "loading"}
+
+    @asynccontextmanager
+    async def lifespan(self, app):
+        self.start()
+        yield
+        # A load still running holds the store's lock; let it finish before closing the files
+        await run_in_threadpool(self.join)
+        self.database.close()
+
+    def _run(self) -> None:
+        start = time.perf_counter()
+        try:
+            self.database.open()
+        except Exception as error:
+            self.error = repr(error)
+            logger.exception("Loading the store failed")
+            return
+        self.seconds = time.perf_counter() - start
+        # The loaded documents live as long as the process: move them out of the collector's
+        # generations, so later full collections do not rescan the whole store
+        gc.freeze()
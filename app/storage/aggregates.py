@@ -0,0 +1,96 @@
+from math import isfinite
+from operator import add, neg, sub
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+Contributions = Sequence[Tuple[object, tuple]]
+
+
+def finite_numbers(values) -> bool:
+    # Whether every value is a finite number: NaN and infinities propagate through one sum
+    try:
+        return isfinite(sum(values, 0.0))
+    except (TypeError, OverflowError):
+        return all(isinstance(value, int) or isinstance(value, float) and isfinite(value) for value in values)
+
+
+class GroupedTotals:
+    """Running sums over a table's documents, per group.
+
+    ``contributions(doc)`` returns ``(group, values)`` pairs: the document
+    adds ``values``, a tuple of numbers, to the totals of each group it
+    names. The first value is a document count (usually 1), and a group is
+    dropped when its count falls back to zero, so an emptied group does not
+    keep floating-point residue from its sums.
+
+    The owning table adds a document on insert, and on update swaps its old
+    contributions for the new ones when they differ, so a write costs
+    O(groups the document touches) whatever the table size. Updates are
+    collected and summed per group first, so a batch changes each group's
+    totals once. The sums over every group are kept as well, for O(1)
+    totals of the whole table. Each group's totals are a tuple replaced as a
+    whole: readers take no lock and see every document's change either
+    applied or not.
+    """
+
+    def __init__(self, contributions: Callable[[dict], Contributions]):
+        self.contributions = contributions
+        self._totals: Dict[object, tuple] = {}
+        self._total: Optional[tuple] = None
+
+    def get(self, group) -> Optional[tuple]:
+        return self._totals.get(group)
+
+    def total(self) -> Optional[tuple]:
+        # The sums over every group, None when no document contributes
+        return self._total
+
+    def groups(self) -> Dict[object, tuple]:
+        return dict(self._totals)
+
+    def check(self, contributions: Contributions) -> None:
+        # Raise unless every contribution can be summed: a hashable group and finite numbers
+        for group, values in contributions:
+            hash(group)
+            if not finite_numbers(values):
+                raise ValueError(f"Cannot add {values!r} to the totals of group {group!r}")
+
+    def add(self, doc: dict) -> None:
+        for group, values in self.contributions(doc):
+            self._add(group, values)
+
+    @staticmethod
+    def collect(changes: Dict[object, tuple], old: Contributions, new: Contributions) -> None:
+        # Add a document's update from ``old`` to ``new`` contributions to the per-group ``changes``
+        # of a batch, which ``shift`` then applies once per group
+        if len(old) == len(new) == 1 and old[0][0] == new[0][0]:
+            # The common update: values change within the same group
+            group = old[0][0]
+            change = map(sub, new[0][1], old[0][1])
+            pending = changes.get(group)
+            changes[group] = tuple(change) if pending is None else tuple(map(add, pending, change))
+            return
+        for group, values in old:
+            pending = changes.get(group)
+            changes[group] = tuple(map(neg, values)) if pending is None else tuple(map(sub, pending, values))
+        for group, values in new:
+            pending = changes.get(group)
+            changes[group] = values if pending is None else tuple(map(add, pending, values))
+
+    def shift(self, changes: Dict[object, tuple]) -> None:
+        for group, change in changes.items():
+            self._add(group, change)
+
+    def clear(self) -> None:
+        self._totals.clear()
+        self._total = None
+
+    def _add(self, group, change: tuple) -> None:
+        # Add ``change`` to a group's totals and to the sums over every group
+        totals = self._totals.get(group)
+        totals = change if totals is None else tuple(map(add, totals, change))
+        if totals[0]:
+            self._totals[group] = totals
+        else:
+            self._totals.pop(group, None)
+        total = change if self._total is None else tuple(map(add, self._total, change))
+        self._total = total if total[0] else None
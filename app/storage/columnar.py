@@ -0,0 +1,219 @@
+import sys
+from array import array
+from math import isfinite
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from app.metrics import count_reads
+from app.storage.table import IndexedTable
+
+# Range of the "q" (signed 64-bit) columns
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+class ColumnStore:
+    """Documents kept column by column, one slot per dense integer handle.
+
+    A handle is the document's insertion position in the owning table, so
+    ``positions`` (id to handle) and ``order`` (handle to id) are the table's
+    own and are not duplicated here. Typed columns are ``array`` instances
+    (8 bytes a slot for ``"d"`` and ``"q"``); ``None`` as the type code keeps
+    Python objects in a list. Strings in ``interned`` columns are interned,
+    so a team id is held once however many players reference it.
+
+    It is a drop-in for the table's id-to-document dict: ``get`` and
+    iteration build a fresh dict per document. Those dicts are snapshots;
+    changes go through ``write``. Fields with no column are kept in a
+    per-handle overflow dict; a column field missing on insert reads back as
+    0 (typed) or None. Writes come from one thread at a time (the store's
+    lock); readers take no lock and retry a read that overlapped a write.
+    """
+
+    def __init__(self, columns: Dict[str, Optional[str]], positions: Dict[str, int], order: List[str],
+                 interned: Iterable[str] = ()):
+        self._positions = positions
+        self._order = order
+        self._interned = frozenset(interned)
+        self._columns = {
+            field: array(typecode) if typecode else [] for field, typecode in columns.items()
+        }
+        self._typecodes = {field: typecode for field, typecode in columns.items() if typecode}
+        self.typed = frozenset(self._typecodes)
+        self._extra: Dict[int, dict] = {}
+        self._version = 0
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._positions
+
+    def __getitem__(self, doc_id: str) -> dict:
+        return self.materialize(self._positions[doc_id])
+
+    def __setitem__(self, doc_id: str, doc: dict) -> None:
+        # Append a new document. Its handle is the next position, which the table registers
+        # only afterwards, so no reader can look the document up before every column holds it.
+        handle = len(self._order)
+        extra = {}
+        for field, value in doc.items():
+            if field != "id" and field not in self._columns:
+                extra[field] = value
+        for field, column in self._columns.items():
+            value = doc.get(field)
+            if value is None and type(column) is array:
+                value = 0
+            elif field in self._interned and type(value) is str:
+                value = sys.intern(value)
+            column.append(value)
+        if extra:
+            self._extra[handle] = extra
+
+    def extend(self, docs: List[dict]) -> None:
+        # Append a batch. Each column's values are converted first, so a value that does not fit
+        # raises before any column has grown.
+        start = len(self._order)
+        batches = []
+        for field, column in self._columns.items():
+            values = [doc.get(field) for doc in docs]
+            if type(column) is array:
+                values = array(column.typecode, [0 if value is None else value for value in values])
+            elif field in self._interned:
+                values = [sys.intern(value) if type(value) is str else value for value in values]
+            batches.append((column, values))
+        for handle, doc in enumerate(docs, start):
+            extra = {field: value for field, value in doc.items() if field != "id" and field not in self._columns}
+            if extra:
+                self._extra[handle] = extra
+        for column, values in batches:
+            column.extend(values)
+
+    def check_many(self, docs: List[dict]) -> None:
+        # check for a batch, converting each typed column's values in one go; if that fails,
+        # checking document by document raises the precise error
+        if len(docs) == 1:
+            # A single signup or match record: cheaper than building an array per column
+            self.check(docs[0])
+            return
+        for field, typecode in self._typecodes.items():
+            try:
+                values = array(typecode, [0 if doc.get(field) is None else doc[field] for doc in docs])
+            except (TypeError, OverflowError):
+                values = None
+            if values is None or typecode == "d" and not all(map(isfinite, values)):
+                for doc in docs:
+                    self.check(doc)
+
+    def check(self, fields: dict) -> None:
+        # Raise if a value cannot be stored in its typed column, before any column is touched:
+        # TypeError for the wrong type, ValueError for a value out of the column's range. NaN and
+        # infinities are out of range too: they have no place in an order, and JSON cannot hold them.
+        for field, value in fields.items():
+            typecode = self._typecodes.get(field)
+            if typecode is None or value is None:
+                continue
+            if typecode == "d":
+                if type(value) is not float:
+                    if not isinstance(value, (int, float)):
+                        raise TypeError(f"{field} must be a number, not {type(value).__name__}")
+                    try:
+                        value = float(value)
+                    except OverflowError:
+                        raise ValueError(f"{field} {value} is out of range") from None
+                if not isfinite(value):
+                    raise ValueError(f"{field} {value} is not a finite number")
+            elif not isinstance(value, int):
+                raise TypeError(f"{field} must be an integer, not {type(value).__name__}")
+            elif not INT64_MIN <= value <= INT64_MAX:
+                raise ValueError(f"{field} {value} is out of the 64-bit integer range")
+
+    def get(self, doc_id: str) -> Optional[dict]:
+        handle = self._positions.get(doc_id)
+        return self.materialize(handle) if handle is not None else None
+
+    def value(self, handle: int, field: str):
+        column = self._columns.get(field)
+        if column is not None:
+            return column[handle]
+        return self._order[handle] if field == "id" else self._extra.get(handle, {}).get(field)
+
+    def values(self) -> Iterator[dict]:
+        return (self.materialize(handle) for handle in range(len(self._order)))
+
+    def materialize(self, handle: int) -> dict:
+        # Readers take no lock: retry if a write ran meanwhile, so a document is never half-updated
+        while True:
+            version = self._version
+            doc = {"id": self._order[handle]}
+            for field, column in self._columns.items():
+                doc[field] = column[handle]
+            if handle in self._extra:
+                doc.update(self._extra[handle])
+            if version == self._version and not version & 1:
+                return doc
+
+    def write(self, doc_id: str, fields: dict) -> None:
+        # The version is odd while the columns are being written (a sequence lock)
+        handle = self._positions[doc_id]
+        self._version += 1
+        try:
+            for field, value in fields.items():
+                column = self._columns.get(field)
+                if column is None:
+                    if field != "id":
+                        self._extra.setdefault(handle, {})[field] = value
+                elif field in self._interned and type(value) is str:
+                    column[handle] = sys.intern(value)
+                else:
+                    column[handle] = value if value is not None or type(column) is not array else 0
+        finally:
+            self._version += 1
+
+    def clear(self) -> None:
+        for column in self._columns.values():
+            del column[:]
+        self._extra.clear()
+
+
+class ColumnarTable(IndexedTable):
+    """An ``IndexedTable`` whose documents live in a ``ColumnStore``.
+
+    Indexes, pagination and the write API are those of ``IndexedTable``.
+    What changes is the per-document cost: no dict and no boxed numbers are
+    kept per document, only one slot per column. Reads return freshly built
+    dicts, so, unlike ``IndexedTable``, a document read before an update
+    does not show it.
+    """
+
+    def __init__(self, name: str, columns: Dict[str, Optional[str]], interned: Iterable[str] = (), **indexes):
+        super().__init__(name, **indexes)
+        self._docs = ColumnStore(columns, self._positions, self._order, interned)
+
+    def get(self, doc_id: str) -> Optional[dict]:
+        # The hot read: straight from the id map to the columns
+        count_reads()
+        handle = self._positions.get(doc_id)
+        return self._docs.materialize(handle) if handle is not None else None
+
+    def check_insert_many(self, docs: List[dict], pending: Optional[Dict[str, set]] = None) -> None:
+        super().check_insert_many(docs, pending)
+        self._docs.check_many(docs)
+
+    def _store_many(self, docs: List[dict]) -> None:
+        if len(docs) == 1:
+            self._docs[docs[0]["id"]] = docs[0]
+        else:
+            self._docs.extend(docs)
+
+    def check_insert(self, doc: dict) -> None:
+        super().check_insert(doc)
+        self._docs.check(doc)
+
+    def _check_fields(self, fields: dict) -> None:
+        # Typed columns check their own values, NaN included
+        if not self._docs.typed.issuperset(fields):
+            super()._check_fields(fields)
+        self._docs.check(fields)
+
+    def _write(self, doc_id: str, doc: dict, fields: dict) -> None:
+        # ``doc`` is a snapshot of the columns, which are written instead
+        self._docs.write(doc_id, fields)
@@ -0,0 +1,204 @@
+import logging
+import os
+import threading
+from typing import Callable, List
+
+from app.metrics import count_writes
+from app.storage.columnar import ColumnarTable
+from app.storage.persistence import MemoryBackend, create_backend
+from app.storage.table import IndexedTable, reads
+from app.storage.unit_of_work import UnitOfWork
+
+logger = logging.getLogger(__name__)
+
+
+# Player fields in API order: numbers in 8-byte typed columns, strings as object references
+PLAYER_COLUMNS = {
+    "nickname": None, "wins": "q", "losses": "q", "elo": "d", "hoursPlayed": "q", "team": None,
+    "ratingAdjustment": "q", "initialElo": "d",
+}
+
+
+# Width of the Elo histogram buckets kept for league statistics
+ELO_BUCKET_WIDTH = 100
+
+
+@reads("elo", "wins", "hoursPlayed")
+def leaderboard_key(player: dict) -> tuple:
+    # Highest Elo first; ties broken by more wins, then more hours played
+    return (-player.get("elo", 0), -player.get("wins", 0), -player.get("hoursPlayed", 0))
+
+
+@reads("team", "elo", "hoursPlayed")
+def team_totals(player: dict) -> tuple:
+    # Per team, None for players without one: players, Elo sum, hours played. Over every group,
+    # they are the league's totals.
+    return ((player.get("team"), (1, player.get("elo", 0), player.get("hoursPlayed", 0))),)
+
+
+@reads("elo")
+def elo_histogram(player: dict) -> tuple:
+    # Players per Elo bucket (its lower bound): a rating change within the bucket leaves it alone
+    elo = player.get("elo", 0)
+    return ((elo // ELO_BUCKET_WIDTH * ELO_BUCKET_WIDTH, (1,)),)
+
+
+@reads("team1Id", "team2Id", "winningTeamId", "duration")
+def team_results(match: dict) -> tuple:
+    # Per team: matches, wins, losses, match hours
+    winner, duration = match.get("winningTeamId"), match.get("duration", 0)
+    team1, team2 = match["team1Id"], match["team2Id"]
+    if not winner:
+        return (team1, (1, 0, 0, duration)), (team2, (1, 0, 0, duration))
+    return (
+        (team1, (1, int(winner == team1), int(winner != team1), duration)),
+        (team2, (1, int(winner == team2), int(winner != team2), duration)),
+    )
+
+
+@reads("winningTeamId", "duration")
+def match_outcomes(match: dict) -> tuple:
+    # Per outcome, "decided" or "draw": matches, match hours
+    return (("decided" if match.get("winningTeamId") else "draw", (1, match.get("duration", 0))),)
+
+
+def halt() -> None:
+    # Stop the process at once: a replica that can't be trusted must not serve another request
+    logging.shutdown()
+    os._exit(1)
+
+
+class Database:
+    """The single store shared by every service.
+
+    Documents are normalized: a team stores the ids of its players and the
+    player documents are the only copy of player state.
+
+    Concurrency model: a single writer at a time. Every read-modify-write
+    (validation included) runs under ``lock``; reads take no lock and see
+    each document either before or after a commit, never half-updated.
+
+    Every write goes through ``commit`` so the persistence backend can
+    journal it before it is applied. Validation covers every way applying
+    could fail; if applying fails anyway, the record is dropped from the
+    journal and the process halts rather than serve a half-applied commit.
+    The backend also provides ``lock``:
+    with the ``shared`` backend it spans processes, and ``refresh`` brings
+    this replica up to date with commits made by other processes.
+    Batches applied by ``replay`` are passed to ``replay_listeners`` with
+    the values the updated fields held before (both None when the whole
+    store was reloaded), so derived state such as cached responses can
+    follow.
+
+    Constructing the store is cheap; ``open`` loads what the backend
+    persisted (snapshot and log tail, every index built as documents
+    arrive) and then sets ``ready``. The app does that in the background
+    at startup (see ``app.startup``), command-line tools call it first.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or MemoryBackend()
+        self.lock = self.backend.create_lock(self)
+        self.replay_listeners: List[Callable] = []
+        self.ready = threading.Event()
+        # Players are the large table, so they are stored column by column, without a dict per player
+        self.players = ColumnarTable(
+            "players", PLAYER_COLUMNS, interned=("team",), unique=("nickname",), indexed=("team",),
+            ordered={"leaderboard": leaderboard_key},
+            aggregates={"team": team_totals, "elo": elo_histogram},
+        )
+        self.teams = IndexedTable("teams", unique=("teamName",))
+        # Matches keep their rosters so history can be looked up by team or by player
+        # and keep running results per team and per outcome for statistics
+        self.matches = IndexedTable(
+            "matches",
+            timelines={"team": ("team1Id", "team2Id"), "player": ("team1PlayerIds", "team2PlayerIds")},
+            aggregates={"team": team_results, "outcome": match_outcomes},
+        )
+        self._tables = {table.name: table for table in self.tables()}
+
+    def tables(self):
+        return (self.players, self.teams, self.matches)
+
+    def table(self, name: str) -> IndexedTable:
+        return self._tables[name]
+
+    def unit_of_work(self) -> UnitOfWork:
+        return UnitOfWork(self)
+
+    def commit(self, unit: UnitOfWork, checked: bool = False) -> None:
+        writes = len(unit)
+        with self.lock:
+            if not checked:
+                unit.validate()
+            self.backend.append(unit.operations())
+            try:
+                unit.apply()
+            except BaseException:
+                # Validation let through a commit that cannot be applied: memory is half-updated
+                # and can't be trusted. Drop the record, so a restart recovers the last good state.
+                logger.critical("Applying a journaled commit failed; stopping the process", exc_info=True)
+                try:
+                    self.backend.retract()
+                finally:
+                    halt()
+                raise
+            self.backend.after_commit(self)
+        count_writes(writes)
+
+    def insert(self, table: IndexedTable, doc: dict) -> None:
+        # Single-document commit
+        unit = self.unit_of_work()
+        unit.insert(table, doc)
+        unit.commit()
+
+    def update(self, table: IndexedTable, doc_id: str, fields: dict) -> None:
+        # Single-document commit
+        unit = self.unit_of_work()
+        unit.update(table, doc_id, fields)
+        unit.commit()
+
+    def replay(self, operations: List[list]) -> None:
+        # Re-apply a journaled batch during recovery, or one committed by another process
+        previous = [] if self.replay_listeners else None
+        for operation in operations:
+            if operation[0] == "insert":
+                self.table(operation[1]).insert(operation[2])
+                if previous is not None:
+                    previous.append(None)
+            else:
+                table, fields = self.table(operation[1]), operation[3]
+                if previous is not None:
+                    doc = table.get(operation[2]) or {}
+                    previous.append({field: doc.get(field) for field in fields})
+                table.update(operation[2], fields)
+        for listener in self.replay_listeners:
+            listener(operations, previous)
+
+    def notify_reloaded(self) -> None:
+        for listener in self.replay_listeners:
+            listener(None, None)
+
+    def behind(self) -> bool:
+        # Whether other processes committed since the last refresh; cheap enough to ask per request
+        return self.backend.behind()
+
+    def refresh(self) -> None:
+        # Apply what other processes committed since the last look
+        self.backend.refresh(self)
+
+    def open(self) -> None:
+        with self.lock:
+            self.backend.load(self)
+        self.ready.set()
+
+    def close(self) -> None:
+        with self.lock:
+            self.backend.close()
+
+    def clear(self) -> None:
+        for table in self.tables():
+            table.truncate()
+
+
+db = Database(create_backend())
@@ -0,0 +1,375 @@
+import os
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, List
+
+import orjson
+
+from app import config
+
+if TYPE_CHECKING:
+    from app.storage.database import Database
+
+# Snapshot documents loaded per insert_many call
+LOAD_BATCH_SIZE = 10_000
+
+
+class MemoryBackend:
+    """Keeps nothing outside the process; a restart starts from an empty store."""
+
+    def create_lock(self, database: "Database"):
+        return threading.RLock()
+
+    def load(self, database: "Database") -> None:
+        pass
+
+    def behind(self) -> bool:
+        return False
+
+    def refresh(self, database: "Database") -> None:
+        pass
+
+    def append(self, operations: List[tuple]) -> None:
+        pass
+
+    def retract(self) -> None:
+        pass
+
+    def after_commit(self, database: "Database") -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class WriteAheadLogBackend:
+    """Appends every commit to a log and periodically compacts it into a snapshot.
+
+    Each commit is one NDJSON line ``{"seq": n, "ops": [...]}`` written before
+    the commit is applied in memory. Every ``snapshot_interval`` commits the
+    whole store is streamed to a new snapshot (header line with the last
+    sequence number, then one line per document) and the log restarts empty.
+    Recovery loads the snapshot and replays only the log records after it,
+    so restart time is proportional to the snapshot plus the log tail.
+    """
+
+    def __init__(self, directory: str, snapshot_interval: int = 100_000, fsync: bool = False):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.snapshot_path = self.directory / "snapshot.ndjson"
+        self.log_path = self.directory / "wal.ndjson"
+        self.snapshot_interval = snapshot_interval
+        self.fsync = fsync
+        self.sequence = 0
+        self._since_snapshot = 0
+        self._log = None
+        self._appended_at = 0
+
+    def create_lock(self, database: "Database"):
+        return threading.RLock()
+
+    def behind(self) -> bool:
+        # The log has a single writer, this process, so there is never anything new to read
+        return False
+
+    def refresh(self, database: "Database") -> None:
+        pass
+
+    def load(self, database: "Database") -> None:
+        snapshot_sequence = 0
+        if self.snapshot_path.exists():
+            with open(self.snapshot_path, "rb") as snapshot:
+                snapshot_sequence = orjson.loads(snapshot.readline())["seq"]
+                # Documents are grouped by table, so they load in batches through insert_many
+                table, batch = None, []
+                for line in snapshot:
+                    record = orjson.loads(line)
+                    if record["table"] != table or len(batch) >= LOAD_BATCH_SIZE:
+                        if batch:
+                            database.table(table).insert_many(batch)
+                        table, batch = record["table"], []
+                    batch.append(record["doc"])
+                if batch:
+                    database.table(table).insert_many(batch)
+        self.sequence = snapshot_sequence
+
+        # Replay the log tail, stopping at a torn final record left by a crash
+        valid_bytes = 0
+        if self.log_path.exists():
+            with open(self.log_path, "rb") as log:
+                for line in log:
+                    try:
+                        record = orjson.loads(line)
+                    except ValueError:
+                        break
+                    valid_bytes += len(line)
+                    # Records already folded into the snapshot are skipped
+                    if record["seq"] <= snapshot_sequence:
+                        continue
+                    database.replay(record["ops"])
+                    self.sequence = record["seq"]
+                    self._since_snapshot += 1
+
+        self._log = open(self.log_path, "ab")
+        self._log.truncate(valid_bytes)
+
+    def append(self, operations: List[tuple]) -> None:
+        # orjson writes NaN and infinities as null; the table checks keep them out of every commit
+        self._appended_at = os.fstat(self._log.fileno()).st_size
+        self.sequence += 1
+        self._log.write(orjson.dumps({"seq": self.sequence, "ops": operations}) + b"\n")
+        self._log.flush()
+        if self.fsync:
+            os.fsync(self._log.fileno())
+
+    def retract(self) -> None:
+        # Drop the record just appended, whose commit could not be applied
+        self._log.truncate(self._appended_at)
+        if self.fsync:
+            os.fsync(self._log.fileno())
+        self.sequence -= 1
+
+    def after_commit(self, database: "Database") -> None:
+        self._since_snapshot += 1
+        if self._since_snapshot >= self.snapshot_interval:
+            self.snapshot(database)
+
+    def snapshot(self, database: "Database") -> None:
+        # Runs under the store's write lock, so the snapshot is consistent with self.sequence
+        temporary = self.snapshot_path.with_suffix(".tmp")
+        with open(temporary, "wb") as snapshot:
+            snapshot.write(orjson.dumps({"seq": self.sequence}) + b"\n")
+            for table in database.tables():
+                for doc in table:
+                    snapshot.write(orjson.dumps({"table": table.name, "doc": doc}) + b"\n")
+            snapshot.flush()
+            os.fsync(snapshot.fileno())
+        os.replace(temporary, self.snapshot_path)
+
+        # The snapshot covers every logged commit, so the log can start over
+        self._log.close()
+        self._log = self._new_log()
+        self._since_snapshot = 0
+
+    def _new_log(self):
+        return open(self.log_path, "wb")
+
+    def close(self) -> None:
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+
+class ProcessLock:
+    """Re-entrant lock shared by the threads of this process and, through ``flock``, by other processes.
+
+    The outermost ``acquire`` in this process takes the exclusive file lock
+    and then runs ``on_acquire``, so whoever holds the lock starts from the
+    latest state any process committed. ``local`` excludes only the threads
+    of this process.
+    """
+
+    def __init__(self, path: Path, on_acquire: Callable[[], None]):
+        import fcntl
+
+        self._flock = fcntl.flock
+        self._exclusive, self._unlock = fcntl.LOCK_EX, fcntl.LOCK_UN
+        self.local = threading.RLock()
+        self._file = open(path, "a+b")
+        self._on_acquire = on_acquire
+        self._depth = 0
+
+    def acquire(self) -> None:
+        self.local.acquire()
+        if self._depth == 0:
+            try:
+                self._flock(self._file.fileno(), self._exclusive)
+                try:
+                    self._on_acquire()
+                except BaseException:
+                    self._flock(self._file.fileno(), self._unlock)
+                    raise
+            except BaseException:
+                self.local.release()
+                raise
+        self._depth += 1
+
+    def release(self) -> None:
+        self._depth -= 1
+        # Closing the file (on shutdown, under the lock) already released the file lock
+        if self._depth == 0 and not self._file.closed:
+            self._flock(self._file.fileno(), self._unlock)
+        self.local.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class SharedLogBackend(WriteAheadLogBackend):
+    """A write-ahead log shared by several worker processes, each holding a full replica.
+
+    Every process keeps the whole store in memory and serves reads from it.
+    Writes are serialized across processes by the store's lock, a
+    ``ProcessLock`` on ``wal.lock``: taking it first replays whatever other
+    processes appended, so validation and the new record see the latest
+    state. Between writes, ``refresh`` tails the log (one ``stat`` when
+    nothing changed), and the app calls it before every request, so a
+    request never sees state older than the last write acknowledged before
+    it started.
+
+    Compaction replaces the log file instead of truncating it. A process
+    still reading the old file finishes it before moving to the new one; one
+    that missed a whole log file (a sequence gap, or a snapshot newer than what
+    it replayed) reloads from the snapshot.
+    """
+
+    def __init__(self, directory: str, snapshot_interval: int = 100_000, fsync: bool = False):
+        super().__init__(directory, snapshot_interval, fsync)
+        self.lock_path = self.directory / "wal.lock"
+        self._lock = None
+        self._reader = None
+        self._reader_inode = None
+        self._offset = 0
+
+    def create_lock(self, database: "Database") -> ProcessLock:
+        self._lock = ProcessLock(self.lock_path, lambda: self._catch_up(database, locked=True))
+        return self._lock
+
+    def load(self, database: "Database") -> None:
+        # Runs under the store's lock, so no other process is writing meanwhile
+        super().load(database)
+        self._open_reader()
+        self._offset = os.path.getsize(self.log_path)
+
+    def behind(self) -> bool:
+        # One stat: has the log grown, or been replaced, since this process last read it
+        if self._reader is None:
+            return False
+        try:
+            stat = os.stat(self.log_path)
+        except FileNotFoundError:
+            return False
+        return stat.st_ino != self._reader_inode or stat.st_size != self._offset
+
+    def refresh(self, database: "Database") -> None:
+        if not self.behind():
+            return
+        with self._lock.local:
+            if not self._catch_up(database, locked=False):
+                # Behind a whole compaction: reload from the snapshot while no process can write
+                with self._lock:
+                    self._reload(database)
+
+    def append(self, operations: List[tuple]) -> None:
+        # The lock holder is caught up to the end of the log, so its own record follows directly
+        super().append(operations)
+        self._offset = os.fstat(self._log.fileno()).st_size
+
+    def retract(self) -> None:
+        super().retract()
+        self._offset = self._appended_at
+
+    def close(self) -> None:
+        super().close()
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+        if self._lock is not None:
+            self._lock.close()
+
+    def _new_log(self):
+        # Replace rather than truncate, so readers of the old file can still drain it
+        temporary = self.log_path.with_suffix(".tmp")
+        open(temporary, "wb").close()
+        os.replace(temporary, self.log_path)
+        self._open_reader()
+        self._offset = 0
+        return open(self.log_path, "ab")
+
+    def _open_reader(self) -> None:
+        if self._reader is not None:
+            self._reader.close()
+        self._reader = open(self.log_path, "rb")
+        self._reader_inode = os.fstat(self._reader.fileno()).st_ino
+
+    def _catch_up(self, database: "Database", locked: bool) -> bool:
+        # Replay what other processes appended; False if a gap needs a reload, which only the lock holder does
+        if self._reader is None:
+            return True
+        while True:
+            if not self._read_tail(database, locked):
+                break
+            try:
+                inode = os.stat(self.log_path).st_ino
+            except FileNotFoundError:
+                return True
+            if inode == self._reader_inode:
+                return True
+            # The log was replaced by a compaction; everything left in the old file comes first
+            if not self._read_tail(database, locked):
+                break
+            self._open_reader()
+            self._offset = 0
+            self._log.close()
+            self._log = open(self.log_path, "ab")
+            # A snapshot past what we replayed means a whole log file was missed, even if this one is empty
+            if self._snapshot_sequence() > self.sequence:
+                break
+        if not locked:
+            return False
+        self._reload(database)
+        return True
+
+    def _read_tail(self, database: "Database", locked: bool) -> bool:
+        self._reader.seek(self._offset)
+        data = self._reader.read()
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            record = orjson.loads(line)
+            if record["seq"] <= self.sequence:
+                self._offset += len(line) + 1
+                continue
+            if record["seq"] > self.sequence + 1:
+                return False
+            database.replay(record["ops"])
+            self.sequence = record["seq"]
+            self._since_snapshot += 1
+            self._offset += len(line) + 1
+        if locked and end < len(data):
+            # Holding the lock, a partial record can only be left by a writer that crashed mid-write
+            self._log.truncate(self._offset)
+        return True
+
+    def _snapshot_sequence(self) -> int:
+        try:
+            with open(self.snapshot_path, "rb") as snapshot:
+                return orjson.loads(snapshot.readline())["seq"]
+        except FileNotFoundError:
+            return 0
+
+    def _reload(self, database: "Database") -> None:
+        # Start over from the snapshot and the current log
+        self._log.close()
+        database.clear()
+        self.sequence = 0
+        self._since_snapshot = 0
+        self.load(database)
+        database.notify_reloaded()
+
+
+def create_backend():
+    # Pick the persistence backend named by the STORAGE_BACKEND setting
+    if config.STORAGE_BACKEND == "memory":
+        return MemoryBackend()
+    if config.STORAGE_BACKEND == "wal":
+        return WriteAheadLogBackend(config.DATA_DIR, config.SNAPSHOT_INTERVAL, config.WAL_FSYNC)
+    if config.STORAGE_BACKEND == "shared":
+        return SharedLogBackend(config.DATA_DIR, config.SNAPSHOT_INTERVAL, config.WAL_FSYNC)
+    raise ValueError(f"Unknown STORAGE_BACKEND {config.STORAGE_BACKEND!r}")
@@ -0,0 +1,186 @@
+from bisect import bisect_left, bisect_right, insort
+from typing import List
+
+
+class SortedIndex:
+    """Sorted multiset of comparable keys with O(log N) rank queries.
+
+    Keys live in buckets of bounded size, ordered by their first key. A
+    Fenwick tree over the bucket sizes turns "how many keys come before this
+    one" and "which key is at position i" into logarithmic lookups, while an
+    insert or removal only shifts elements inside one small bucket.
+    """
+
+    LOAD = 512
+
+    def __init__(self):
+        self._buckets: List[list] = []
+        self._firsts: List[tuple] = []
+        self._tree: List[int] = [0]
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def add(self, key) -> None:
+        if not self._buckets:
+            self._buckets.append([key])
+            self._firsts.append(key)
+            self._rebuild_tree()
+        else:
+            b = max(bisect_right(self._firsts, key) - 1, 0)
+            bucket = self._buckets[b]
+            insort(bucket, key)
+            self._firsts[b] = bucket[0]
+            if len(bucket) > 2 * self.LOAD:
+                # Split an oversized bucket; the tree must then be rebuilt
+                self._buckets[b:b + 1] = [bucket[:self.LOAD], bucket[self.LOAD:]]
+                self._firsts[b:b + 1] = [bucket[0], bucket[self.LOAD]]
+                self._rebuild_tree()
+            else:
+                self._tree_add(b, 1)
+        self._len += 1
+
+    def update(self, keys) -> None:
+        # Add many keys. Unless the batch is small next to the number of buckets, each bucket takes
+        # its share of the sorted batch in one sort (a merge of two sorted runs) instead of an insort
+        # per key, and oversized buckets are cut afresh.
+        keys = sorted(keys)
+        if len(keys) < len(self._buckets):
+            for key in keys:
+                self.add(key)
+            return
+        buckets = []
+        start = 0
+        for b, bucket in enumerate(self._buckets):
+            # Like add: a bucket takes the keys before the next bucket's first key
+            end = bisect_left(keys, self._firsts[b + 1], start) if b + 1 < len(self._firsts) else len(keys)
+            if end > start:
+                bucket = bucket + keys[start:end]
+                bucket.sort()
+                start = end
+            if len(bucket) > 2 * self.LOAD:
+                buckets.extend(bucket[i:i + self.LOAD] for i in range(0, len(bucket), self.LOAD))
+            else:
+                buckets.append(bucket)
+        if start < len(keys):
+            # An empty index
+            buckets.extend(keys[i:i + self.LOAD] for i in range(start, len(keys), self.LOAD))
+        self._buckets = buckets
+        self._firsts = [bucket[0] for bucket in buckets]
+        self._len += len(keys)
+        self._rebuild_tree()
+
+    def remove(self, key) -> None:
+        b = bisect_right(self._firsts, key) - 1
+        bucket = self._buckets[b] if b >= 0 else []
+        i = bisect_left(bucket, key)
+        if i == len(bucket) or bucket[i] != key:
+            raise KeyError(key)
+        del bucket[i]
+        self._len -= 1
+        if bucket:
+            self._firsts[b] = bucket[0]
+            self._tree_add(b, -1)
+        else:
+            del self._buckets[b]
+            del self._firsts[b]
+            self._rebuild_tree()
+
+    def replace(self, old, new) -> None:
+        # remove(old) then add(new) in one pass. A key that stays in its bucket leaves the tree
+        # alone, the common case of a key that moves a little; one that changes bucket only walks
+        # the tree until the two buckets' paths meet.
+        firsts = self._firsts
+        b = bisect_right(firsts, old) - 1
+        bucket = self._buckets[b] if b >= 0 else []
+        i = bisect_left(bucket, old)
+        if i == len(bucket) or bucket[i] != old:
+            raise KeyError(old)
+        if len(bucket) == 1:
+            # The bucket would empty: the general path drops it
+            self.remove(old)
+            self.add(new)
+            return
+        del bucket[i]
+        firsts[b] = bucket[0]
+        target = max(bisect_right(firsts, new) - 1, 0)
+        into = self._buckets[target]
+        insort(into, new)
+        firsts[target] = into[0]
+        if len(into) > 2 * self.LOAD:
+            self._buckets[target:target + 1] = [into[:self.LOAD], into[self.LOAD:]]
+            firsts[target:target + 1] = [into[0], into[self.LOAD]]
+            self._rebuild_tree()
+        elif target != b:
+            self._tree_move(b, target)
+
+    def count_before(self, key) -> int:
+        # Number of stored keys strictly smaller than ``key``
+        b = bisect_left(self._firsts, key) - 1
+        if b < 0:
+            return 0
+        return self._prefix(b) + bisect_left(self._buckets[b], key)
+
+    def slice(self, offset: int, limit: int) -> list:
+        # Up to ``limit`` keys starting at sorted position ``offset``
+        if offset >= self._len or limit <= 0:
+            return []
+        b, i = self._locate(offset)
+        result = []
+        while b < len(self._buckets) and len(result) < limit:
+            result.extend(self._buckets[b][i:i + limit - len(result)])
+            b, i = b + 1, 0
+        return result
+
+    def clear(self) -> None:
+        self._buckets.clear()
+        self._firsts.clear()
+        self._tree = [0]
+        self._len = 0
+
+    def _rebuild_tree(self) -> None:
+        # Fenwick tree (1-based) over bucket sizes, built in O(buckets)
+        tree = [0] + [len(bucket) for bucket in self._buckets]
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _tree_add(self, b: int, delta: int) -> None:
+        i = b + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _tree_move(self, src: int, dst: int) -> None:
+        # _tree_add(src, -1) and _tree_add(dst, 1): once the two update paths meet they cancel out
+        tree = self._tree
+        i, j = src + 1, dst + 1
+        while i != j and (i < len(tree) or j < len(tree)):
+            if i < j:
+                tree[i] -= 1
+                i += i & -i
+            else:
+                tree[j] += 1
+                j += j & -j
+
+    def _prefix(self, b: int) -> int:
+        # Total size of buckets [0, b)
+        total, i = 0, b
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def _locate(self, position: int):
+        # (bucket, offset in bucket) of the key at sorted ``position``
+        b, step = 0, 1 << (len(self._tree).bit_length())
+        while step:
+            nxt = b + step
+            if nxt < len(self._tree) and self._tree[nxt] <= position:
+                b = nxt
+                position -= self._tree[nxt]
+            step >>= 1
+        return b, position
@@ -0,0 +1,450 @@
+from bisect import bisect_left
+from math import isfinite
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.metrics import count_reads
+from app.storage.aggregates import Contributions, GroupedTotals, finite_numbers
+from app.storage.sorted_index import SortedIndex
+
+
+# Types that never hold a NaN or an infinity: most values are checked by their type alone
+_PLAIN = frozenset((str, int, bool, type(None)))
+
+
+def _finite(value) -> bool:
+    # NaN and infinities have no JSON form: the log would store them as null
+    if isinstance(value, float):
+        return isfinite(value)
+    if isinstance(value, dict):
+        value = value.values()
+    elif not isinstance(value, (list, tuple)):
+        return True
+    return _PLAIN.issuperset(map(type, value)) or all(map(_finite, value))
+
+
+def reads(*fields: str) -> Callable:
+    # Declare the fields an ordered key or contributions function reads. An update touching none of
+    # them cannot change the result, so the table does not recompute it; undeclared functions are
+    # recomputed on every update.
+    def declare(function: Callable) -> Callable:
+        function.reads = frozenset(fields)
+        return function
+    return declare
+
+
+class IndexedTable:
+    """In-memory table keyed by ``id`` with hash indexes on selected fields.
+
+    ``unique`` fields map a value to a single document id, ``indexed`` fields
+    map a value to every document id holding it. Lookups through either are
+    O(1) regardless of table size. Returned documents are the stored dicts,
+    so callers must not mutate them directly; go through ``update`` instead.
+
+    Documents also keep their insertion order, which ``page`` uses for
+    cursor-based pagination that is O(limit) and safe while inserts happen.
+
+    ``ordered`` indexes keep documents sorted by a key function, maintained
+    incrementally on every write, for O(log N) rank and top-N queries. Keys
+    are tuples of finite numbers and strings.
+
+    ``timelines`` map a value found in any of a set of fields (scalars or
+    lists) to the insertion positions of the documents holding it. They
+    serve newest-first, cursor-paginated history in O(log N + page) and are
+    for fields that are set on insert and never updated.
+
+    ``aggregates`` keep running sums per group (see ``GroupedTotals``),
+    named by a function mapping a document to its contributions. They are
+    maintained on every write, so ``totals`` reads are O(1). ``update_many``
+    changes each group's sums once for the whole batch. Key and
+    contributions functions can declare the fields they read (``reads``),
+    so updates of other fields skip them.
+
+    The ``check_*`` methods raise for anything the matching write would
+    fail on, indexes, keys and sums included: a commit is journaled once it
+    is checked, so applying it must not fail. They also reject NaN and
+    infinite numbers anywhere in a document, which the JSON log cannot hold.
+
+    Every read is counted towards the storage reads of the HTTP request being
+    served, if any (see ``app.metrics``).
+    """
+
+    def __init__(self, name: str, unique: Iterable[str] = (), indexed: Iterable[str] = (),
+                 ordered: Optional[Dict[str, Callable[[dict], tuple]]] = None,
+                 timelines: Optional[Dict[str, Tuple[str, ...]]] = None,
+                 aggregates: Optional[Dict[str, Callable[[dict], Contributions]]] = None):
+        self.name = name
+        self._docs: Dict[str, dict] = {}
+        self._order: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._unique: Dict[str, Dict[object, str]] = {field: {} for field in unique}
+        self._indexes: Dict[str, Dict[object, Dict[str, None]]] = {field: {} for field in indexed}
+        self._indexed_fields = frozenset(self._unique) | frozenset(self._indexes)
+        self._ordered: Dict[str, tuple] = {
+            index_name: (key, SortedIndex()) for index_name, key in (ordered or {}).items()
+        }
+        self._timelines: Dict[str, Tuple[Tuple[str, ...], Dict[object, List[int]]]] = {
+            index_name: (tuple(fields), {}) for index_name, fields in (timelines or {}).items()
+        }
+        self._aggregates: Dict[str, GroupedTotals] = {
+            name: GroupedTotals(contributions) for name, contributions in (aggregates or {}).items()
+        }
+        # What updates recompute, with the fields each function reads (None: undeclared, any field)
+        self._derived_keys = [
+            (index_name, key, index, getattr(key, "reads", None)) for index_name, (key, index) in self._ordered.items()
+        ]
+        self._derived_totals = [
+            (aggregate, getattr(aggregate.contributions, "reads", None)) for aggregate in self._aggregates.values()
+        ]
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, doc_id: str) -> bool:
+        count_reads()
+        return doc_id in self._docs
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self._docs.values())
+
+    def insert(self, doc: dict) -> None:
+        self.check_insert(doc)
+        doc_id = doc["id"]
+        self._docs[doc_id] = dict(doc)
+        self._positions[doc_id] = len(self._order)
+        self._order.append(doc_id)
+        self._add_to_indexes(doc_id, doc)
+        for key, index in self._ordered.values():
+            index.add(key(doc) + (doc_id,))
+        position = self._positions[doc_id]
+        for fields, index in self._timelines.values():
+            for value in self._timeline_values(doc, fields):
+                index.setdefault(value, []).append(position)
+        for aggregate in self._aggregates.values():
+            aggregate.add(doc)
+
+    def insert_many(self, docs: List[dict], checked: bool = False) -> None:
+        # Bulk insert: one pass of checks, unless the caller just ran check_insert_many under the
+        # same lock, then each index is updated once for the whole batch
+        if not checked:
+            self.check_insert_many(docs)
+        start = len(self._order)
+        self._store_many(docs)
+        for position, doc in enumerate(docs, start):
+            self._positions[doc["id"]] = position
+        self._order.extend(doc["id"] for doc in docs)
+        for doc in docs:
+            self._add_to_indexes(doc["id"], doc)
+        for key, index in self._ordered.values():
+            index.update([key(doc) + (doc["id"],) for doc in docs])
+        for fields, index in self._timelines.values():
+            for position, doc in enumerate(docs, start):
+                for value in self._timeline_values(doc, fields):
+                    index.setdefault(value, []).append(position)
+        for aggregate in self._aggregates.values():
+            for doc in docs:
+                aggregate.add(doc)
+
+    def check_insert_many(self, docs: List[dict], pending: Optional[Dict[str, set]] = None) -> None:
+        # Like check_insert for every document, including duplicates within the batch. ``pending``
+        # holds the ids and unique values of earlier batches checked but not inserted yet; the
+        # batch's own are added to it, so batches can be checked one after another.
+        pending = {} if pending is None else pending
+        ids = pending.setdefault("id", set())
+        seen = {field: pending.setdefault(field, set()) for field in self._unique}
+        for doc in docs:
+            doc_id = doc["id"]
+            if doc_id in self._positions or doc_id in ids:
+                raise ValueError(f"Duplicate id {doc_id} in table {self.name}")
+            ids.add(doc_id)
+            self._check_finite(doc)
+            for field, values in seen.items():
+                value = doc.get(field)
+                if value is None:
+                    continue
+                if value in values or value in self._unique[field]:
+                    raise ValueError(f"Duplicate {field} {value!r} in table {self.name}")
+                values.add(value)
+            self._check_derived(doc)
+
+    def check_insert(self, doc: dict) -> None:
+        # Raise if inserting the document would violate a constraint, without changing anything
+        doc_id = doc["id"]
+        if doc_id in self._docs:
+            raise ValueError(f"Duplicate id {doc_id} in table {self.name}")
+        self._check_finite(doc)
+        for field, index in self._unique.items():
+            value = doc.get(field)
+            if value is not None and value in index:
+                raise ValueError(f"Duplicate {field} {value!r} in table {self.name}")
+        self._check_derived(doc)
+
+    def get(self, doc_id: str) -> Optional[dict]:
+        count_reads()
+        return self._docs.get(doc_id)
+
+    def get_by(self, field: str, value) -> Optional[dict]:
+        # Fetch a document through a unique index
+        count_reads()
+        doc_id = self._unique[field].get(value)
+        return self._docs[doc_id] if doc_id is not None else None
+
+    def contains(self, field: str, value) -> bool:
+        count_reads()
+        if field in self._unique:
+            return value in self._unique[field]
+        return bool(self._indexes[field].get(value))
+
+    def find(self, field: str, value) -> List[dict]:
+        # Fetch every document sharing a value of a non-unique index
+        count_reads()
+        return [self._docs[doc_id] for doc_id in self._indexes[field].get(value, ())]
+
+    def update(self, doc_id: str, fields: dict) -> bool:
+        # Like TinyDB, updating a missing document is a no-op reported to the caller
+        deltas: Dict[GroupedTotals, dict] = {}
+        change = self._prepare(doc_id, fields, False, deltas)
+        if change is None:
+            return False
+        self._apply(change)
+        self._shift(deltas)
+        return True
+
+    def update_many(self, updates: List[Tuple[str, dict]]) -> None:
+        # Updates applied as one batch, missing documents skipped: the changes to each aggregate
+        # group are summed first, so its totals are replaced once however many documents it holds
+        deltas: Dict[GroupedTotals, dict] = {}
+        for doc_id, fields in updates:
+            change = self._prepare(doc_id, fields, False, deltas)
+            if change is not None:
+                self._apply(change)
+        self._shift(deltas)
+
+    def check_update(self, doc_id: str, fields: dict) -> None:
+        # Raise if the update would fail or violate a constraint, without changing anything
+        self.prepare_updates([(doc_id, fields)])
+
+    def prepare_updates(self, updates: List[Tuple[str, dict]]) -> tuple:
+        # check_update for a batch, at most one update per document, that also returns the changes
+        # so that apply_updates does not work them out again. Each group's summed change is checked
+        # once: a NaN or infinite contribution leaves it non-finite too. The result holds until the
+        # next write to the table.
+        deltas: Dict[GroupedTotals, dict] = {}
+        changes = []
+        for doc_id, fields in updates:
+            change = self._prepare(doc_id, fields, True, deltas)
+            if change is None:
+                raise KeyError(f"Document {doc_id} not found in table {self.name}")
+            changes.append(change)
+        for aggregate, change in deltas.items():
+            aggregate.check(change.items())
+        return changes, deltas
+
+    def apply_updates(self, prepared: tuple) -> None:
+        # Apply what prepare_updates returned, as one batch like update_many
+        changes, deltas = prepared
+        for change in changes:
+            self._apply(change)
+        self._shift(deltas)
+
+    def all(self) -> List[dict]:
+        count_reads()
+        return list(self._docs.values())
+
+    def page(self, after: Optional[str] = None, limit: int = 100) -> List[dict]:
+        # Up to ``limit`` documents inserted after the document ``after`` (from the start if None)
+        count_reads()
+        if after is None:
+            start = 0
+        elif after in self._positions:
+            start = self._positions[after] + 1
+        else:
+            raise KeyError(f"Document {after} not found in table {self.name}")
+        return [self._docs[doc_id] for doc_id in self._order[start:start + limit]]
+
+    def ordered(self, index_name: str, offset: int = 0, limit: int = 100) -> List[dict]:
+        # Documents at sorted positions [offset, offset + limit) of an ordered index
+        count_reads()
+        _, index = self._ordered[index_name]
+        return [self._docs[entry[-1]] for entry in index.slice(offset, limit)]
+
+    def count_before(self, index_name: str, doc: dict) -> int:
+        # Documents sorting strictly before ``doc``; documents with an equal key are not counted
+        count_reads()
+        key, index = self._ordered[index_name]
+        return index.count_before(key(doc))
+
+    def timeline(self, index_name: str, value, before: Optional[str] = None, limit: int = 100) -> List[dict]:
+        # Newest-first documents holding ``value``, inserted before the document ``before``
+        count_reads()
+        _, index = self._timelines[index_name]
+        positions = index.get(value, [])
+        if before is None:
+            end = len(positions)
+        elif before in self._positions:
+            end = bisect_left(positions, self._positions[before])
+        else:
+            raise KeyError(f"Document {before} not found in table {self.name}")
+        return [self._docs[self._order[position]] for position in reversed(positions[max(end - limit, 0):end])]
+
+    def totals(self, aggregate_name: str, group) -> Optional[tuple]:
+        # A group's running sums, or None if no document contributes to it
+        count_reads()
+        return self._aggregates[aggregate_name].get(group)
+
+    def total(self, aggregate_name: str) -> Optional[tuple]:
+        # An aggregate's sums over every group, or None if no document contributes
+        count_reads()
+        return self._aggregates[aggregate_name].total()
+
+    def groups(self, aggregate_name: str) -> Dict[object, tuple]:
+        # Every non-empty group of an aggregate with its sums
+        count_reads()
+        return self._aggregates[aggregate_name].groups()
+
+    def truncate(self) -> None:
+        self._docs.clear()
+        self._order.clear()
+        self._positions.clear()
+        for index in self._unique.values():
+            index.clear()
+        for index in self._indexes.values():
+            index.clear()
+        for _, index in self._ordered.values():
+            index.clear()
+        for _, index in self._timelines.values():
+            index.clear()
+        for aggregate in self._aggregates.values():
+            aggregate.clear()
+
+    def _store_many(self, docs: List[dict]) -> None:
+        self._docs.update((doc["id"], dict(doc)) for doc in docs)
+
+    def _moved_fields(self, doc: dict, fields: dict) -> List[str]:
+        # Only fields whose indexed value actually changes need re-indexing
+        if self._indexed_fields.isdisjoint(fields):
+            return []
+        return [
+            field for field in fields
+            if (field in self._unique or field in self._indexes) and fields[field] != doc.get(field)
+        ]
+
+    def _check_unique(self, moved: List[str], fields: dict) -> None:
+        for field in moved:
+            if field in self._unique and fields[field] in self._unique[field]:
+                raise ValueError(f"Duplicate {field} {fields[field]!r} in table {self.name}")
+
+    def _check_fields(self, fields: dict) -> None:
+        # The checks of an update's values on their own
+        self._check_finite(fields)
+
+    def _check_finite(self, fields: dict) -> None:
+        for field, value in fields.items():
+            if type(value) not in _PLAIN and not _finite(value):
+                raise ValueError(f"{field} {value!r} is not a finite number in table {self.name}")
+
+    def _prepare(self, doc_id: str, fields: dict, check: bool, deltas: Dict[GroupedTotals, dict]) -> Optional[tuple]:
+        # The change an update makes: the fields to re-index and the ordered keys that differ, with
+        # contributions that differ collected into ``deltas``. Keys and contributions are recomputed
+        # only where their function reads an updated field. ``check`` also runs every check of a
+        # write that is about to be journaled, but for the sums, which prepare_updates checks per group.
+        doc = self._docs.get(doc_id)
+        if doc is None:
+            return None
+        if check:
+            self._check_fields(fields)
+        moved = self._moved_fields(doc, fields)
+        self._check_unique(moved, fields)
+        if check:
+            for field in moved:
+                hash(fields[field])
+        updated = {**doc, **fields}
+        keys = []
+        for index_name, key, index, read in self._derived_keys:
+            if read is None or not read.isdisjoint(fields):
+                old_key, new_key = key(doc), key(updated)
+                # An unchanged key is already stored, so only a new one is checked
+                if new_key != old_key:
+                    if check and not finite_numbers(new_key):
+                        self._check_key(index_name, new_key, doc_id)
+                    keys.append((index, old_key, new_key))
+        for aggregate, read in self._derived_totals:
+            if read is None or not read.isdisjoint(fields):
+                old, new = aggregate.contributions(doc), aggregate.contributions(updated)
+                if new != old:
+                    changes = deltas.get(aggregate)
+                    if changes is None:
+                        changes = deltas[aggregate] = {}
+                    aggregate.collect(changes, old, new)
+        return doc_id, fields, doc, moved, keys
+
+    def _apply(self, change: tuple) -> None:
+        doc_id, fields, doc, moved, keys = change
+        for field in moved:
+            self._unindex(field, doc.get(field), doc_id)
+        self._write(doc_id, doc, fields)
+        for field in moved:
+            self._index(field, fields[field], doc_id)
+        for index, old_key, new_key in keys:
+            index.replace(old_key + (doc_id,), new_key + (doc_id,))
+
+    @staticmethod
+    def _shift(deltas: Dict[GroupedTotals, dict]) -> None:
+        for aggregate, changes in deltas.items():
+            aggregate.shift(changes)
+
+    def _write(self, doc_id: str, doc: dict, fields: dict) -> None:
+        doc.update(fields)
+
+    def _check_derived(self, doc: dict) -> None:
+        # Raise if the document's index entries, ordered keys or contributions could not be stored
+        for field in self._indexes:
+            hash(doc.get(field))
+        for fields, _ in self._timelines.values():
+            self._timeline_values(doc, fields)
+        for index_name, (key, _) in self._ordered.items():
+            self._check_key(index_name, key(doc), doc.get("id"))
+        for aggregate in self._aggregates.values():
+            aggregate.check(aggregate.contributions(doc))
+
+    @staticmethod
+    def _check_key(index_name: str, values: tuple, doc_id) -> None:
+        if not finite_numbers(values) and not all(type(value) is str or finite_numbers((value,)) for value in values):
+            raise ValueError(f"Cannot order {doc_id} by {values!r} in index {index_name}")
+
+    @staticmethod
+    def _timeline_values(doc: dict, fields: Tuple[str, ...]) -> Dict[object, None]:
+        # Distinct values across the fields, so a document is listed once per value
+        values: Dict[object, None] = {}
+        for field in fields:
+            value = doc.get(field)
+            if isinstance(value, (list, tuple)):
+                values.update(dict.fromkeys(value))
+            elif value is not None:
+                values[value] = None
+        return values
+
+    def _add_to_indexes(self, doc_id: str, doc: dict) -> None:
+        for field in self._unique:
+            self._index(field, doc.get(field), doc_id)
+        for field in self._indexes:
+            self._index(field, doc.get(field), doc_id)
+
+    def _index(self, field: str, value, doc_id: str) -> None:
+        if value is None:
+            return
+        if field in self._unique:
+            self._unique[field][value] = doc_id
+        else:
+            self._indexes[field].setdefault(value, {})[doc_id] = None
+
+    def _unindex(self, field: str, value, doc_id: str) -> None:
+        if value is None:
+            return
+        if field in self._unique:
+            self._unique[field].pop(value, None)
+            return
+        bucket = self._indexes[field].get(value)
+        if bucket is not None:
+            bucket.pop(doc_id, None)
+            if not bucket:
+                del self._indexes[field][value]
@@ -0,0 +1,91 @@
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from app.storage.table import IndexedTable
+
+if TYPE_CHECKING:
+    from app.storage.database import Database
+
+
+class UnitOfWork:
+    """Collects inserts and updates and applies them as one batch.
+
+    Nothing touches the tables until ``commit``, which validates the whole
+    batch before applying any of it, so a failed commit leaves no partial
+    state behind. A unit created by a ``Database`` commits through it, so
+    the batch is also journaled by its persistence backend.
+    """
+
+    def __init__(self, database: Optional["Database"] = None):
+        self._database = database
+        # Per table, so each table's updates are applied as one batch
+        self._updates: Dict[IndexedTable, Dict[str, dict]] = {}
+        self._inserts: List[Tuple[IndexedTable, dict]] = []
+        self._prepared: Optional[List[Tuple[IndexedTable, tuple]]] = None
+
+    def __len__(self) -> int:
+        return sum(map(len, self._updates.values())) + len(self._inserts)
+
+    def update(self, table: IndexedTable, doc_id: str, fields: dict) -> None:
+        # Repeated updates of one document are merged into a single write
+        updates = self._updates.get(table)
+        if updates is None:
+            updates = self._updates[table] = {}
+        if doc_id in updates:
+            updates[doc_id].update(fields)
+        else:
+            updates[doc_id] = dict(fields)
+
+    def insert(self, table: IndexedTable, doc: dict) -> None:
+        self._inserts.append((table, doc))
+
+    def commit(self, checked: bool = False) -> None:
+        # ``checked``: the caller already ran every check of ``validate`` under the same lock
+        if self._database is not None:
+            self._database.commit(self, checked)
+        else:
+            if not checked:
+                self.validate()
+            self.apply()
+
+    def validate(self) -> None:
+        # Validate every write against the current state before applying any. The updates are
+        # prepared at the same time, for an apply that follows with nothing written in between.
+        self._prepared = [
+            (table, table.prepare_updates(updates)) for table, updates in self._updates_by_table()
+        ]
+        for table, docs in self._inserts_by_table():
+            table.check_insert_many(docs)
+
+    def operations(self) -> List[tuple]:
+        # The batch as plain records, in the order ``apply`` performs them
+        return [
+            ("update", table.name, doc_id, fields)
+            for table, updates in self._updates.items() for doc_id, fields in updates.items()
+        ] + [("insert", table.name, doc) for table, doc in self._inserts]
+
+    def apply(self) -> None:
+        # One batch of updates per table, so each aggregate group changes once
+        if self._prepared is not None:
+            for table, prepared in self._prepared:
+                table.apply_updates(prepared)
+        else:
+            # Checked by the caller without validate
+            for table, updates in self._updates_by_table():
+                table.update_many(updates)
+        for table, docs in self._inserts_by_table():
+            # validate checked them against the same state
+            table.insert_many(docs, checked=True)
+
+        self._updates.clear()
+        self._inserts.clear()
+        self._prepared = None
+
+    def _updates_by_table(self) -> List[Tuple[IndexedTable, List[Tuple[str, dict]]]]:
+        return [(table, list(updates.items())) for table, updates in self._updates.items()]
+
+    def _inserts_by_table(self) -> List[Tuple[IndexedTable, List[dict]]]:
+        # Inserts grouped per table, in order, so each table loads its documents as one batch
+        batches: Dict[IndexedTable, List[dict]] = {}
+        for table, doc in self._inserts:
+            batches.setdefault(table, []).append(doc)
+        return list(batches.items())
@@ -0,0 +1,82 @@
+"""Export and import of the whole store against re-seeding it through the bulk APIs.
+
+Run with ``python -m benchmarks.bench_backup [--players 1000000] [--matches 100000] [--http]``.
+A seeded league is loaded with the bulk services (players, teams, then
+matches), exported to NDJSON in memory, cleared, and imported again. The
+import is compared with rebuilding the same state through the bulk services,
+which validate every document and replay every match through the rating
+engine. ``--http`` streams GET /admin/export and POST /admin/import through
+the ASGI app instead of calling the service.
+"""
+import argparse
+import io
+import time
+
+from app.models.team import TeamCreate
+from app.services.backup_service import export_chunks, import_file
+from app.services.match_service import create_matches_bulk
+from app.services.player_service import create_players_bulk
+from app.services.team_service import create_teams_bulk
+from app.storage.database import db
+from benchmarks.datagen import generate
+
+
+def seed(data) -> None:
+    create_players_bulk(data.players)
+    teams = create_teams_bulk([TeamCreate(teamName=name, players=members) for name, members in data.teams])
+    team_ids = [team.id for team in teams]
+    create_matches_bulk([fixture.match(team_ids) for fixture in data.fixtures])
+
+
+def run(players: int, matches: int, http: bool) -> None:
+    data = generate(players, matches)
+    db.clear()
+    start = time.perf_counter()
+    seed(data)
+    seeding = time.perf_counter() - start
+    documents = sum(len(table) for table in db.tables())
+
+    if http:
+        from fastapi.testclient import TestClient
+        from main import app
+
+        client = TestClient(app)
+
+        def export() -> bytes:
+            response = client.get("/admin/export")
+            response.raise_for_status()
+            return response.content
+
+        def load(body: bytes) -> None:
+            client.post("/admin/import", content=body).raise_for_status()
+    else:
+        def export() -> bytes:
+            return b"".join(export_chunks())
+
+        def load(body: bytes) -> None:
+            import_file(io.BytesIO(body))
+
+    start = time.perf_counter()
+    body = export()
+    exporting = time.perf_counter() - start
+    db.clear()
+    start = time.perf_counter()
+    load(body)
+    importing = time.perf_counter() - start
+    db.clear()
+
+    megabytes = len(body) / 1e6
+    print(f"{players:,} players, {players // 5:,} teams, {matches:,} matches ({documents:,} documents, {megabytes:,.1f} MB)")
+    print(f"export  {exporting:8.2f} s  {megabytes / exporting:8.1f} MB/s  {documents / exporting:>10,.0f} docs/s")
+    print(f"import  {importing:8.2f} s  {megabytes / importing:8.1f} MB/s  {documents / importing:>10,.0f} docs/s")
+    print(f"re-seed {seeding:8.2f} s  {'':13} {documents / seeding:>10,.0f} docs/s")
+    print(f"import is {seeding / importing:.1f}x faster than re-seeding")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=1_000_000)
+    parser.add_argument("--matches", type=int, default=100_000)
+    parser.add_argument("--http", action="store_true")
+    args = parser.parse_args()
+    run(args.players, args.matches, args.http)
@@ -0,0 +1,69 @@
+"""Bulk match ingestion vs sequential create_match.
+
+Run with ``python -m benchmarks.bench_bulk_matches [--teams 200] [--matches 20000] [--http]``.
+``--http`` goes through the ASGI app: one POST /matches per match against a
+single POST /matches/bulk for the whole batch.
+"""
+import argparse
+import random
+import time
+
+from app.models.match import Match
+from app.services.match_service import create_match, create_matches_bulk
+from app.storage.database import db
+from benchmarks.bench_create_match import seed
+
+
+def fixtures(team_ids: list, matches: int) -> list:
+    rng = random.Random(9)
+    result = []
+    for _ in range(matches):
+        team1, team2 = rng.sample(team_ids, 2)
+        winner = rng.choice([team1, team2, None])
+        result.append(Match(team1Id=team1, team2Id=team2, winningTeamId=winner, duration=rng.randint(1, 5)))
+    return result
+
+
+def timed(fn, matches: list) -> float:
+    start = time.perf_counter()
+    fn(matches)
+    return time.perf_counter() - start
+
+
+def run(teams: int, matches: int, http: bool) -> None:
+    if http:
+        from fastapi.testclient import TestClient
+        from main import app
+
+        client = TestClient(app)
+
+        def one_by_one(batch):
+            for match in batch:
+                client.post("/matches", json=match.model_dump()).raise_for_status()
+
+        def in_bulk(batch):
+            client.post("/matches/bulk", json=[match.model_dump() for match in batch]).raise_for_status()
+    else:
+        def one_by_one(batch):
+            for match in batch:
+                create_match(match)
+
+        in_bulk = create_matches_bulk
+
+    db.clear()
+    sequential = timed(one_by_one, fixtures(seed(teams), matches))
+
+    db.clear()
+    bulk = timed(in_bulk, fixtures(seed(teams), matches))
+
+    print(f"sequential: {matches / sequential:>10,.0f} matches/s")
+    print(f"bulk:       {matches / bulk:>10,.0f} matches/s  ({sequential / bulk:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--teams", type=int, default=200)
+    parser.add_argument("--matches", type=int, default=20_000)
+    parser.add_argument("--http", action="store_true")
+    args = parser.parse_args()
+    run(args.teams, args.matches, args.http)
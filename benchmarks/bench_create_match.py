@@ -0,0 +1,46 @@
+"""create_match throughput.
+
+Run with ``python -m benchmarks.bench_create_match [--teams 200] [--matches 20000]``.
+"""
+import argparse
+import random
+import time
+
+from app.models.match import Match
+from app.models.player import Player
+from app.services.match_service import create_match
+from app.services.player_service import create_player
+from app.services.team_service import create_team
+
+
+def seed(teams: int) -> list:
+    team_ids = []
+    for t in range(teams):
+        player_ids = [create_player(Player(nickname=f"bench{t}_{i}")).id for i in range(5)]
+        team_ids.append(create_team(f"bench team {t}", player_ids).id)
+    return team_ids
+
+
+def run(teams: int, matches: int) -> None:
+    team_ids = seed(teams)
+    rng = random.Random(9)
+    fixtures = []
+    for _ in range(matches):
+        team1, team2 = rng.sample(team_ids, 2)
+        winner = rng.choice([team1, team2, None])
+        fixtures.append(Match(team1Id=team1, team2Id=team2, winningTeamId=winner, duration=rng.randint(1, 5)))
+
+    start = time.perf_counter()
+    for match in fixtures:
+        create_match(match)
+    elapsed = time.perf_counter() - start
+    print(f"{matches} matches between {teams} teams: {matches / elapsed:,.0f} matches/s "
+          f"({elapsed / matches * 1e6:.1f} us/match)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--teams", type=int, default=200)
+    parser.add_argument("--matches", type=int, default=20_000)
+    args = parser.parse_args()
+    run(args.teams, args.matches)
@@ -0,0 +1,53 @@
+"""Leaderboard index: rank, top-N and Elo-update latency as the roster grows.
+
+Run with ``python -m benchmarks.bench_leaderboard [--sizes 1000 100000 1000000]``.
+"""
+import argparse
+import random
+import time
+
+from app.models.player import Player
+from app.services.player_service import get_leaderboard, get_player, get_player_rank, update_player_in_db
+from app.storage.database import db
+
+
+def fill(size: int, rng: random.Random) -> list:
+    db.clear()
+    ids = []
+    for i in range(size):
+        player = Player(nickname=f"player{i}", elo=rng.randint(0, 3000), wins=rng.randint(0, 50))
+        db.players.insert(player.model_dump())
+        ids.append(player.id)
+    return ids
+
+
+def measure(fn, samples: int) -> float:
+    # Mean latency in microseconds
+    start = time.perf_counter()
+    for _ in range(samples):
+        fn()
+    return (time.perf_counter() - start) / samples * 1e6
+
+
+def run(sizes, samples: int) -> None:
+    rng = random.Random(1)
+    print(f"{'players':>10} {'rank':>10} {'top 10':>10} {'elo update':>12}  (us/op)")
+    for size in sizes:
+        ids = fill(size, rng)
+        players = [get_player(rng.choice(ids)) for _ in range(samples)]
+
+        def update():
+            player = rng.choice(players)
+            player.elo += rng.randint(-40, 40)
+            update_player_in_db(player)
+
+        print(f"{size:>10} {measure(lambda: get_player_rank(rng.choice(ids)), samples):>10.2f} "
+              f"{measure(lambda: get_leaderboard(10), samples):>10.2f} {measure(update, samples):>12.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--samples", type=int, default=5_000)
+    args = parser.parse_args()
+    run(args.sizes, args.samples)
@@ -0,0 +1,45 @@
+"""Matchmaking enqueue and sweep cost with a large waiting queue.
+
+Run with ``python -m benchmarks.bench_matchmaking [--queued 100000]``.
+The queue is filled with teams spread too far apart to pair, then new teams
+are enqueued against it; each lands next to a waiting team and pairs. The
+sweep only visits neighbours whose windows have become due, so with none
+due it costs the same whatever the queue size.
+"""
+import argparse
+import random
+import time
+
+from app import config
+from app.services.matchmaking_service import MatchmakingQueue
+
+
+def run(queued: int, samples: int) -> None:
+    rng = random.Random(4)
+    queue = MatchmakingQueue()
+
+    # Teams 1000 Elo apart never pair, whatever the window
+    config.MATCHMAKING_WINDOW = config.MATCHMAKING_MAX_WINDOW = 500
+    start = time.perf_counter()
+    for i in range(queued):
+        queue.enqueue(f"waiting-{i}", i * 1000.0)
+    elapsed = time.perf_counter() - start
+    print(f"fill {queued:,} teams:      {elapsed / queued * 1e6:>8.2f} us/enqueue (no pairing)")
+
+    targets = rng.sample(range(queued), samples)
+    start = time.perf_counter()
+    paired = sum(queue.enqueue(f"arriving-{i}", t * 1000.0 + 10) is not None for i, t in enumerate(targets))
+    elapsed = time.perf_counter() - start
+    print(f"enqueue + pair:          {elapsed / samples * 1e6:>8.2f} us/enqueue ({paired:,} paired)")
+
+    start = time.perf_counter()
+    queue.sweep()
+    print(f"sweep {len(queue):,} teams:     {(time.perf_counter() - start) * 1e3:>8.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queued", type=int, default=100_000)
+    parser.add_argument("--samples", type=int, default=10_000)
+    args = parser.parse_args()
+    run(args.queued, args.samples)
@@ -0,0 +1,64 @@
+"""League onboarding: one request per player and team against the bulk endpoints.
+
+Run with ``python -m benchmarks.bench_onboarding [--players 10000] [--http]``.
+``--http`` goes through the ASGI app: POST /players/create and POST /teams
+per item against one POST /players/bulk and one POST /teams/bulk.
+"""
+import argparse
+import time
+
+from app.models.team import TeamCreate
+from app.services.player_service import create_player, create_players_bulk
+from app.services.team_service import create_team, create_teams_bulk
+from app.storage.database import db
+from benchmarks.datagen import generate
+
+
+def run(players: int, http: bool) -> None:
+    data = generate(players, 0)
+    if http:
+        from fastapi.testclient import TestClient
+        from main import app
+
+        client = TestClient(app)
+
+        def one_by_one():
+            for player in data.players:
+                client.post("/players/create", json=player.model_dump()).raise_for_status()
+            for name, members in data.teams:
+                client.post("/teams", json={"teamName": name, "players": members}).raise_for_status()
+
+        def in_bulk():
+            client.post("/players/bulk", json=[player.model_dump() for player in data.players]).raise_for_status()
+            client.post("/teams/bulk", json=[{"teamName": name, "players": members}
+                                             for name, members in data.teams]).raise_for_status()
+    else:
+        def one_by_one():
+            for player in data.players:
+                create_player(player)
+            for name, members in data.teams:
+                create_team(name, members)
+
+        def in_bulk():
+            create_players_bulk(data.players)
+            create_teams_bulk([TeamCreate(teamName=name, players=members) for name, members in data.teams])
+
+    results = {}
+    for label, onboard in (("one by one", one_by_one), ("bulk", in_bulk)):
+        db.clear()
+        start = time.perf_counter()
+        onboard()
+        results[label] = time.perf_counter() - start
+    db.clear()
+
+    for label, elapsed in results.items():
+        print(f"{label:11} {elapsed:8.3f} s  ({players / elapsed:>10,.0f} players/s)")
+    print(f"bulk is {results['one by one'] / results['bulk']:.1f}x faster")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--players", type=int, default=10_000)
+    parser.add_argument("--http", action="store_true")
+    args = parser.parse_args()
+    run(args.players, args.http)
@@ -0,0 +1,61 @@
+"""Write-ahead log write throughput and recovery time.
+
+Run with ``python -m benchmarks.bench_persistence [--records 1000000] [--fsync]``.
+Writes ``--records`` player commits through the WAL backend, then measures
+restart time from the log alone and from a compacted snapshot.
+"""
+import argparse
+import tempfile
+import time
+
+from app.storage.database import Database
+from app.storage.persistence import WriteAheadLogBackend
+
+
+def open_db(directory: str, fsync: bool = False) -> Database:
+    database = Database(WriteAheadLogBackend(directory, snapshot_interval=10 ** 12, fsync=fsync))
+    database.open()
+    return database
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run(records: int, fsync: bool) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        database = open_db(directory, fsync)
+
+        def write():
+            for i in range(records):
+                database.insert(database.players, {
+                    "id": f"player-{i}", "nickname": f"player{i}", "wins": 0, "losses": 0,
+                    "elo": 0.0, "hoursPlayed": 0, "team": None, "ratingAdjustment": 50,
+                })
+
+        elapsed = timed(write)
+        print(f"write:               {records / elapsed:>10,.0f} commits/s ({elapsed:.1f}s for {records:,})")
+        database.close()
+
+        recovered = []
+        elapsed = timed(lambda: recovered.append(open_db(directory)))
+        print(f"recover from log:    {elapsed:>10.2f} s ({len(recovered[0].players):,} records)")
+
+        elapsed = timed(lambda: recovered[0].backend.snapshot(recovered[0]))
+        print(f"snapshot:            {elapsed:>10.2f} s")
+        recovered[0].close()
+
+        recovered.clear()
+        elapsed = timed(lambda: recovered.append(open_db(directory)))
+        print(f"recover from snapshot: {elapsed:>8.2f} s ({len(recovered[0].players):,} records)")
+        recovered[0].close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--fsync", action="store_true")
+    args = parser.parse_args()
+    run(args.records, args.fsync)
@@ -0,0 +1,67 @@
+"""Player lookup latency as the roster grows.
+
+Run with ``python -m benchmarks.bench_player_lookup [--sizes 1000 10000 ...]``.
+Latency of ``get_player``, the nickname check in ``create_player`` and
+``update_player_in_db`` should stay flat from 1k to 1M players.
+"""
+import argparse
+import random
+import time
+from uuid import uuid4
+
+from fastapi import HTTPException
+
+from app.models.player import Player
+from app.services import player_service
+from app.services.player_service import create_player, get_player, update_player_in_db
+
+
+def fill(size: int) -> list:
+    player_service.players_table.truncate()
+    ids = []
+    for i in range(size):
+        player_id = str(uuid4())
+        player_service.players_table.insert(Player(id=player_id, nickname=f"player{i}").model_dump())
+        ids.append(player_id)
+    return ids
+
+
+def measure(fn, samples: int) -> float:
+    # Mean latency in microseconds
+    start = time.perf_counter()
+    for _ in range(samples):
+        fn()
+    return (time.perf_counter() - start) / samples * 1e6
+
+
+def run(sizes, samples: int) -> None:
+    print(f"{'players':>10} {'get_player':>12} {'dup check':>12} {'update':>12}  (us/op)")
+    for size in sizes:
+        ids = fill(size)
+        players = [get_player(random.choice(ids)) for _ in range(samples)]
+        existing = Player(nickname=f"player{size // 2}")
+
+        def lookup():
+            get_player(random.choice(ids))
+
+        def duplicate_check():
+            try:
+                create_player(existing)
+            except HTTPException:
+                pass
+
+        def update():
+            player = random.choice(players)
+            player.hoursPlayed += 1
+            update_player_in_db(player)
+
+        print(f"{size:>10} {measure(lookup, samples):>12.2f} "
+              f"{measure(duplicate_check, samples):>12.2f} {measure(update, samples):>12.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--samples", type=int, default=10_000)
+    args = parser.parse_args()
+    run(args.sizes, args.samples)
@@ -0,0 +1,95 @@
+"""Memory per player: dict documents against the columnar player table.
+
+Run with ``python -m benchmarks.bench_player_memory [--players 1000000]``.
+The same seeded players (ids, nicknames, ratings, one team id per five
+players, each a separate string as decoded from a request) are loaded into
+an ``IndexedTable`` holding a dict per player and into the ``ColumnarTable``
+the store uses. Bytes are measured with tracemalloc, first for the documents
+alone (id map and insertion order included), then with the indexes the
+players table is configured with (unique nickname, team, leaderboard).
+Read latency is reported too, as the read fast path does it: ``get`` then
+``player_json``, which touches every field. The columnar table builds the
+dict it returns, where the dict table hands out the stored one.
+"""
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+import uuid
+
+from app.models.player import Player
+from app.serialization import player_json
+from app.storage.columnar import ColumnarTable
+from app.storage.database import PLAYER_COLUMNS, leaderboard_key
+from app.storage.table import IndexedTable
+
+INDEXES = {"unique": ("nickname",), "indexed": ("team",), "ordered": {"leaderboard": leaderboard_key}}
+
+
+def players(count: int):
+    # Plain records, as Player.model_dump() returns them
+    rng = random.Random(5)
+    for i in range(count):
+        yield Player.model_construct(
+            id=str(uuid.UUID(int=rng.getrandbits(128), version=4)), nickname=f"player{i}",
+            wins=rng.randint(0, 500), losses=rng.randint(0, 500), elo=float(rng.randint(500, 2500)),
+            hoursPlayed=rng.randint(0, 8000), team=str(uuid.UUID(int=i // 5, version=4)), ratingAdjustment=50,
+        ).model_dump()
+
+
+def build(columnar: bool, count: int, indexed: bool):
+    indexes = INDEXES if indexed else {}
+    if columnar:
+        return ColumnarTable("players", PLAYER_COLUMNS, interned=("team",), **indexes)
+    return IndexedTable("players", **indexes)
+
+
+def measure(columnar: bool, count: int, indexed: bool) -> float:
+    # Bytes per player retained by a loaded table
+    gc.collect()
+    tracemalloc.start()
+    table = build(columnar, count, indexed)
+    for doc in players(count):
+        table.insert(doc)
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del table
+    return retained / count
+
+
+def read_latency(columnar: bool, count: int, samples: int = 200_000) -> float:
+    table = build(columnar, count, indexed=False)
+    ids = []
+    for doc in players(count):
+        table.insert(doc)
+        ids.append(doc["id"])
+    rng = random.Random(1)
+    picks = [rng.choice(ids) for _ in range(samples)]
+    start = time.perf_counter()
+    for doc_id in picks:
+        player_json(table.get(doc_id))
+    return (time.perf_counter() - start) / samples * 1e6
+
+
+def run(count: int) -> None:
+    print(f"{count:,} players")
+    print(f"{'':9} {'documents':>12} {'+ indexes':>12} {'read':>10}")
+    results = {}
+    for label, columnar in (("dicts", False), ("columnar", True)):
+        documents = measure(columnar, count, indexed=False)
+        total = measure(columnar, count, indexed=True)
+        latency = read_latency(columnar, count)
+        results[label] = (documents, total)
+        print(f"{label:9} {documents:>8,.0f} B/p {total:>8,.0f} B/p {latency:>7.2f} us")
+    (dict_docs, dict_total), (col_docs, col_total) = results["dicts"], results["columnar"]
+    print(f"columnar documents take {col_docs / dict_docs:.0%} of the dicts' memory, "
+          f"{col_total / dict_total:.0%} with indexes")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=1_000_000)
+    args = parser.parse_args()
+    run(args.players)
@@ -0,0 +1,135 @@
+"""Per-match rating cost: the original Elo update against the rating tables.
+
+Run with ``python -m benchmarks.bench_rating [--matches 200000] [--rounds 5]``.
+Only the rating step is timed (both sides of a decided match), not
+validation or the commit. "original" re-sums the opponent's Elo on every
+call, evaluates ``10 ** round(...)`` and walks the K-factor ladder per
+player; "tables" is the default rating engine with cached team Elo totals.
+
+Two representations are measured: Player models, as create_match rates
+them, and flat arrays, as the bulk path does. Both must end with identical
+ratings.
+"""
+import argparse
+import gc
+import random
+import time
+from typing import Callable, Dict, List
+
+from app.models.player import Player
+from app.models.team import Team
+from app.services.match_service import update_match_stats
+from app.services.rating import Roster, rating_engine
+
+TEAM_SIZE = 5
+
+
+def original_k(hours_played: int) -> int:
+    if hours_played < 500:
+        return 50
+    elif hours_played < 1000:
+        return 40
+    elif hours_played < 3000:
+        return 30
+    elif hours_played < 5000:
+        return 20
+    return 10
+
+
+def seeded(teams: int) -> tuple:
+    rng = random.Random(3)
+    players = teams * TEAM_SIZE
+    return [float(rng.randint(500, 2500)) for _ in range(players)], [rng.randint(0, 8000) for _ in range(players)]
+
+
+class Models:
+    """Player models, rated the way create_match rates them."""
+
+    def __init__(self, teams: int):
+        elos, hours = seeded(teams)
+        self.teams = [
+            Team(teamName=f"team{t}", players=[
+                Player(nickname=f"p{t}_{i}", elo=elos[t * TEAM_SIZE + i], hoursPlayed=hours[t * TEAM_SIZE + i])
+                for i in range(TEAM_SIZE)
+            ])
+            for t in range(teams)
+        ]
+
+    def ratings(self) -> list:
+        return [player.elo for team in self.teams for player in team.players]
+
+    def original(self, winner: int, loser: int) -> None:
+        for team, opponent, S in ((self.teams[winner], self.teams[loser], 1), (self.teams[loser], self.teams[winner], 0)):
+            opponent_elo = sum(player.elo for player in opponent.players) / len(opponent.players)
+            for player in team.players:
+                E = 1 / (1 + 10 ** (round((opponent_elo - player.elo) / 400)))
+                player.elo += round(original_k(player.hoursPlayed) * (S - E))
+                if S == 1:
+                    player.wins += 1
+                elif S == 0:
+                    player.losses += 1
+
+    def tables(self, winner: int, loser: int) -> None:
+        update_match_stats(self.teams[winner], self.teams[loser], S=1)
+
+
+class Arrays:
+    """Flat Elo and hours arrays indexed by player handle, as the bulk path keeps them."""
+
+    def __init__(self, teams: int):
+        self.elo, self.hours = seeded(teams)
+        self.members = [list(range(t * TEAM_SIZE, (t + 1) * TEAM_SIZE)) for t in range(teams)]
+        self.rosters = [Roster(members, self.elo) for members in self.members]
+
+    def ratings(self) -> list:
+        return self.elo
+
+    def original(self, winner: int, loser: int) -> None:
+        elo, hours = self.elo, self.hours
+        for team, opponent, S in ((winner, loser, 1), (loser, winner, 0)):
+            opponent_elo = sum([elo[h] for h in self.members[opponent]]) / TEAM_SIZE
+            for h in self.members[team]:
+                E = 1 / (1 + 10 ** (round((opponent_elo - elo[h]) / 400)))
+                elo[h] += round(original_k(hours[h]) * (S - E))
+
+    def tables(self, winner: int, loser: int) -> None:
+        rating_engine.rate_match(self.elo, self.hours, self.rosters[winner], self.rosters[loser], S=1)
+
+
+def compare(state_type: Callable, teams: int, pairs: list, rounds: int) -> Dict[str, float]:
+    # Alternate the two in every round and keep each one's best, so drift hits both alike
+    best = {"original": float("inf"), "tables": float("inf")}
+    final: Dict[str, List[float]] = {}
+    for _ in range(rounds):
+        for name in best:
+            state = state_type(teams)
+            rate = getattr(state, name)
+            gc.disable()
+            start = time.perf_counter()
+            for winner, loser in pairs:
+                rate(winner, loser)
+            elapsed = time.perf_counter() - start
+            gc.enable()
+            best[name] = min(best[name], elapsed / len(pairs))
+            final[name] = state.ratings()
+    assert final["original"] == final["tables"], "rating tables diverged from the original rules"
+    return best
+
+
+def run(matches: int, teams: int, rounds: int) -> None:
+    rng = random.Random(11)
+    pairs = [tuple(rng.sample(range(teams), 2)) for _ in range(matches)]
+    for state_type in (Models, Arrays):
+        best = compare(state_type, teams, pairs, rounds)
+        print(f"{state_type.__name__.lower():7} original {best['original'] * 1e6:6.2f} us/match   "
+              f"tables {best['tables'] * 1e6:6.2f} us/match   {best['original'] / best['tables']:.2f}x")
+    print("ratings identical in both representations")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matches", type=int, default=200_000)
+    parser.add_argument("--teams", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    run(args.matches, args.teams, args.rounds)
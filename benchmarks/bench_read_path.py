@@ -0,0 +1,93 @@
+"""Read path cost for GET /players/{id} and GET /teams/{id}.
+
+Run with ``python -m benchmarks.bench_read_path [--samples 5000]``.
+Compares the validating path (build Player/Team with full validation and let
+FastAPI validate and encode again through response_model) with the lean path
+(stored records encoded straight to JSON bytes). Reports request latency
+through the ASGI app plus per-call time and peak transient allocation of
+the handler itself.
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.models.player import Player
+from app.models.team import Team
+from app.services.player_service import create_player, get_player_json
+from app.services.team_service import create_team, get_team_json
+from app.storage.database import db
+
+
+def validating_player(player_id: str) -> Player:
+    return Player(**db.players.get(player_id))
+
+
+def validating_team(team_id: str) -> Team:
+    team_data = db.teams.get(team_id)
+    players = [Player(**db.players.get(player_id)) for player_id in team_data["players"]]
+    return Team(id=team_data["id"], teamName=team_data["teamName"], players=players)
+
+
+def validating_app() -> FastAPI:
+    # The read routes as they were: validated models plus response_model validation
+    app = FastAPI()
+    app.get("/players/{player_id}", response_model=Player)(validating_player)
+    app.get("/teams/{team_id}", response_model=Team)(validating_team)
+    return app
+
+
+def per_call(fn, ids, samples: int):
+    start = time.perf_counter()
+    for i in range(samples):
+        fn(ids[i % len(ids)])
+    elapsed = (time.perf_counter() - start) / samples * 1e6
+
+    tracemalloc.start()
+    peak = 0
+    for i in range(200):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        fn(ids[i % len(ids)])
+        peak += tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return elapsed, peak / 200
+
+
+def per_request(client: TestClient, path: str, ids, samples: int) -> float:
+    start = time.perf_counter()
+    for i in range(samples):
+        client.get(f"{path}/{ids[i % len(ids)]}")
+    return (time.perf_counter() - start) / samples * 1e6
+
+
+def run(samples: int) -> None:
+    from main import app
+
+    rng = random.Random(2)
+    player_ids, team_ids = [], []
+    for t in range(200):
+        ids = [create_player(Player(nickname=f"read{t}_{i}", elo=rng.randint(0, 3000))).id for i in range(5)]
+        player_ids += ids
+        team_ids.append(create_team(f"read team {t}", ids).id)
+
+    lean_client, old_client = TestClient(app), TestClient(validating_app())
+    print(f"{'':24} {'handler us':>11} {'alloc B':>9} {'request us':>11}")
+    for label, fn, client, path, ids in (
+        ("player validating", validating_player, old_client, "/players", player_ids),
+        ("player lean", get_player_json, lean_client, "/players", player_ids),
+        ("team validating", validating_team, old_client, "/teams", team_ids),
+        ("team lean", get_team_json, lean_client, "/teams", team_ids),
+    ):
+        elapsed, allocated = per_call(fn, ids, samples)
+        print(f"{label:24} {elapsed:>11.2f} {allocated:>9.0f} {per_request(client, path, ids, samples):>11.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--samples", type=int, default=5_000)
+    args = parser.parse_args()
+    run(args.samples)
@@ -0,0 +1,55 @@
+"""Rating replay throughput and memory against history length.
+
+Run with ``python -m benchmarks.bench_replay [--players 10000] [--matches 100000 1000000]``.
+For each history length a seeded league (see ``benchmarks.datagen``) is
+loaded through create_matches_bulk, then replay_ratings rebuilds every
+rating from it, writing back every player. Peak memory allocated by the
+replay is measured in a second run under tracemalloc; it depends on the
+number of players and the batch size, not on the number of matches.
+"""
+import argparse
+import time
+import tracemalloc
+
+from app.services.match_service import create_matches_bulk
+from app.services.player_service import create_player
+from app.services.rating_service import replay_ratings
+from app.services.team_service import create_team
+from app.storage.database import db
+from benchmarks.datagen import generate
+
+
+def load(players: int, matches: int) -> None:
+    db.clear()
+    data = generate(players, matches)
+    for player in data.players:
+        create_player(player)
+    team_ids = [create_team(name, members).id for name, members in data.teams]
+    for start in range(0, matches, 50_000):
+        create_matches_bulk([fixture.match(team_ids) for fixture in data.fixtures[start:start + 50_000]])
+
+
+def run(players: int, sizes: list, batch_size: int) -> None:
+    print(f"{'matches':>10} {'seconds':>8} {'matches/s':>11} {'peak MB':>8}")
+    for matches in sizes:
+        load(players, matches)
+        # Alternate the starting rating so both runs rewrite every player
+        start = time.perf_counter()
+        replay_ratings(initial_elo=1000, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+
+        tracemalloc.start()
+        replay_ratings(initial_elo=0, batch_size=batch_size)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{matches:>10,} {elapsed:>8.2f} {matches / elapsed:>11,.0f} {peak / 2 ** 20:>8.1f}")
+    db.clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=10_000)
+    parser.add_argument("--matches", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    args = parser.parse_args()
+    run(args.players, args.matches, args.batch_size)
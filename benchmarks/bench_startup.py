@@ -0,0 +1,120 @@
+"""Import time and cold start: how soon a new instance answers, and how soon it is ready.
+
+Run with ``python -m benchmarks.bench_startup [--players 1000000] [--matches 100000] [--runs 5]``.
+A seeded league is written as a write-ahead log snapshot in a temporary
+DATA_DIR. Then, with STORAGE_BACKEND=wal pointing at it:
+
+- import: the time for ``import main`` in a fresh interpreter (median of
+  ``--runs``). The store is not loaded at import, so this does not grow
+  with the data.
+- load: ``Database.open`` on the snapshot, in process: snapshot parsed,
+  documents stored, every index built.
+- cold start: ``uvicorn main:app`` is started and ``GET /ready`` polled.
+  "first answer" is the first HTTP response (503 while loading), "ready"
+  the first 200.
+"""
+import argparse
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from app.storage.database import Database
+from app.storage.persistence import WriteAheadLogBackend
+from benchmarks.datagen import generate
+
+
+def write_snapshot(directory: str, players: int, matches: int) -> None:
+    # Documents as the services store them; matches carry their rosters, ratings are left as seeded
+    data = generate(players, 0)
+    database = Database(WriteAheadLogBackend(directory))
+    database.open()
+    docs = [player.model_dump() for player in data.players]
+    teams = []
+    for t, (name, members) in enumerate(data.teams):
+        teams.append({"id": f"team{t}", "teamName": name, "players": members})
+        for doc in docs[t * 5:(t + 1) * 5]:
+            doc["team"] = f"team{t}"
+    rng = random.Random(3)
+    records = []
+    for m in range(matches):
+        team1, team2 = rng.sample(teams, 2)
+        records.append({"id": f"match{m}", "team1Id": team1["id"], "team2Id": team2["id"],
+                        "winningTeamId": rng.choice([team1["id"], team2["id"], None]), "duration": rng.randint(1, 5),
+                        "team1PlayerIds": team1["players"], "team2PlayerIds": team2["players"]})
+    database.players.insert_many(docs)
+    database.teams.insert_many(teams)
+    database.matches.insert_many(records)
+    database.backend.snapshot(database)
+    database.close()
+
+
+def import_time(env: dict, runs: int) -> float:
+    code = "import time; start = time.perf_counter(); import main; print(time.perf_counter() - start)"
+    return statistics.median(
+        float(subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, check=True, text=True).stdout)
+        for _ in range(runs)
+    )
+
+
+def load_time(directory: str) -> float:
+    start = time.perf_counter()
+    database = Database(WriteAheadLogBackend(directory))
+    database.open()
+    elapsed = time.perf_counter() - start
+    database.close()
+    return elapsed
+
+
+def cold_start(env: dict, port: int, timeout: float = 600, interval: float = 0.1) -> tuple:
+    # Seconds from launching the server to its first answer, and to its first 200 from /ready.
+    # Polls are spaced out so the client takes little CPU away from the loading server.
+    url = f"http://127.0.0.1:{port}/ready"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"], env=env,
+    )
+    first = None
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                response = httpx.get(url, timeout=1)
+            except httpx.TransportError:
+                time.sleep(interval)
+                continue
+            first = first or time.perf_counter() - start
+            if response.status_code == 200:
+                return first, time.perf_counter() - start
+            time.sleep(interval)
+        raise RuntimeError("server did not become ready")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def run(players: int, matches: int, runs: int, port: int) -> None:
+    with tempfile.TemporaryDirectory() as data_dir:
+        write_snapshot(data_dir, players, matches)
+        size = os.path.getsize(os.path.join(data_dir, "snapshot.ndjson")) / 1e6
+        env = {**os.environ, "STORAGE_BACKEND": "wal", "DATA_DIR": data_dir}
+        print(f"{players:,} players, {players // 5:,} teams, {matches:,} matches ({size:,.1f} MB snapshot)")
+        print(f"import main   {import_time(env, runs):8.2f} s")
+        print(f"load store    {load_time(data_dir):8.2f} s")
+        first, ready = cold_start(env, port)
+        print(f"first answer  {first:8.2f} s")
+        print(f"ready         {ready:8.2f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=1_000_000)
+    parser.add_argument("--matches", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+    run(args.players, args.matches, args.runs, args.port)
@@ -0,0 +1,84 @@
+"""Team and league statistics: running aggregates against recomputing from the documents.
+
+Run with ``python -m benchmarks.bench_stats [--sizes 1000 100000 1000000] [--matches 100000]``.
+For each league size (players, in teams of five, plus seeded matches), it
+times ``get_team_stats`` and ``get_league_stats``, which read the
+aggregates the tables maintain. It compares them with the way a dashboard
+had to get the same numbers before: ``get_team_by_id`` for one team, plus
+the team's match history; and every team through ``get_team_by_id``, plus
+every match, for the league.
+"""
+import argparse
+import random
+import time
+
+from app.models.team import TeamCreate
+from app.services.match_service import create_matches_bulk, match_history
+from app.services.player_service import create_players_bulk
+from app.services.stats_service import get_league_stats, get_team_stats
+from app.services.team_service import create_teams_bulk, get_team_by_id
+from app.storage.database import db
+from benchmarks.datagen import generate
+
+
+def seed(players: int, matches: int) -> list:
+    db.clear()
+    data = generate(players, matches)
+    create_players_bulk(data.players)
+    teams = create_teams_bulk([TeamCreate(teamName=name, players=members) for name, members in data.teams])
+    team_ids = [team.id for team in teams]
+    create_matches_bulk([fixture.match(team_ids) for fixture in data.fixtures])
+    return team_ids
+
+
+def recompute_team(team_id: str) -> dict:
+    team = get_team_by_id(team_id)
+    matches, cursor = match_history("team", team_id, 1000, None)
+    while cursor:
+        page, cursor = match_history("team", team_id, 1000, cursor)
+        matches += page
+    wins = sum(match.winningTeamId == team_id for match in matches)
+    return {"averageElo": sum(player.elo for player in team.players) / len(team.players),
+            "totalHoursPlayed": sum(player.hoursPlayed for player in team.players),
+            "matchesPlayed": len(matches), "wins": wins}
+
+
+def recompute_league() -> dict:
+    elo = hours = players = 0
+    for team in db.teams:
+        for player in get_team_by_id(team["id"]).players:
+            elo += player.elo
+            hours += player.hoursPlayed
+            players += 1
+    return {"averageElo": elo / players, "totalHoursPlayed": hours,
+            "totalMatchHours": sum(match["duration"] for match in db.matches)}
+
+
+def measure(fn, samples: int) -> float:
+    # Mean latency in microseconds
+    start = time.perf_counter()
+    for _ in range(samples):
+        fn()
+    return (time.perf_counter() - start) / samples * 1e6
+
+
+def run(sizes, matches: int, samples: int) -> None:
+    rng = random.Random(1)
+    print(f"{'players':>10} {'team stats':>11} {'recomputed':>11} {'league':>10} {'recomputed':>12}  (us/op)")
+    for size in sizes:
+        team_ids = seed(size, matches)
+        team = measure(lambda: get_team_stats(rng.choice(team_ids)), samples)
+        team_slow = measure(lambda: recompute_team(rng.choice(team_ids)), max(samples // 10, 1))
+        league = measure(get_league_stats, samples)
+        league_slow = measure(recompute_league, 1)
+        print(f"{size:>10} {team:>11.2f} {team_slow:>11.2f} {league:>10.2f} {league_slow:>12,.0f}")
+    db.clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--matches", type=int, default=100_000)
+    parser.add_argument("--samples", type=int, default=5_000)
+    args = parser.parse_args()
+    run(args.sizes, args.matches, args.samples)
@@ -0,0 +1,180 @@
+"""Hot-path benchmark suite with a regression check against a saved baseline.
+
+Run with ``python -m benchmarks.bench_suite [--players 5000] [--matches 20000] [--runs 1]``.
+A seeded synthetic league (see ``benchmarks.datagen``) is loaded through
+create_player, create_team and create_match, then get_all_players is read
+back. Everything runs twice: calling the services in process, and through
+the ASGI app. Every operation is timed on its own; the report gives p50 and
+p99 latency and ops/sec.
+
+``--save-baseline`` writes the results to ``--baseline``
+(``benchmarks/baseline.json`` by default). Without it, the results are
+compared with that file. A benchmark whose ops/sec drops, or whose p50
+grows, by more than ``--tolerance`` is reported as a regression and the run
+exits with status 1. p99 is printed but not gated, since one descheduled
+thread is enough to move it. On a noisy machine, ``--runs 3`` repeats the
+suite and keeps each benchmark's median run, for the baseline as well as
+for the comparison. Baselines only compare meaningfully on the
+same machine and with the same sizes, and are recorded from the commit
+before a change rather than from the change itself.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List
+
+from app.cache import response_cache
+from app.services.match_service import create_match
+from app.services.player_service import create_player, get_all_players
+from app.services.team_service import create_team
+from app.storage.database import db
+from benchmarks.datagen import Dataset, generate
+
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+
+
+def measure(calls: Iterable[Callable[[], object]]) -> Dict[str, float]:
+    latencies: List[int] = []
+    clock = time.perf_counter_ns
+    start = clock()
+    for call in calls:
+        before = clock()
+        call()
+        latencies.append(clock() - before)
+    elapsed = (clock() - start) / 1e9
+    latencies.sort()
+    return {
+        "ops": len(latencies),
+        "ops_per_sec": len(latencies) / elapsed,
+        "p50_us": percentile(latencies, 0.50) / 1e3,
+        "p99_us": percentile(latencies, 0.99) / 1e3,
+    }
+
+def percentile(ordered: List[int], fraction: float) -> float:
+    # Nearest-rank percentile of an already sorted sample
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+def run_in_process(data: Dataset, reads: int) -> Dict[str, dict]:
+    results = {"create_player": measure(lambda player=player: create_player(player) for player in data.players)}
+
+    team_ids: List[str] = []
+    results["create_team"] = measure(
+        lambda name=name, members=members: team_ids.append(create_team(name, members).id)
+        for name, members in data.teams
+    )
+    matches = [fixture.match(team_ids) for fixture in data.fixtures]
+    results["create_match"] = measure(lambda match=match: create_match(match) for match in matches)
+    results["get_all_players"] = measure(get_all_players for _ in range(reads))
+    return results
+
+def run_asgi(data: Dataset, reads: int) -> Dict[str, dict]:
+    from fastapi.testclient import TestClient
+    from main import app
+
+    # One portal for the whole run, so requests are served by long-lived threads as under uvicorn
+    with TestClient(app) as client:
+        def post(path: str, body) -> dict:
+            response = client.post(path, json=body)
+            response.raise_for_status()
+            return response.json()
+
+        results = {"create_player": measure(
+            lambda body=player.model_dump(): post("/players/create", body) for player in data.players
+        )}
+
+        team_ids: List[str] = []
+        results["create_team"] = measure(
+            lambda name=name, members=members: team_ids.append(post("/teams", {"teamName": name, "players": members})["id"])
+            for name, members in data.teams
+        )
+        bodies = [fixture.match(team_ids).model_dump() for fixture in data.fixtures]
+        results["create_match"] = measure(lambda body=body: post("/matches", body) for body in bodies)
+        # The whole roster, as GET /players streams it
+        results["get_all_players"] = measure(
+            (lambda: client.get("/players", params={"stream": "true"}).raise_for_status()) for _ in range(reads)
+        )
+    return results
+
+
+def run(players: int, matches: int, reads: int, seed: int) -> dict:
+    data = generate(players, matches, seed)
+    benchmarks = {}
+    for mode, runner in (("in_process", run_in_process), ("asgi", run_asgi)):
+        db.clear()
+        response_cache.clear()
+        for name, result in runner(data, reads).items():
+            benchmarks[f"{mode}.{name}"] = result
+    db.clear()
+    return {
+        "config": {"players": players, "matches": matches, "reads": reads, "seed": seed},
+        "python": platform.python_version(),
+        "benchmarks": benchmarks,
+    }
+
+
+def median_run(runs: List[dict]) -> dict:
+    # Per benchmark, the run with the median ops/sec, so p50 and p99 still come from one run
+    merged = dict(runs[0], benchmarks={})
+    for name in runs[0]["benchmarks"]:
+        results = sorted((run["benchmarks"][name] for run in runs), key=lambda result: result["ops_per_sec"])
+        merged["benchmarks"][name] = results[len(results) // 2]
+    merged["runs"] = len(runs)
+    return merged
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> List[str]:
+    # Benchmarks that got slower than the baseline by more than ``tolerance``
+    regressions = []
+    for name, result in current["benchmarks"].items():
+        base = baseline["benchmarks"].get(name)
+        if base is None:
+            continue
+        if result["ops_per_sec"] < base["ops_per_sec"] * (1 - tolerance):
+            regressions.append(f"{name}: {result['ops_per_sec']:,.0f} ops/s vs {base['ops_per_sec']:,.0f} baseline")
+        if result["p50_us"] > base["p50_us"] * (1 + tolerance):
+            regressions.append(f"{name}: p50 {result['p50_us']:.1f} us vs {base['p50_us']:.1f} us baseline")
+    return regressions
+
+def report(current: dict, baseline: dict = None) -> None:
+    print(f"{'benchmark':30} {'ops':>7} {'ops/sec':>11} {'p50 us':>10} {'p99 us':>10} {'vs base':>9}")
+    for name, result in current["benchmarks"].items():
+        base = (baseline or {}).get("benchmarks", {}).get(name)
+        change = f"{result['ops_per_sec'] / base['ops_per_sec'] - 1:>+8.1%}" if base else ""
+        print(f"{name:30} {result['ops']:>7} {result['ops_per_sec']:>11,.0f} "
+              f"{result['p50_us']:>10.1f} {result['p99_us']:>10.1f} {change:>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=5_000)
+    parser.add_argument("--matches", type=int, default=20_000)
+    parser.add_argument("--reads", type=int, default=20, help="get_all_players calls per mode")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed slowdown before flagging (0.15 = 15%%)")
+    parser.add_argument("--runs", type=int, default=1, help="repeat the suite and keep each benchmark's median run")
+    args = parser.parse_args()
+
+    current = median_run([run(args.players, args.matches, args.reads, args.seed) for _ in range(args.runs)])
+    if args.save_baseline:
+        report(current)
+        args.baseline.write_text(json.dumps(current, indent=2) + "\n")
+        print(f"baseline saved to {args.baseline}")
+        sys.exit(0)
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else None
+    report(current, baseline)
+    if baseline is None:
+        print(f"no baseline at {args.baseline}; run with --save-baseline to create one")
+    elif baseline["config"] != current["config"]:
+        print("baseline was recorded with different sizes; not comparing")
+    else:
+        regressions = compare(current, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        sys.exit(1 if regressions else 0)
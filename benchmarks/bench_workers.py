@@ -0,0 +1,116 @@
+"""Request throughput against the number of uvicorn worker processes.
+
+Run with ``python -m benchmarks.bench_workers [--workers 1 2 4 8] [--clients 16] [--write-ratio 0.05]``.
+For each worker count a fresh server is started with
+``uvicorn main:app --workers N`` on the ``shared`` storage backend and a
+temporary DATA_DIR, seeded through the bulk endpoints, then driven by
+client processes issuing a mix of ``GET /players/{id}``, ``GET /teams/{id}``
+and, at ``--write-ratio``, ``POST /matches``. Reads scale with worker
+processes; writes are serialized across them by the log lock, so the
+write ratio bounds the speed-up. Nothing scales past the machine's cores,
+and the client processes need cores too: rows with more workers than cores
+are marked, and only measure the cost of the extra processes.
+Every request opens its own connection, so requests spread over the
+workers instead of staying on whichever one accepted a kept-alive
+connection.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.datagen import generate
+
+
+def wait_until_up(url: str, timeout: float = 30) -> None:
+    # Until then a worker still loading the store turns requests away
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url + "/ready", timeout=1).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+def client(url: str, player_ids: list, team_ids: list, write_ratio: float, seconds: float, seed: int) -> int:
+    # One client process: back-to-back requests until the time is up; returns how many succeeded
+    rng = random.Random(seed)
+    done = 0
+    deadline = time.perf_counter() + seconds
+    with httpx.Client(base_url=url, headers={"Connection": "close"}) as http:
+        while time.perf_counter() < deadline:
+            roll = rng.random()
+            if roll < write_ratio:
+                team1, team2 = rng.sample(team_ids, 2)
+                response = http.post("/matches", json={"team1Id": team1, "team2Id": team2,
+                                                       "winningTeamId": team1, "duration": 1})
+            elif roll < (1 + write_ratio) / 2:
+                response = http.get(f"/players/{rng.choice(player_ids)}")
+            else:
+                response = http.get(f"/teams/{rng.choice(team_ids)}")
+            response.raise_for_status()
+            done += 1
+    return done
+
+
+def run_workers(workers: int, players: int, clients: int, write_ratio: float, seconds: float, port: int) -> float:
+    url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as data_dir:
+        env = {**os.environ, "STORAGE_BACKEND": "shared", "DATA_DIR": data_dir}
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--workers", str(workers),
+             "--log-level", "warning", "--no-access-log"],
+            env=env,
+        )
+        try:
+            wait_until_up(url)
+            data = generate(players, 0)
+            httpx.post(url + "/players/bulk", json=[player.model_dump() for player in data.players],
+                       timeout=60).raise_for_status()
+            response = httpx.post(url + "/teams/bulk", json=[{"teamName": name, "players": members}
+                                                            for name, members in data.teams], timeout=60)
+            response.raise_for_status()
+            player_ids = [player.id for player in data.players]
+            team_ids = [team["id"] for team in response.json()]
+
+            with multiprocessing.Pool(clients) as pool:
+                start = time.perf_counter()
+                counts = pool.starmap(client, [(url, player_ids, team_ids, write_ratio, seconds, seed)
+                                               for seed in range(clients)])
+                elapsed = time.perf_counter() - start
+        finally:
+            server.terminate()
+            server.wait()
+    return sum(counts) / elapsed
+
+
+def run(worker_counts: list, players: int, clients: int, write_ratio: float, seconds: float, port: int) -> None:
+    print(f"{os.cpu_count()} cores, {clients} clients, {write_ratio:.0%} writes")
+    print(f"{'workers':>7} {'req/s':>9} {'speed-up':>9}")
+    single = None
+    for workers in worker_counts:
+        throughput = run_workers(workers, players, clients, write_ratio, seconds, port)
+        single = single or throughput
+        note = "  (more workers than cores)" if workers > os.cpu_count() else ""
+        print(f"{workers:>7} {throughput:>9,.0f} {throughput / single:>8.2f}x{note}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--players", type=int, default=10_000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--write-ratio", type=float, default=0.05)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    run(args.workers, args.players, args.clients, args.write_ratio, args.seconds, args.port)
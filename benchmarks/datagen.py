@@ -0,0 +1,55 @@
+"""Seeded synthetic league: N players, N/5 teams of five, M matches.
+
+The same seed always yields the same players (ids included), rosters and
+fixtures, so runs on different commits measure identical work. Matches
+reference teams by index because team ids are assigned on creation.
+"""
+import random
+import uuid
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from app.models.match import Match
+from app.models.player import Player
+
+TEAM_SIZE = 5
+
+
+@dataclass
+class Fixture:
+    team1: int
+    team2: int
+    winner: Optional[int]
+    duration: int
+
+    def match(self, team_ids: List[str]) -> Match:
+        return Match(
+            team1Id=team_ids[self.team1],
+            team2Id=team_ids[self.team2],
+            winningTeamId=team_ids[self.winner] if self.winner is not None else None,
+            duration=self.duration,
+        )
+
+
+@dataclass
+class Dataset:
+    players: List[Player]
+    teams: List[Tuple[str, List[str]]]
+    fixtures: List[Fixture]
+
+
+def generate(players: int, matches: int, seed: int = 42) -> Dataset:
+    rng = random.Random(seed)
+    roster = [
+        Player(id=str(uuid.UUID(int=rng.getrandbits(128), version=4)), nickname=f"player{i}")
+        for i in range(players)
+    ]
+    teams = [
+        (f"team{t}", [player.id for player in roster[t * TEAM_SIZE:(t + 1) * TEAM_SIZE]])
+        for t in range(players // TEAM_SIZE)
+    ]
+    fixtures = []
+    for _ in range(matches):
+        team1, team2 = rng.sample(range(len(teams)), 2)
+        fixtures.append(Fixture(team1, team2, rng.choice([team1, team2, None]), rng.randint(1, 5)))
+    return Dataset(roster, teams, fixtures)
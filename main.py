@@ -1,9 +1,64 @@
+import math
+
 from fastapi import FastAPI
-from app.controllers.players_controller import router as players_router
-from app.controllers.teams_controller import router as teams_router
-from app.controllers.match_controller import router as match_router
-app = FastAPI()
-
-app.include_router(players_router, prefix="/players", tags=["Players"])
-app.include_router(teams_router, prefix="/teams", tags=["Teams"])
-app.include_router(match_router, prefix="/matches", tags=["Matches"])
\ No newline at end of file
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
+from app import config
+from app.startup import StoreWarmUp
+from app.storage.database import db
+
+
+async def validation_error_handler(request, exc: RequestValidationError):
+    # The default 422 echoes each invalid input, and a NaN or infinite number cannot be written as JSON
+    errors = [
+        {**error, "input": repr(error["input"])}
+        if isinstance(error.get("input"), float) and not math.isfinite(error["input"]) else error
+        for error in exc.errors()
+    ]
+    return await request_validation_exception_handler(request, RequestValidationError(errors))
+
+
+def create_app() -> FastAPI:
+    # Importing a router wires its services to the store, which is cheap: nothing is loaded until
+    # the lifespan starts the warm-up, in the background. Serve with ``uvicorn main:app`` or
+    # ``uvicorn main:create_app --factory``.
+    from app.controllers.players_controller import router as players_router
+    from app.controllers.teams_controller import router as teams_router
+    from app.controllers.match_controller import router as match_router
+    from app.controllers.matchmaking_controller import router as matchmaking_router
+    from app.controllers.stats_controller import router as stats_router
+    from app.controllers.admin_controller import router as admin_router
+    from app.controllers.metrics_controller import router as metrics_router
+    from app.controllers.health_controller import router as health_router
+    from app.middleware import MetricsMiddleware, ReadinessMiddleware, ReplicaRefreshMiddleware
+
+    warm_up = StoreWarmUp(db)
+    app = FastAPI(lifespan=warm_up.lifespan)
+    app.state.warm_up = warm_up
+    app.add_exception_handler(RequestValidationError, validation_error_handler)
+
+    app.include_router(players_router, prefix="/players", tags=["Players"])
+    app.include_router(teams_router, prefix="/teams", tags=["Teams"])
+    app.include_router(match_router, prefix="/matches", tags=["Matches"])
+    app.include_router(matchmaking_router, prefix="/matchmaking", tags=["Matchmaking"])
+    app.include_router(stats_router, prefix="/stats", tags=["Stats"])
+    app.include_router(admin_router, prefix="/admin", tags=["Admin"])
+    app.include_router(metrics_router, tags=["Metrics"])
+    app.include_router(health_router, tags=["Health"])
+
+    if config.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+
+    if config.STORAGE_BACKEND == "shared":
+        # Added after the metrics so it runs before them: the request, and its metrics, see the latest commits
+        app.add_middleware(ReplicaRefreshMiddleware, database=db)
+
+    if config.STORAGE_BACKEND != "memory":
+        # Outermost: nothing else runs for a request turned away while the store loads.
+        # The memory backend has nothing to load.
+        app.add_middleware(ReadinessMiddleware, database=db)
+
+    return app
+
+
+app = create_app()
@@ -0,0 +1,17 @@
+import pytest
+
+from app.cache import response_cache
+from app.services.matchmaking_service import matchmaking_queue
+from app.storage.database import db
+
+
+@pytest.fixture(autouse=True)
+def clean_db():
+    # Every test starts from an empty shared store
+    db.clear()
+    matchmaking_queue.clear()
+    response_cache.clear()
+    yield
+    db.clear()
+    matchmaking_queue.clear()
+    response_cache.clear()
@@ -0,0 +1,105 @@
+import io
+
+import orjson
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.models.match import Match
+from app.models.player import Player
+from app.services.backup_service import export_chunks, import_file
+from app.services.match_service import create_match
+from app.services.player_service import create_player, get_leaderboard
+from app.services.team_service import create_team
+from app.storage.database import Database, db
+from app.storage.persistence import WriteAheadLogBackend
+
+# Helpers
+def seed_league():
+    players = [create_player(Player(nickname=f"Player{i}")) for i in range(10)]
+    team1 = create_team("Red", [player.id for player in players[:5]])
+    team2 = create_team("Blue", [player.id for player in players[5:]])
+    create_match(Match(team1Id=team1.id, team2Id=team2.id, winningTeamId=team1.id, duration=2))
+
+def state(database=db):
+    return {table.name: table.all() for table in database.tables()}
+
+def export_lines():
+    return b"".join(export_chunks(batch_size=3)).splitlines()
+
+def import_lines(lines, **kwargs):
+    return import_file(io.BytesIO(b"\n".join(lines)), **kwargs)
+
+# Tests
+def test_export_import_round_trip():
+    seed_league()
+    before = state()
+    leaderboard = get_leaderboard(10)
+    lines = export_lines()
+
+    assert orjson.loads(lines[0]) == {"format": "league-export/1", "counts": {"players": 10, "teams": 2, "matches": 1}}
+    assert len(lines) == 14
+
+    db.clear()
+    assert import_lines(lines, batch_size=4) == {"players": 10, "teams": 2, "matches": 1}
+    assert state() == before
+    assert get_leaderboard(10) == leaderboard
+
+def test_import_needs_an_empty_store():
+    seed_league()
+    lines = export_lines()
+
+    with pytest.raises(HTTPException) as error:
+        import_lines(lines)
+    assert error.value.status_code == 409
+
+def test_import_stops_at_a_bad_line():
+    seed_league()
+    lines = export_lines()
+    db.clear()
+
+    with pytest.raises(HTTPException) as error:
+        import_lines(lines[:3] + [b'{"table": "players"'] + lines[3:])
+    assert error.value.status_code == 400
+    assert error.value.detail.startswith("Import rejected at line 4")
+
+    # The whole file is checked before anything is written, so a bad batch late in the file
+    # leaves the store empty and the import can be retried
+    with pytest.raises(HTTPException) as error:
+        import_lines(lines[:10] + lines[9:], batch_size=3)
+    assert error.value.status_code == 400
+    assert error.value.detail.startswith("Import rejected in lines 11-12: Duplicate id")
+    with pytest.raises(HTTPException) as error:
+        import_lines(lines[:10] + [lines[9].replace(b'"wins":0', b'"wins":18446744073709551616')] + lines[10:])
+    assert error.value.status_code == 400
+    assert all(len(table) == 0 for table in db.tables())
+
+    assert import_lines(lines)["players"] == 10
+
+def test_export_and_import_over_http():
+    from main import app
+    client = TestClient(app)
+    seed_league()
+    before = state()
+
+    response = client.get("/admin/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    db.clear()
+    imported = client.post("/admin/import", content=response.content)
+    assert imported.status_code == 200
+    assert imported.json() == {"players": 10, "teams": 2, "matches": 1}
+    assert state() == before
+    assert client.post("/admin/import", content=response.content).status_code == 409
+
+def test_wal_snapshot_can_be_imported(tmp_path):
+    source = Database(WriteAheadLogBackend(str(tmp_path), snapshot_interval=1))
+    source.open()
+    for i in range(5):
+        source.insert(source.players, {"id": f"p{i}", "nickname": f"Player{i}", "elo": 1000.0, "team": None})
+    source.close()
+
+    with open(tmp_path / "snapshot.ndjson", "rb") as snapshot:
+        assert import_file(snapshot)["players"] == 5
+    assert state()["players"] == state(source)["players"]
@@ -0,0 +1,87 @@
+import pytest
+from unittest.mock import patch
+
+from app.cache import ResponseCache, etag_matches, player_key, response_cache, team_key
+from app.models.match import Match
+from app.models.player import Player
+from app.services.match_service import create_match
+from app.services.player_service import create_player
+from app.services.team_service import create_team, get_team_json
+from app.storage.database import db
+
+# Fixtures
+@pytest.fixture
+def now():
+    current = [0.0]
+    with patch("app.cache.clock", lambda: current[0]):
+        yield current
+
+# Tests
+def test_hits_misses_and_lru_eviction(now):
+    cache = ResponseCache(max_entries=2, ttl=60)
+    cache.get_or_set("a", lambda: b"1")
+    cache.get_or_set("b", lambda: b"2")
+    assert cache.get_or_set("a", lambda: b"stale")[0] == b"1"
+
+    # "b" is least recently used and goes first
+    cache.get_or_set("c", lambda: b"3")
+    assert cache.get_or_set("b", lambda: b"2 again")[0] == b"2 again"
+
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 4 and stats["evictions"] == 2
+    assert stats["entries"] == 2
+
+def test_entries_expire_after_ttl(now):
+    cache = ResponseCache(max_entries=10, ttl=5)
+    cache.get_or_set("a", lambda: b"old")
+    now[0] = 6
+    assert cache.get_or_set("a", lambda: b"new")[0] == b"new"
+
+def test_invalidation_and_racing_reader(now):
+    cache = ResponseCache(max_entries=10, ttl=60)
+    cache.get_or_set("a", lambda: b"old")
+    cache.invalidate("a")
+    assert cache.get_or_set("a", lambda: b"new")[0] == b"new"
+    assert cache.stats()["invalidations"] == 1
+
+    # A body computed while a writer invalidated is returned but not kept
+    def racing_producer():
+        cache.invalidate("b")
+        return b"maybe stale"
+
+    assert cache.get_or_set("b", racing_producer)[0] == b"maybe stale"
+    assert cache.get_or_set("b", lambda: b"fresh")[0] == b"fresh"
+
+def test_etag_matching():
+    assert etag_matches('"x"', '"x"')
+    assert etag_matches('"y", "x"', '"x"')
+    assert etag_matches('W/"x"', '"x"')
+    assert etag_matches("*", '"x"')
+    assert not etag_matches(None, '"x"')
+    assert not etag_matches('"y"', '"x"')
+
+def test_create_match_invalidates_cached_teams():
+    team_ids = []
+    for t in range(2):
+        players = [create_player(Player(nickname=f"Cached{t}_{i}")) for i in range(5)]
+        team_ids.append(create_team(f"Cached{t}", [p.id for p in players]).id)
+
+    key = team_key(team_ids[0])
+    before, etag = response_cache.get_or_set(key, lambda: get_team_json(team_ids[0]))
+    create_match(Match(team1Id=team_ids[0], team2Id=team_ids[1], winningTeamId=team_ids[0], duration=1))
+
+    after, new_etag = response_cache.get_or_set(key, lambda: get_team_json(team_ids[0]))
+    assert after == get_team_json(team_ids[0]) != before
+    assert new_etag != etag
+
+def test_replayed_commits_invalidate_cached_responses():
+    # A commit replayed from another process drops the same keys its writer did
+    players = [create_player(Player(nickname=f"Replayed{i}")) for i in range(5)]
+    team_id = create_team("Replayed", [p.id for p in players]).id
+    other_id = create_team("Other", [create_player(Player(nickname=f"Other{i}")).id for i in range(5)]).id
+    for key in (player_key(players[0].id), team_key(team_id), team_key(other_id), player_key(players[1].id)):
+        response_cache.get_or_set(key, lambda: b"cached")
+
+    db.replay([["update", "players", players[0].id, {"elo": 1100, "team": other_id}]])
+    assert len(response_cache) == 1
+    assert response_cache.get_or_set(player_key(players[1].id), lambda: b"fresh")[0] == b"cached"
@@ -0,0 +1,124 @@
+import pytest
+from array import array
+from uuid import uuid4
+
+from app.storage.columnar import ColumnarTable
+from app.storage.database import PLAYER_COLUMNS, leaderboard_key, team_totals
+from app.storage.unit_of_work import UnitOfWork
+
+# Fixtures
+@pytest.fixture
+def table():
+    return ColumnarTable("players", PLAYER_COLUMNS, interned=("team",), unique=("nickname",), indexed=("team",),
+                         ordered={"leaderboard": leaderboard_key}, aggregates={"team": team_totals})
+
+def make_doc(nickname, team=None, elo=1000.0, wins=0):
+    return {"id": str(uuid4()), "nickname": nickname, "wins": wins, "losses": 0, "elo": elo, "hoursPlayed": 0,
+            "team": team, "ratingAdjustment": 50, "initialElo": elo}
+
+# Tests
+def test_documents_round_trip(table):
+    docs = [make_doc(f"P{i}", team="t1", elo=1000.0 + i) for i in range(3)]
+    for doc in docs:
+        table.insert(doc)
+
+    assert [table.get(doc["id"]) for doc in docs] == docs
+    assert list(table) == table.all() == table.page() == docs
+    assert table.get_by("nickname", "P1") == docs[1]
+    assert [doc["id"] for doc in table.find("team", "t1")] == [doc["id"] for doc in docs]
+    assert table.get(str(uuid4())) is None
+
+    # Field order is the column order, as the API returns it
+    assert list(table.get(docs[0]["id"])) == ["id", *PLAYER_COLUMNS]
+
+def test_numbers_live_in_typed_columns(table):
+    first, second = make_doc("Alpha", team="team-" + "x" * 30), make_doc("Bravo", team="team-" + "x" * 30)
+    table.insert(first)
+    table.insert(second)
+
+    columns = table._docs._columns
+    assert isinstance(columns["elo"], array) and columns["elo"].typecode == "d"
+    assert list(columns["wins"]) == [0, 0]
+    # Team references share one string
+    assert columns["team"][0] is columns["team"][1]
+
+def test_update_writes_columns_and_indexes(table):
+    doc = make_doc("Alpha", elo=1000.0)
+    leader = make_doc("Bravo", elo=1500.0)
+    table.insert(doc)
+    table.insert(leader)
+    before = table.get(doc["id"])
+
+    assert table.update(doc["id"], {"elo": 2000.0, "wins": 3, "team": "t2"})
+    assert table.get(doc["id"]) == {**doc, "elo": 2000.0, "wins": 3, "team": "t2"}
+    assert [d["id"] for d in table.find("team", "t2")] == [doc["id"]]
+    assert [d["id"] for d in table.ordered("leaderboard")] == [doc["id"], leader["id"]]
+
+    # Reads are snapshots: one taken before the update does not change
+    assert before["elo"] == 1000.0
+    assert not table.update(str(uuid4()), {"elo": 1.0})
+
+def test_values_that_do_not_fit_are_rejected_before_writing(table):
+    doc = make_doc("Alpha")
+    table.insert(doc)
+
+    unit = UnitOfWork()
+    unit.update(table, doc["id"], {"elo": 1200.0, "wins": "three"})
+    with pytest.raises(TypeError):
+        unit.commit()
+    with pytest.raises(TypeError):
+        table.insert(make_doc("Bravo", wins=1.5))
+    assert table.get(doc["id"]) == doc
+    assert len(table) == 1
+
+def test_missing_and_extra_fields(table):
+    table.insert({"id": "p0", "nickname": "Sparse", "note": "kept"})
+
+    doc = table.get("p0")
+    assert doc["elo"] == 0 and doc["team"] is None and doc["note"] == "kept"
+    table.update("p0", {"note": "changed"})
+    assert table.get("p0")["note"] == "changed"
+
+    table.truncate()
+    assert len(table) == 0 and table.get("p0") is None
+
+def test_values_out_of_range_are_rejected_before_writing(table):
+    doc = make_doc("Alpha", team="t1")
+    table.insert(doc)
+    too_big = 2 ** 63
+
+    with pytest.raises(ValueError):
+        table.insert(make_doc("Bravo", wins=too_big))
+    with pytest.raises(ValueError):
+        table.insert_many([make_doc("Bravo"), make_doc("Charlie", wins=too_big)])
+    with pytest.raises(ValueError):
+        table.insert(make_doc("Delta", elo=10 ** 400))
+
+    unit = UnitOfWork()
+    unit.update(table, doc["id"], {"elo": 1500.0, "hoursPlayed": too_big})
+    with pytest.raises(ValueError):
+        unit.commit()
+
+    # Nothing moved: columns, leaderboard and aggregates still agree
+    assert len(table) == 1 and table.get(doc["id"]) == doc
+    assert table.ordered("leaderboard")[0]["elo"] == 1000.0
+    assert table.totals("team", "t1") == (1, 1000.0, 0)
+    table.update(doc["id"], {"hoursPlayed": 2 ** 63 - 1})
+    assert table.get(doc["id"])["hoursPlayed"] == 2 ** 63 - 1
+
+def test_non_finite_numbers_are_rejected(table):
+    doc = make_doc("Alpha", team="t1")
+    table.insert(doc)
+
+    for value in (float("nan"), float("inf"), float("-inf")):
+        with pytest.raises(ValueError):
+            table.insert(make_doc("Bravo", elo=value))
+        with pytest.raises(ValueError):
+            table.insert_many([make_doc("Bravo"), make_doc("Charlie", elo=value)])
+        unit = UnitOfWork()
+        unit.update(table, doc["id"], {"elo": value})
+        with pytest.raises(ValueError):
+            unit.commit()
+
+    assert len(table) == 1 and table.get(doc["id"]) == doc
+    assert table.totals("team", "t1") == (1, 1000.0, 0)
@@ -0,0 +1,91 @@
+import sys
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+
+from app.models.match import Match
+from app.models.player import Player
+from app.services.match_service import create_match, create_matches_bulk
+from app.services.player_service import create_player
+from app.services.team_service import create_team
+from app.storage.database import db
+
+THREADS = 32
+
+# Fixtures
+@pytest.fixture(autouse=True)
+def frequent_thread_switches():
+    # Switch threads as often as possible so unsynchronized read-modify-write would interleave
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+@pytest.fixture
+def teams():
+    team_ids = []
+    for t in range(2):
+        players = [create_player(Player(nickname=f"Stress{t}_{i}", elo=1000)) for i in range(5)]
+        team_ids.append(create_team(f"Stress{t}", [p.id for p in players]).id)
+    return team_ids
+
+def run_parallel(fn, items):
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        return list(pool.map(fn, items))
+
+# Tests
+def test_parallel_matches_lose_no_updates(teams):
+    team1, team2 = teams
+    matches = [
+        Match(team1Id=team1, team2Id=team2, winningTeamId=[team1, team2, None][i % 3], duration=1 + i % 7)
+        for i in range(600)
+    ]
+    run_parallel(create_match, matches)
+
+    total_hours = sum(match.duration for match in matches)
+    for doc in db.players.all():
+        assert doc["hoursPlayed"] == total_hours
+        assert doc["wins"] + doc["losses"] == 400
+    assert len(db.matches) == len(matches)
+
+    # Elo equals a sequential replay in commit order, so no rating update was lost
+    final = {doc["id"]: doc["elo"] for doc in db.players.all()}
+    committed = [Match(**doc) for doc in db.matches.all()]
+    for doc in db.players.all():
+        db.players.update(doc["id"], {"elo": 1000, "hoursPlayed": 0, "wins": 0, "losses": 0})
+    db.matches.truncate()
+    create_matches_bulk(committed)
+    assert {doc["id"]: doc["elo"] for doc in db.players.all()} == final
+
+def test_parallel_duplicate_nicknames_create_one_player():
+    def attempt(_):
+        try:
+            create_player(Player(nickname="Contested"))
+            return True
+        except HTTPException:
+            return False
+
+    assert sum(run_parallel(attempt, range(200))) == 1
+    assert len(db.players) == 1
+
+def test_parallel_team_creation_assigns_each_player_once():
+    players = [create_player(Player(nickname=f"Free{i}")) for i in range(5)]
+
+    def attempt(t):
+        try:
+            create_team(f"Claim{t}", [p.id for p in players])
+            return True
+        except HTTPException:
+            return False
+
+    assert sum(run_parallel(attempt, range(100))) == 1
+    assert len(db.teams) == 1
+
+def test_reads_do_not_wait_for_the_writer(teams):
+    from app.services.team_service import get_team_by_id
+
+    # A reader completes while another thread holds the write lock
+    with db.lock:
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            team = pool.submit(get_team_by_id, teams[0]).result(timeout=5)
+    assert len(team.players) == 5
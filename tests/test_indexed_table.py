@@ -0,0 +1,169 @@
+import pytest
+from uuid import uuid4
+
+from app.storage.table import IndexedTable, reads
+
+# Fixtures
+@pytest.fixture
+def table():
+    return IndexedTable("players", unique=("nickname",), indexed=("team",))
+
+def make_doc(nickname, team=None):
+    return {"id": str(uuid4()), "nickname": nickname, "team": team}
+
+# Tests
+def test_insert_and_lookup(table):
+    doc = make_doc("Alpha", team="t1")
+    table.insert(doc)
+
+    assert len(table) == 1
+    assert table.get(doc["id"])["nickname"] == "Alpha"
+    assert table.get_by("nickname", "Alpha")["id"] == doc["id"]
+    assert table.contains("team", "t1")
+    assert table.get(str(uuid4())) is None
+
+def test_insert_rejects_duplicates(table):
+    doc = make_doc("Alpha")
+    table.insert(doc)
+
+    with pytest.raises(ValueError):
+        table.insert(doc)
+    with pytest.raises(ValueError):
+        table.insert(make_doc("Alpha"))
+
+def test_find_by_non_unique_index(table):
+    docs = [make_doc(f"P{i}", team="t1") for i in range(3)]
+    for doc in docs:
+        table.insert(doc)
+    table.insert(make_doc("Loner"))
+
+    assert {doc["id"] for doc in table.find("team", "t1")} == {doc["id"] for doc in docs}
+    assert table.find("team", "missing") == []
+
+def test_update_moves_index_entries(table):
+    doc = make_doc("Alpha")
+    other = make_doc("Bravo")
+    table.insert(doc)
+    table.insert(other)
+
+    assert table.update(doc["id"], {"nickname": "Charlie", "team": "t2"})
+    assert table.get_by("nickname", "Alpha") is None
+    assert table.get_by("nickname", "Charlie")["id"] == doc["id"]
+    assert [d["id"] for d in table.find("team", "t2")] == [doc["id"]]
+
+    # Unique constraint is enforced on update, and missing documents are a no-op
+    with pytest.raises(ValueError):
+        table.update(doc["id"], {"nickname": "Bravo"})
+    assert not table.update(str(uuid4()), {"nickname": "Delta"})
+
+def test_page_follows_insertion_order(table):
+    docs = [make_doc(f"P{i}") for i in range(5)]
+    for doc in docs:
+        table.insert(doc)
+
+    assert [d["id"] for d in table.page(limit=2)] == [docs[0]["id"], docs[1]["id"]]
+    assert [d["id"] for d in table.page(after=docs[1]["id"], limit=2)] == [docs[2]["id"], docs[3]["id"]]
+    assert [d["id"] for d in table.page(after=docs[3]["id"], limit=2)] == [docs[4]["id"]]
+    assert table.page(after=docs[4]["id"]) == []
+
+    with pytest.raises(KeyError):
+        table.page(after=str(uuid4()))
+
+def test_timeline_pages_newest_first():
+    table = IndexedTable("matches", timelines={"team": ("team1Id", "team2Id"), "player": ("playerIds",)})
+    for i in range(5):
+        table.insert({"id": f"m{i}", "team1Id": "a", "team2Id": "b" if i % 2 else "c", "playerIds": ["p1", f"x{i}"]})
+
+    assert [d["id"] for d in table.timeline("team", "a", limit=2)] == ["m4", "m3"]
+    assert [d["id"] for d in table.timeline("team", "a", before="m3", limit=2)] == ["m2", "m1"]
+    assert [d["id"] for d in table.timeline("team", "a", before="m1")] == ["m0"]
+    assert [d["id"] for d in table.timeline("team", "b")] == ["m3", "m1"]
+    assert [d["id"] for d in table.timeline("player", "p1", limit=10)] == ["m4", "m3", "m2", "m1", "m0"]
+    assert table.timeline("player", "nobody") == []
+
+    with pytest.raises(KeyError):
+        table.timeline("team", "a", before="missing")
+
+def test_insert_many_matches_insert():
+    def new_table():
+        return IndexedTable("matches", unique=("nickname",), indexed=("team",),
+                            ordered={"rank": lambda doc: (-doc["elo"],)}, timelines={"team": ("team",)})
+    docs = [{"id": f"d{i}", "nickname": f"N{i}", "team": f"t{i % 3}", "elo": i * 7 % 11} for i in range(20)]
+    one_by_one, batched = new_table(), new_table()
+    for doc in docs:
+        one_by_one.insert(doc)
+    batched.insert_many(docs[:5])
+    batched.insert_many(docs[5:])
+
+    assert batched.all() == one_by_one.all()
+    assert batched.ordered("rank", limit=20) == one_by_one.ordered("rank", limit=20)
+    assert batched.find("team", "t1") == one_by_one.find("team", "t1")
+    assert batched.timeline("team", "t2", limit=20) == one_by_one.timeline("team", "t2", limit=20)
+
+def test_insert_many_rejects_duplicates_in_the_batch(table):
+    table.insert(make_doc("Alpha"))
+
+    for batch in ([make_doc("Bravo"), make_doc("Bravo")], [make_doc("Charlie"), make_doc("Alpha")]):
+        with pytest.raises(ValueError):
+            table.insert_many(batch)
+    doc = make_doc("Delta")
+    with pytest.raises(ValueError):
+        table.insert_many([doc, doc])
+    assert len(table) == 1
+
+def test_checks_cover_keys_and_totals():
+    def by_team(doc):
+        return ((doc["team"], (1, doc["elo"])),) if doc.get("team") else ()
+    table = IndexedTable("players", ordered={"rank": lambda doc: (-doc["elo"],)}, aggregates={"team": by_team})
+    table.insert({"id": "a", "team": "t1", "elo": 10})
+
+    # Everything applying would trip on is caught before anything changes
+    for bad in (float("nan"), float("inf"), None):
+        with pytest.raises((TypeError, ValueError)):
+            table.check_update("a", {"elo": bad})
+        with pytest.raises((TypeError, ValueError)):
+            table.insert_many([{"id": "b", "team": "t1", "elo": 1}, {"id": "c", "team": "t1", "elo": bad}])
+    with pytest.raises(TypeError):
+        table.insert({"id": "d", "team": ["t1"], "elo": 1})
+    assert table.all() == [{"id": "a", "team": "t1", "elo": 10}]
+    assert table.groups("team") == {"t1": (1, 10)}
+
+def test_aggregates_follow_every_write():
+    def by_team(doc):
+        return ((doc["team"], (1, doc["elo"])),) if doc.get("team") else ()
+    table = IndexedTable("players", aggregates={"team": by_team})
+    table.insert({"id": "a", "team": "t1", "elo": 10})
+    table.insert_many([{"id": "b", "team": "t1", "elo": 20}, {"id": "c", "team": "t2", "elo": 5}])
+    assert table.totals("team", "t1") == (2, 30)
+    assert table.total("team") == (3, 35)
+
+    table.update("a", {"elo": 15})
+    table.update("c", {"team": "t1"})
+    table.update("b", {"team": None})
+    assert table.groups("team") == {"t1": (2, 20)}
+    # A group no document contributes to is dropped
+    assert table.totals("team", "t2") is None
+    assert table.total("team") == (2, 20)
+
+    table.truncate()
+    assert table.groups("team") == {}
+    assert table.total("team") is None
+
+def test_update_many_matches_update():
+    calls = []
+
+    @reads("team", "elo")
+    def by_team(doc):
+        calls.append(doc["id"])
+        return ((doc["team"], (1, doc["elo"])),) if doc.get("team") else ()
+    table = IndexedTable("players", ordered={"rank": lambda doc: (-doc["elo"],)}, aggregates={"team": by_team})
+    table.insert_many([{"id": "a", "team": "t1", "elo": 10, "wins": 0}, {"id": "b", "team": "t1", "elo": 20, "wins": 0}])
+
+    # A field no aggregate reads leaves the contributions alone
+    calls.clear()
+    table.update("a", {"wins": 1})
+    assert calls == []
+
+    table.update_many([("a", {"elo": 30}), ("b", {"team": "t2"}), ("a", {"elo": 40})])
+    assert table.groups("team") == {"t1": (1, 40), "t2": (1, 20)}
+    assert [doc["id"] for doc in table.ordered("rank")] == ["a", "b"]
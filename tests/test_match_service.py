@@ -5,6 +5,7 @@ from app.models.match import Match
 from app.models.player import Player
 from app.models.team import Team
 from app.services.match_service import create_match
+from app.storage.database import db
 from fastapi import HTTPException
 
 # Fixtures
@@ -35,38 +36,53 @@ def mock_match(mock_teams):
         winningTeamId=team1.id,  # Team1 wins
     )
 
-# Mock for update_player_in_db
+# Store the players so create_match can commit their updates
 @pytest.fixture
-def mock_update_player():
-    with patch("app.services.match_service.update_player_in_db") as mock:
-        yield mock
+def stored_players(mock_teams):
+    team1, team2 = mock_teams
+    for player in team1.players + team2.players:
+        db.players.insert(player.model_dump())
 
 # Mock for get_team_by_id
 @pytest.fixture
-def mock_get_team(mock_teams):
+def mock_get_team(mock_teams, stored_players):
     team1, team2 = mock_teams
     with patch("app.services.match_service.get_team_by_id", side_effect=lambda tid: team1 if tid == team1.id else team2):
         yield
 
 # Tests
-def test_create_match_success(mock_match, mock_teams, mock_get_team, mock_update_player):
+def test_create_match_success(mock_match, mock_teams, mock_get_team):
     team1, team2 = mock_teams
 
-    with patch("app.services.match_service.matches_table") as mock_matches_table:
-        # Create the match
-        created_match = create_match(mock_match)
+    # Create the match
+    created_match = create_match(mock_match)
+
+    # Assert match creation
+    assert created_match.team1Id == team1.id
+    assert created_match.team2Id == team2.id
+    assert created_match.winningTeamId == team1.id
 
-        # Assert match creation
-        assert created_match.team1Id == team1.id
-        assert created_match.team2Id == team2.id
-        assert created_match.winningTeamId == team1.id
+    # Validate match saved in the database, together with its rosters
+    stored_match = db.matches.get(mock_match.id)
+    assert Match(**stored_match) == mock_match
+    assert stored_match["team1PlayerIds"] == [p.id for p in team1.players]
+    assert stored_match["team2PlayerIds"] == [p.id for p in team2.players]
 
-        # Validate match saved in the database
-        mock_matches_table.insert.assert_called_once_with(mock_match.model_dump())
+    # Validate player updates
+    for player in team1.players + team2.players:
+        stored = db.players.get(player.id)
+        assert stored["hoursPlayed"] == player.hoursPlayed
+        assert stored["elo"] == player.elo
+    assert all(db.players.get(p.id)["wins"] == 1 for p in team1.players)
+    assert all(db.players.get(p.id)["losses"] == 1 for p in team2.players)
 
-        # Validate player updates
-        for player in team1.players + team2.players:
-            mock_update_player.assert_any_call(player)
+def test_create_match_commits_one_batch(mock_match, mock_get_team):
+    with patch("app.storage.unit_of_work.UnitOfWork.commit", autospec=True) as mock_commit:
+        create_match(mock_match)
+
+    # One batched write carrying ten player updates and the match record
+    mock_commit.assert_called_once()
+    assert len(mock_commit.call_args[0][0]) == 11
 
 def test_create_match_invalid_duration(mock_match):
     mock_match.duration = 0  # Invalid duration
@@ -77,6 +93,17 @@ def test_create_match_invalid_duration(mock_match):
     assert exc_info.value.status_code == 400
     assert exc_info.value.detail == "Duration must be at least 1 hour"
 
+def test_create_match_rejects_a_team_playing_itself(mock_match, mock_get_team):
+    mock_match.team2Id = mock_match.team1Id
+
+    with pytest.raises(HTTPException) as exc_info:
+        create_match(mock_match)
+
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.detail == "A team cannot play itself"
+    assert all(doc["hoursPlayed"] in (100, 200) and doc["wins"] == 0 for doc in db.players.all())
+    assert len(db.matches) == 0
+
 
 
 def test_create_match_invalid_winning_team(mock_match, mock_get_team):
@@ -89,23 +116,152 @@ def test_create_match_invalid_winning_team(mock_match, mock_get_team):
     assert exc_info.value.status_code == 400
     assert exc_info.value.detail == "Invalid winningTeamId"
 
-def test_update_team_stats(mock_teams, mock_update_player):
+    # Nothing was applied: the match is all-or-nothing
+    assert all(doc["hoursPlayed"] in (100, 200) for doc in db.players.all())
+    assert len(db.matches) == 0
+
+def test_update_match_stats(mock_teams):
     team1, team2 = mock_teams
     opponent_elo = sum(player.elo for player in team2.players) / len(team2.players)
+    starting_elo = [player.elo for player in team1.players]
 
-    # Call update_team_stats for the winning team
-    from app.services.match_service import update_team_stats
-    update_team_stats(team1, team2, S=1, duration=2)
+    # Apply a win for team1
+    from app.services.match_service import update_match_stats
+    update_match_stats(team1, team2, S=1)
 
     # Assert Elo adjustments and win updates
-    for player in team1.players:
-        # Replicate the logic from update_team_stats (with rounding in the exponent)
-        E = 1 / (1 + 10 ** (round((opponent_elo - player.elo) / 400)))
+    for player, elo in zip(team1.players, starting_elo):
+        # Replicate the Elo rules (with rounding in the exponent)
+        E = 1 / (1 + 10 ** (round((opponent_elo - elo) / 400)))
         K = 50 if player.hoursPlayed < 500 else 40  # Determine K-factor
         adjustment = round(K * (1 - E))
-        expected_elo = player.elo  # The player's Elo was already updated inside update_team_stats
 
         # Assert Elo and wins
-        mock_player = mock_update_player.call_args_list[0][0][0]  # Get the player passed to the mock
-        assert mock_player.elo == expected_elo, f"Expected {expected_elo}, got {mock_player.elo}"
-        assert mock_player.wins == 1
\ No newline at end of file
+        assert player.elo == elo + adjustment, f"Expected {elo + adjustment}, got {player.elo}"
+        assert player.wins == 1
+
+    # The loser is rated against the winner's updated average
+    winner_elo = sum(player.elo for player in team1.players) / len(team1.players)
+    for player in team2.players:
+        E = 1 / (1 + 10 ** (round((winner_elo - 1100) / 400)))
+        assert player.elo == 1100 + round(50 * (0 - E))
+        assert player.losses == 1
+
+    # The players are only changed in memory; create_match commits them
+    assert len(db.players) == 0
+def player_state():
+    # Team IDs are random per seeding, so compare everything else
+    return {doc["id"]: {k: v for k, v in doc.items() if k != "team"} for doc in db.players.all()}
+
+def seed_league(teams=6):
+    import random
+    from app.services.player_service import create_player
+    from app.services.team_service import create_team
+
+    rng = random.Random(3)
+    team_ids = []
+    for t in range(teams):
+        players = [
+            create_player(Player(id=f"p{t}_{i}", nickname=f"P{t}_{i}", elo=rng.randint(0, 3000),
+                                 hoursPlayed=rng.choice([0, 450, 990, 2990, 4990, 6000])))
+            for i in range(5)
+        ]
+        team_ids.append(create_team(f"Team{t}", [p.id for p in players]).id)
+    matches = []
+    for m in range(200):
+        team1, team2 = rng.sample(team_ids, 2)
+        matches.append(Match(id=f"m{m}", team1Id=team1, team2Id=team2,
+                             winningTeamId=rng.choice([team1, team2, None]), duration=rng.randint(1, 400)))
+    return matches
+
+def test_create_matches_bulk_matches_sequential():
+    from app.services.match_service import create_matches_bulk
+
+    for match in seed_league():
+        create_match(match)
+    sequential = player_state()
+
+    db.clear()
+    matches = seed_league()
+    assert create_matches_bulk(matches) == matches
+
+    assert player_state() == sequential
+    assert len(db.matches) == len(matches)
+
+def test_create_matches_bulk_is_all_or_nothing():
+    from app.services.match_service import create_matches_bulk
+
+    matches = seed_league()
+    before = player_state()
+    matches[150].winningTeamId = str(uuid4())
+
+    with pytest.raises(HTTPException) as exc_info:
+        create_matches_bulk(matches)
+
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.detail == "Match 150: Invalid winningTeamId"
+    assert player_state() == before
+    assert len(db.matches) == 0
+
+def test_match_history_by_team_and_player():
+    from app.services.match_service import get_match, get_player_matches, get_team_matches
+
+    matches = seed_league(teams=3)[:30]
+    for match in matches:
+        create_match(match)
+    team_id = matches[0].team1Id
+    player_id = db.teams.get(team_id)["players"][0]
+    expected = [m.id for m in reversed(matches) if team_id in (m.team1Id, m.team2Id)]
+
+    assert get_match(matches[5].id) == matches[5]
+
+    # Newest first, walking pages with the cursor
+    seen, cursor = [], None
+    while True:
+        page, cursor = get_team_matches(team_id, limit=4, before=cursor)
+        seen += [m.id for m in page]
+        if cursor is None:
+            break
+    assert seen == expected
+
+    # A player's history is the history of their team here
+    page, _ = get_player_matches(player_id, limit=100)
+    assert [m.id for m in page] == expected
+
+def test_match_history_errors():
+    from app.services.match_service import get_match, get_player_matches, get_team_matches
+
+    matches = seed_league(teams=2)[:1]
+    create_match(matches[0])
+
+    for call in (lambda: get_match("missing"), lambda: get_team_matches("missing", 10),
+                 lambda: get_player_matches("missing", 10)):
+        with pytest.raises(HTTPException) as exc_info:
+            call()
+        assert exc_info.value.status_code == 404
+
+    with pytest.raises(HTTPException) as exc_info:
+        get_team_matches(matches[0].team1Id, 10, before="missing")
+    assert exc_info.value.status_code == 400
+
+def test_stats_that_would_overflow_are_rejected():
+    from fastapi.testclient import TestClient
+    from main import app
+    from app.services.stats_service import get_team_stats
+
+    client = TestClient(app)
+    assert client.post("/players/create", json={"nickname": "Huge", "hoursPlayed": 2 ** 64}).status_code == 422
+
+    seed_league(2)
+    team1, team2 = (team["id"] for team in db.teams.all())
+    long_match = {"team1Id": team1, "team2Id": team2, "winningTeamId": team1, "duration": 2 ** 62}
+    assert client.post("/matches", json=long_match).status_code == 200
+    before = player_state()
+
+    response = client.post("/matches", json=long_match)
+    assert response.status_code == 400
+    assert "out of the 64-bit integer range" in response.json()["detail"]
+    assert player_state() == before
+    assert len(db.matches) == 1
+    players = [db.players.get(player_id) for player_id in db.teams.get(team1)["players"]]
+    assert get_team_stats(team1).averageElo == pytest.approx(sum(p["elo"] for p in players) / 5)
@@ -0,0 +1,119 @@
+import pytest
+from unittest.mock import patch
+from fastapi import HTTPException
+from uuid import uuid4
+
+from app.models.player import Player
+from app.services.matchmaking_service import (
+    MatchmakingQueue, enqueue_team, get_pairings, leave_queue, matchmaking_queue,
+)
+from app.services.player_service import create_player
+from app.services.team_service import create_team
+
+# Fixtures
+@pytest.fixture
+def now():
+    # Controllable clock, in seconds
+    current = [0.0]
+    with patch("app.services.matchmaking_service.clock", lambda: current[0]):
+        yield current
+
+def make_team(name, elo):
+    players = [create_player(Player(nickname=f"{name}_{i}", elo=elo)) for i in range(5)]
+    return create_team(name, [p.id for p in players]).id
+
+# Tests
+def test_pairs_nearest_team_within_window(now):
+    low = make_team("Low", 1000)
+    high = make_team("High", 1400)
+    near = make_team("Near", 1450)
+
+    assert enqueue_team(low).status == "queued"
+    assert enqueue_team(high).status == "queued"
+
+    # 1450 is within the 100 Elo window of 1400 but far from 1000
+    status = enqueue_team(near)
+    assert status.status == "paired"
+    assert (status.pairing.team1Id, status.pairing.team2Id) == (high, near)
+    assert status.pairing.eloDifference == 50
+    assert len(matchmaking_queue) == 1
+
+def test_window_widens_while_waiting(now):
+    first = make_team("First", 1000)
+    second = make_team("Second", 1300)
+
+    enqueue_team(first)
+    now[0] = 5.0
+    # 300 apart: outside the 100 window until the waiting team has widened to 150
+    assert enqueue_team(second).status == "queued"
+
+    now[0] = 25.0
+    pairings = get_pairings(limit=10)
+    assert [(p.team1Id, p.team2Id) for p in pairings] == [(first, second)]
+    assert len(matchmaking_queue) == 0
+
+def test_queue_rejects_duplicates_and_unknown_teams(now):
+    team = make_team("Solo", 1000)
+    enqueue_team(team)
+
+    with pytest.raises(HTTPException) as exc_info:
+        enqueue_team(team)
+    assert exc_info.value.status_code == 400
+
+    with pytest.raises(HTTPException) as exc_info:
+        enqueue_team(str(uuid4()))
+    assert exc_info.value.status_code == 404
+
+    leave_queue(team)
+    assert len(matchmaking_queue) == 0
+    with pytest.raises(HTTPException) as exc_info:
+        leave_queue(team)
+    assert exc_info.value.status_code == 404
+
+def test_pairings_paginate_with_cursor(now):
+    teams = [make_team(f"T{i}", 1000 + i) for i in range(6)]
+    for team in teams:
+        enqueue_team(team)
+
+    first = get_pairings(limit=2)
+    rest = get_pairings(limit=2, after=first[-1].id)
+    assert len(first) == 2 and len(rest) == 1
+    assert {p.team1Id for p in first + rest} | {p.team2Id for p in first + rest} == set(teams)
+
+def test_sweep_pairs_neighbours_when_due(now):
+    queue = MatchmakingQueue()
+    for team, elo in (("A", 1000), ("B", 1150), ("C", 1300), ("D", 1800)):
+        assert queue.enqueue(team, elo) is None
+
+    # A-B and B-C are due at 5s, once the window has widened to 150; B leaves first,
+    # so those are dropped and A-C, 300 apart, waits until 20s. D is out of reach.
+    queue.leave("B")
+    now[0] = 19.0
+    assert queue.sweep() == []
+    now[0] = 20.0
+    assert [(p.team1Id, p.team2Id) for p in queue.sweep()] == [("A", "C")]
+    now[0] = 1000.0
+    assert queue.sweep() == [] and len(queue) == 1
+
+def test_pairings_are_kept_in_a_window(now):
+    queue = MatchmakingQueue(kept=3)
+    made = []
+    for i in range(8):
+        queue.enqueue(f"waiting{i}", i * 10_000)
+        made.append(queue.enqueue(f"arriving{i}", i * 10_000 + 1).id)
+
+    # Trimmed back to the latest three once six were held, then two more
+    assert [p.id for p in queue.pairings(limit=100)] == made[3:]
+    assert [p.id for p in queue.pairings(limit=2, after=made[4])] == made[5:7]
+    with pytest.raises(HTTPException) as exc_info:
+        queue.pairings(limit=2, after=made[0])
+    assert exc_info.value.status_code == 400
+
+def test_disabled_with_shared_backend(now):
+    team = make_team("Shared", 1000)
+    with patch("app.config.STORAGE_BACKEND", "shared"):
+        for call in (lambda: enqueue_team(team), lambda: get_pairings(limit=10), lambda: leave_queue(team)):
+            with pytest.raises(HTTPException) as exc_info:
+                call()
+            assert exc_info.value.status_code == 501
+    assert len(matchmaking_queue) == 0
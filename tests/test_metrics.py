@@ -0,0 +1,97 @@
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import metrics
+from app.metrics import Histogram, MATCHES_PROCESSED, SERVICE_LATENCY, RequestProfile, current_profile
+from app.models.match import Match
+from app.models.player import Player
+from app.services.match_service import create_match
+from app.services.player_service import create_player
+from app.services.team_service import create_team
+from main import app
+
+# Fixtures
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    metrics.clear()
+    yield
+    metrics.clear()
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+@pytest.fixture
+def two_teams():
+    ids = [create_player(Player(nickname=f"m{i}")).id for i in range(10)]
+    return create_team("Metrics A", ids[:5]).id, create_team("Metrics B", ids[5:]).id
+
+# Tests
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("latency_seconds", "Test latency.", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, ("/a",))
+    histogram.observe(0.5, ("/a",))
+    histogram.observe(5, ("/a",))
+
+    lines = histogram.render()
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/a",le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'latency_seconds_count{route="/a"} 3' in lines
+
+def test_shards_of_exited_threads_are_folded():
+    histogram = Histogram("work_seconds", "Test latency.")
+    for _ in range(20):
+        thread = threading.Thread(target=histogram.observe, args=(0.01,))
+        thread.start()
+        thread.join()
+
+    assert histogram.count() == 20
+    assert len(histogram._shards) == 0
+
+def test_service_calls_are_timed_and_matches_counted(two_teams):
+    team1, team2 = two_teams
+    create_match(Match(team1Id=team1, team2Id=team2, winningTeamId=team1, duration=1))
+
+    assert SERVICE_LATENCY.count(("create_match",)) == 1
+    # Helpers inside a timed call are covered by it, not timed again
+    assert SERVICE_LATENCY.count(("update_match_stats",)) == 0
+    assert MATCHES_PROCESSED.value() == 1
+
+def test_storage_operations_are_counted_per_request(two_teams):
+    team1, team2 = two_teams
+    profile = RequestProfile(spans=True)
+    token = current_profile.set(profile)
+    try:
+        create_match(Match(team1Id=team1, team2Id=team2, duration=1))
+    finally:
+        current_profile.reset(token)
+
+    # Ten player updates and one match insert, committed as one unit
+    assert profile.writes == 11
+    assert profile.reads > 0
+    assert [name for name, _ in profile.spans][-1] == "create_match"
+
+def test_metrics_endpoint_reports_routes_by_template(client, two_teams):
+    team1, _ = two_teams
+    client.get(f"/teams/{team1}")
+    client.get("/players/missing")
+
+    body = client.get("/metrics").text
+    assert 'http_request_duration_seconds_count{method="GET",route="/teams/{team_id}",status="200"} 1' in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/players/{player_id}",status="404"} 1' in body
+    assert "response_cache_misses" in body
+
+def test_profile_header_returns_span_breakdown(client, two_teams):
+    team1, team2 = two_teams
+    response = client.post("/matches", json={"team1Id": team1, "team2Id": team2, "duration": 1},
+                           headers={"X-Profile": "1"})
+
+    timing = response.headers["Server-Timing"]
+    assert "create_match;dur=" in timing
+    assert 'storage;desc="reads=' in timing and "writes=11" in timing
+
+    # Without the header no breakdown is sent
+    assert "Server-Timing" not in client.get(f"/teams/{team1}").headers
@@ -0,0 +1,194 @@
+import multiprocessing
+
+import pytest
+
+from app.storage import database as database_module
+from app.storage.database import Database
+from app.storage.persistence import SharedLogBackend, WriteAheadLogBackend
+
+# Helpers
+def open_db(directory, snapshot_interval=1000):
+    database = Database(WriteAheadLogBackend(str(directory), snapshot_interval=snapshot_interval))
+    database.open()
+    return database
+
+def open_shared(directory, snapshot_interval=1000):
+    database = Database(SharedLogBackend(str(directory), snapshot_interval=snapshot_interval))
+    database.open()
+    return database
+
+def add_players(database, count, start=0):
+    for i in range(start, start + count):
+        database.insert(database.players, {"id": f"p{i}", "nickname": f"Player{i}", "elo": 1000, "team": None})
+
+def state(database):
+    return {table.name: sorted(table.all(), key=lambda doc: doc["id"]) for table in database.tables()}
+
+def shared_writer(directory, start, count):
+    # Runs in a child process with its own replica
+    database = open_shared(directory, snapshot_interval=16)
+    add_players(database, count, start)
+    database.close()
+
+# Tests
+def test_restart_recovers_logged_commits(tmp_path):
+    database = open_db(tmp_path)
+    add_players(database, 5)
+    unit = database.unit_of_work()
+    unit.update(database.players, "p0", {"elo": 1050})
+    unit.insert(database.teams, {"id": "t0", "teamName": "Team0", "players": ["p0"]})
+    unit.commit()
+    expected = state(database)
+    database.close()
+
+    recovered = open_db(tmp_path)
+    assert state(recovered) == expected
+    assert recovered.players.get_by("nickname", "Player3")["id"] == "p3"
+
+def test_snapshot_compacts_log(tmp_path):
+    database = open_db(tmp_path, snapshot_interval=4)
+    add_players(database, 10)
+    expected = state(database)
+    database.close()
+
+    # Two snapshots were taken; only the last two commits remain in the log
+    backend = WriteAheadLogBackend(str(tmp_path))
+    assert backend.snapshot_path.exists()
+    assert len(backend.log_path.read_bytes().splitlines()) == 2
+
+    recovered = open_db(tmp_path, snapshot_interval=4)
+    assert state(recovered) == expected
+    assert recovered.backend.sequence == 10
+
+def test_torn_log_tail_is_discarded(tmp_path):
+    database = open_db(tmp_path)
+    add_players(database, 3)
+    database.close()
+
+    log_path = tmp_path / "wal.ndjson"
+    with open(log_path, "ab") as log:
+        log.write(b'{"seq":4,"ops":[["insert","players",{"id":"p3"')
+
+    recovered = open_db(tmp_path)
+    assert len(recovered.players) == 3
+
+    # New commits after recovery are readable on the next restart
+    add_players(recovered, 1, start=3)
+    recovered.close()
+    assert len(open_db(tmp_path).players) == 4
+
+def test_log_records_covered_by_snapshot_are_skipped(tmp_path):
+    database = open_db(tmp_path)
+    add_players(database, 3)
+    log_before_snapshot = (tmp_path / "wal.ndjson").read_bytes()
+
+    # Simulate a crash after the snapshot was written but before the log was reset
+    database.backend.snapshot(database)
+    database.close()
+    (tmp_path / "wal.ndjson").write_bytes(log_before_snapshot)
+
+    recovered = open_db(tmp_path)
+    assert len(recovered.players) == 3
+
+def test_failed_commit_is_not_logged(tmp_path):
+    database = open_db(tmp_path)
+    add_players(database, 1)
+
+    with pytest.raises(ValueError):
+        add_players(database, 1)
+    database.close()
+
+    assert len((tmp_path / "wal.ndjson").read_bytes().splitlines()) == 1
+
+def test_non_finite_numbers_never_reach_the_log(tmp_path):
+    database = open_db(tmp_path)
+    add_players(database, 1)
+
+    for value in (float("nan"), float("inf"), [1.0, float("-inf")]):
+        with pytest.raises(ValueError):
+            database.insert(database.teams, {"id": "t1", "teamName": "Red", "score": value})
+        with pytest.raises(ValueError):
+            database.update(database.players, "p0", {"nickname": "Zed", "scores": value})
+    with pytest.raises(ValueError):
+        database.update(database.players, "p0", {"elo": float("nan")})
+    database.close()
+
+    assert len((tmp_path / "wal.ndjson").read_bytes().splitlines()) == 1
+    assert state(open_db(tmp_path)) == state(database)
+
+def test_failed_apply_halts_and_drops_the_record(tmp_path, monkeypatch):
+    halted = []
+    monkeypatch.setattr(database_module, "halt", lambda: halted.append(True))
+    database = open_db(tmp_path)
+    add_players(database, 1)
+
+    def broken(docs, checked=False):
+        raise RuntimeError("apply failed")
+    monkeypatch.setattr(database.players, "insert_many", broken)
+    with pytest.raises(RuntimeError):
+        add_players(database, 1, start=1)
+    assert halted == [True]
+    database.close()
+
+    # The record of the commit that was never applied is gone, so recovery sees the last good state
+    recovered = open_db(tmp_path)
+    assert [player["id"] for player in recovered.players.all()] == ["p0"]
+    assert recovered.backend.sequence == 1
+
+def test_shared_replicas_see_each_others_commits(tmp_path):
+    first, second = open_shared(tmp_path), open_shared(tmp_path)
+    add_players(first, 3)
+    assert len(second.players) == 0
+    assert second.behind() and not first.behind()
+
+    second.refresh()
+    assert state(second) == state(first)
+    assert not second.behind()
+
+    # Writing catches up first, so the sequence continues and uniqueness holds across replicas
+    second.update(second.players, "p0", {"elo": 1100})
+    with pytest.raises(ValueError):
+        first.insert(first.players, {"id": "p9", "nickname": "Player1", "elo": 1000, "team": None})
+    assert first.players.get("p0")["elo"] == 1100
+    assert second.backend.sequence == first.backend.sequence == 4
+
+def test_shared_replicas_follow_compaction(tmp_path):
+    first, second = open_shared(tmp_path, snapshot_interval=4), open_shared(tmp_path, snapshot_interval=4)
+    add_players(first, 2)
+    second.refresh()
+    add_players(first, 5, start=2)
+    second.refresh()
+    assert state(second) == state(first)
+
+    # Lagging behind more than one compaction reloads from the snapshot
+    add_players(first, 10, start=7)
+    second.refresh()
+    assert state(second) == state(first)
+    assert second.backend.sequence == 17
+
+def test_shared_refresh_leaves_partial_records(tmp_path):
+    first, second = open_shared(tmp_path), open_shared(tmp_path)
+    add_players(first, 2)
+    with open(tmp_path / "wal.ndjson", "ab") as log:
+        log.write(b'{"seq":3,"ops":[["insert","players",{"id":"p2"')
+
+    # A reader skips the unfinished record; the next writer discards it
+    second.refresh()
+    assert len(second.players) == 2
+    add_players(second, 1, start=2)
+    first.refresh()
+    assert state(first) == state(second)
+    assert state(open_shared(tmp_path)) == state(second)
+
+def test_shared_writers_in_several_processes(tmp_path):
+    context = multiprocessing.get_context("fork")
+    writers = [context.Process(target=shared_writer, args=(str(tmp_path), 100 * w, 40)) for w in range(3)]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+    assert [writer.exitcode for writer in writers] == [0, 0, 0]
+
+    recovered = open_shared(tmp_path)
+    assert len(recovered.players) == 120
+    assert recovered.backend.sequence == 120
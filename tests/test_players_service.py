@@ -1,27 +1,25 @@
 import pytest
 from fastapi import HTTPException
-from tinydb import TinyDB, Query
-from tinydb.storages import MemoryStorage
 from app.models.player import Player
 from app.services.player_service import create_player, get_player, update_player_in_db
+from app.storage.database import Database
 from unittest.mock import patch
 from uuid import uuid4
 
 # Fixture for mock database
 @pytest.fixture
 def mock_db():
-    db = TinyDB(storage=MemoryStorage)
-    return db
+    return Database()
 @pytest.fixture
 def set_test_db(mock_db):
-    # Patch the global database used in your service
-    with patch("app.services.player_service.players_table", mock_db.table("players")):
+    # Patch the global table used in your service
+    with patch("app.services.player_service.players_table", mock_db.players):
         yield
 @pytest.fixture
 def mock_player():
     return Player(id=str(uuid4()), nickname="Player1", team=None, elo=1000, hoursPlayed=50, wins=0, losses=0)
 def test_create_player(mock_db, mock_player):
-    players_table = mock_db.table("players")  # Use the mock database
+    players_table = mock_db.players  # Use the mock database
 
     # Patch the global 'players_table' used in the function
     with patch("app.services.player_service.players_table", players_table):
@@ -48,7 +46,7 @@ def test_create_player(mock_db, mock_player):
 
 
 def test_get_player(mock_db, mock_player, set_test_db):
-    players_table = mock_db.table("players")
+    players_table = mock_db.players
     players_table.insert(mock_player.model_dump())  # Insert player
     player = get_player(mock_player.id)
     assert player.nickname == mock_player.nickname
@@ -58,9 +56,144 @@ def test_get_player(mock_db, mock_player, set_test_db):
         get_player(str(uuid4()))
 
 def test_update_player_in_db(mock_db, mock_player, set_test_db):
-    players_table = mock_db.table("players")
+    players_table = mock_db.players
     players_table.insert(mock_player.model_dump())
     mock_player.hoursPlayed += 10
     update_player_in_db(mock_player)
-    updated_player = players_table.search(Query().id == mock_player.id)[0]
+    updated_player = players_table.get(mock_player.id)
     assert updated_player["hoursPlayed"] == mock_player.hoursPlayed
+
+def test_get_player_by_nickname_index(mock_db, mock_player, set_test_db):
+    players_table = mock_db.players
+    create_player(mock_player)
+
+    # Renaming a player moves its entry in the unique nickname index
+    mock_player.nickname = "Renamed"
+    update_player_in_db(mock_player)
+    assert players_table.get_by("nickname", "Renamed")["id"] == mock_player.id
+    assert not players_table.contains("nickname", "Player1")
+
+def test_get_players_page_walks_with_cursor():
+    from app.services.player_service import get_players_page
+
+    created = [create_player(Player(nickname=f"Paged{i}")) for i in range(5)]
+
+    first, cursor = get_players_page(limit=2)
+    assert [p.id for p in first] == [created[0].id, created[1].id]
+    assert cursor == created[1].id
+
+    second, cursor = get_players_page(limit=2, after=cursor)
+    last, cursor_after_last = get_players_page(limit=2, after=cursor)
+    assert [p.id for p in second + last] == [p.id for p in created[2:]]
+    assert cursor_after_last is None
+
+    with pytest.raises(HTTPException) as exc_info:
+        get_players_page(limit=2, after=str(uuid4()))
+    assert exc_info.value.status_code == 400
+
+def test_get_players_page_empty_table():
+    from app.services.player_service import get_players_page
+
+    with pytest.raises(HTTPException) as exc_info:
+        get_players_page(limit=10)
+    assert exc_info.value.status_code == 404
+
+def test_iter_players_streams_every_player():
+    from app.services.player_service import iter_players
+
+    created = [create_player(Player(nickname=f"Streamed{i}")) for i in range(7)]
+    assert [p.id for p in iter_players(batch_size=3)] == [p.id for p in created]
+
+def test_leaderboard_orders_by_elo_then_wins_then_hours():
+    from app.services.player_service import get_leaderboard
+
+    create_player(Player(nickname="Low", elo=900))
+    create_player(Player(nickname="TopMoreHours", elo=1500, wins=3, hoursPlayed=90))
+    create_player(Player(nickname="Top", elo=1500, wins=3, hoursPlayed=10))
+    create_player(Player(nickname="TopMoreWins", elo=1500, wins=7, hoursPlayed=10))
+    create_player(Player(nickname="TopTwin", elo=1500, wins=3, hoursPlayed=10))
+
+    board = get_leaderboard(limit=10)
+    assert [entry.player.nickname for entry in board[:2]] == ["TopMoreWins", "TopMoreHours"]
+    assert {entry.player.nickname for entry in board[2:4]} == {"Top", "TopTwin"}
+    # Exact ties share a rank
+    assert [entry.rank for entry in board] == [1, 2, 3, 3, 5]
+
+    assert [entry.player.nickname for entry in get_leaderboard(limit=2, offset=3)] == [board[3].player.nickname, "Low"]
+
+def test_rank_follows_elo_updates():
+    from app.services.player_service import get_player_rank
+
+    players = [create_player(Player(nickname=f"Ranked{i}", elo=1000 + i)) for i in range(5)]
+    assert get_player_rank(players[0].id).rank == 5
+
+    # An Elo change moves the player in the index
+    players[0].elo = 2000
+    update_player_in_db(players[0])
+    assert get_player_rank(players[0].id).rank == 1
+    assert get_player_rank(players[4].id).rank == 2
+
+    with pytest.raises(HTTPException) as exc_info:
+        get_player_rank(str(uuid4()))
+    assert exc_info.value.status_code == 404
+
+def test_get_player_json_matches_model_serialization(mock_player):
+    from app.services.player_service import get_player_json
+
+    create_player(mock_player)
+    mock_player.elo = 1012.5
+    update_player_in_db(mock_player)
+
+    # The fast path encodes exactly what the validated model would
+    assert get_player_json(mock_player.id) == mock_player.model_dump_json().encode()
+
+    with pytest.raises(HTTPException) as exc_info:
+        get_player_json(str(uuid4()))
+    assert exc_info.value.status_code == 404
+
+def test_create_players_bulk_inserts_in_one_write():
+    from app.services.player_service import create_players_bulk
+    from app.storage.database import db
+
+    players = [Player(nickname=f"Bulk{i}") for i in range(50)]
+    with patch.object(db, "commit", wraps=db.commit) as commit:
+        assert create_players_bulk(players) == players
+    commit.assert_called_once()
+    assert get_player(players[7].id) == players[7]
+
+def test_create_players_bulk_reports_every_invalid_item():
+    from app.services.player_service import create_players_bulk
+    from app.storage.database import db
+
+    existing = create_player(Player(nickname="Taken"))
+    players = [
+        Player(nickname="Fresh"), Player(nickname="Taken"), Player(nickname="Fresh"),
+        Player(id=existing.id, nickname="Other"),
+    ]
+
+    with pytest.raises(HTTPException) as exc_info:
+        create_players_bulk(players)
+
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.detail == [
+        {"index": 1, "detail": "Nickname already exists"},
+        {"index": 2, "detail": "Nickname already exists"},
+        {"index": 3, "detail": "Player ID already exists"},
+    ]
+    # Nothing from the batch was inserted
+    assert len(db.players) == 1
+
+def test_non_finite_elo_is_rejected():
+    from fastapi.testclient import TestClient
+    from app.storage.database import db
+    from main import app
+
+    client = TestClient(app)
+    for value in ("NaN", "Infinity", "-Infinity"):
+        body = '{"nickname": "x", "elo": %s}' % value
+        response = client.post("/players/create", content=body, headers={"content-type": "application/json"})
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["type"] == "finite_number"
+        response = client.post("/players/bulk", content=f"[{body}]", headers={"content-type": "application/json"})
+        assert response.status_code == 422
+    assert len(db.players) == 0
@@ -0,0 +1,59 @@
+import random
+
+from app.services.match_service import create_match
+from app.services.rating import EloEngine, expected_score
+from app.storage.database import db
+from tests.test_match_service import seed_league
+
+
+def reference_k_factor(hours_played):
+    # The original ladder
+    if hours_played < 500:
+        return 50
+    elif hours_played < 1000:
+        return 40
+    elif hours_played < 3000:
+        return 30
+    elif hours_played < 5000:
+        return 20
+    return 10
+
+def reference_update(players, opponents, S):
+    # The original update_team_stats on plain [elo, hours] pairs: average and power recomputed per call
+    opponent_elo = sum(elo for elo, _ in opponents) / len(opponents)
+    for player in players:
+        E = 1 / (1 + 10 ** round((opponent_elo - player[0]) / 400))
+        player[0] += round(reference_k_factor(player[1]) * (S - E))
+
+def test_k_factor_table_matches_ladder():
+    engine = EloEngine()
+    for hours in list(range(-10, 6000)) + [10 ** 6]:
+        assert engine.k_factor(hours) == reference_k_factor(hours)
+
+def test_expected_score_table_matches_formula():
+    rng = random.Random(5)
+    for _ in range(10_000):
+        elo, opponent_elo = rng.uniform(-6000, 6000), rng.uniform(-6000, 6000)
+        assert expected_score(opponent_elo, elo) == 1 / (1 + 10 ** round((opponent_elo - elo) / 400))
+
+def test_create_match_matches_reference_rules():
+    matches = seed_league()
+    rosters = {team["id"]: team["players"] for team in db.teams.all()}
+    state = {doc["id"]: [doc["elo"], doc["hoursPlayed"]] for doc in db.players.all()}
+
+    for match in matches:
+        create_match(match)
+
+        team1 = [state[player_id] for player_id in rosters[match.team1Id]]
+        team2 = [state[player_id] for player_id in rosters[match.team2Id]]
+        for player in team1 + team2:
+            player[1] += match.duration
+        if match.winningTeamId is None:
+            reference_update(team1, team2, 0.5)
+            reference_update(team2, team1, 0.5)
+        else:
+            winners, losers = (team1, team2) if match.winningTeamId == match.team1Id else (team2, team1)
+            reference_update(winners, losers, 1)
+            reference_update(losers, winners, 0)
+
+    assert {doc["id"]: [doc["elo"], doc["hoursPlayed"]] for doc in db.players.all()} == state
@@ -0,0 +1,117 @@
+import random
+
+import pytest
+
+from app.models.match import Match
+from app.models.player import Player
+from app.services.match_service import create_match, create_matches_bulk
+from app.services.player_service import create_player, get_player, update_player_in_db
+from app.services.rating import EloEngine, create_engine
+from app.services.rating_service import replay_ratings
+from app.services.team_service import create_team
+from app.storage.database import db
+
+
+def fresh_league(teams=6, matches=300, **stats):
+    # Players start at the default Elo unless given one, and the replay starts them from it
+    rng = random.Random(7)
+    team_ids = []
+    for t in range(teams):
+        players = [create_player(Player(nickname=f"R{t}_{i}", **stats)) for i in range(5)]
+        team_ids.append(create_team(f"Replay{t}", [p.id for p in players]).id)
+    fixtures = []
+    for m in range(matches):
+        team1, team2 = rng.sample(team_ids, 2)
+        fixtures.append(Match(id=f"r{m}", team1Id=team1, team2Id=team2,
+                              winningTeamId=rng.choice([team1, team2, None]), duration=rng.randint(1, 40)))
+    return fixtures
+
+def ratings():
+    return {doc["id"]: (doc["elo"], doc["hoursPlayed"], doc["wins"], doc["losses"]) for doc in db.players.all()}
+
+def test_replay_rebuilds_live_ratings():
+    fixtures = fresh_league()
+    for match in fixtures[:150]:
+        create_match(match)
+    create_matches_bulk(fixtures[150:])
+    live = ratings()
+
+    # Scramble the stored ratings, then rebuild them from the history in small pages
+    for player_id in live:
+        db.update(db.players, player_id, {"elo": 1234})
+    result = replay_ratings(batch_size=7)
+
+    assert result == {"players": 30, "matches": 300, "updated": 30}
+    assert ratings() == live
+
+    # Nothing left to change on a second run
+    assert replay_ratings()["updated"] == 0
+
+def test_replay_keeps_the_stats_players_started_with():
+    # Veterans: past the first K-factor threshold before their first match here
+    fixtures = fresh_league(hoursPlayed=600, wins=40, losses=35)
+    bench = create_player(Player(nickname="Bench", elo=1500, hoursPlayed=20, wins=3))
+    for match in fixtures:
+        create_match(match)
+    live = ratings()
+
+    for player_id in live:
+        db.update(db.players, player_id, {"elo": 0})
+    db.update(db.players, bench.id, {"elo": 1500})
+    result = replay_ratings()
+
+    # Hours, wins and losses are untouched, and the ratings match the live ones, which were rated
+    # with the veterans' hours; the player no match mentions keeps their rating
+    assert result["updated"] == 30
+    assert ratings() == live
+    assert ratings()[bench.id] == (1500, 20, 3, 0)
+
+def test_replay_starts_players_from_their_initial_elo():
+    # Created at 1500: that is where the replay starts them, not at a single league-wide rating
+    for match in fresh_league(elo=1500):
+        create_match(match)
+    live = ratings()
+
+    # A full update that leaves initialElo out keeps the stored one
+    player = get_player(next(iter(live)))
+    update_player_in_db(Player(**{**player.model_dump(), "nickname": "Renamed", "initialElo": None}))
+    assert db.players.get(player.id)["initialElo"] == 1500
+
+    for player_id in live:
+        db.update(db.players, player_id, {"elo": 0})
+    assert replay_ratings()["updated"] == 30
+    assert ratings() == live
+
+    # --initial-elo overrides every player's own starting rating
+    replay_ratings(initial_elo=0)
+    assert ratings() != live
+    replay_ratings()
+    assert ratings() == live
+
+def test_replay_with_other_rules():
+    for match in fresh_league():
+        create_match(match)
+    live = ratings()
+
+    replay_ratings(EloEngine(k_thresholds=(1000,), k_factors=(32, 16)))
+    changed = ratings()
+    assert changed != live
+    assert {k: v[1:] for k, v in changed.items()} == {k: v[1:] for k, v in live.items()}
+
+    # Back to the default rules restores the live ratings
+    replay_ratings()
+    assert ratings() == live
+
+def test_replay_rejects_unknown_players():
+    fixtures = fresh_league(teams=2, matches=1)
+    create_match(fixtures[0])
+    db.players.truncate()
+    create_player(Player(nickname="someone else"))
+
+    with pytest.raises(ValueError):
+        replay_ratings()
+
+def test_unknown_engine():
+    assert isinstance(create_engine("elo"), EloEngine)
+    with pytest.raises(ValueError):
+        create_engine("glicko")
@@ -0,0 +1,77 @@
+import random
+from bisect import bisect_left
+
+import pytest
+
+from app.storage.sorted_index import SortedIndex
+
+# Fixtures
+@pytest.fixture
+def small_buckets(monkeypatch):
+    # Tiny buckets so splits and bucket removal are exercised
+    monkeypatch.setattr(SortedIndex, "LOAD", 4)
+
+# Tests
+def test_matches_sorted_list_under_random_operations(small_buckets):
+    rng = random.Random(5)
+    index = SortedIndex()
+    reference = []
+
+    for step in range(3000):
+        roll = rng.random()
+        if reference and roll < 0.3:
+            key = rng.choice(reference)
+            index.remove(key)
+            reference.remove(key)
+        elif reference and roll < 0.5:
+            # Mostly a small move, as a rating update makes
+            key = rng.choice(reference)
+            new = (key[0] + rng.choice((-1, 0, 1, rng.randint(-200, 200))), step)
+            index.replace(key, new)
+            reference.remove(key)
+            reference.append(new)
+        else:
+            key = (rng.randint(0, 200), step)
+            index.add(key)
+            reference.append(key)
+        reference.sort()
+
+        if step % 50 == 0:
+            assert len(index) == len(reference)
+            assert index.slice(0, len(reference) + 1) == reference
+            probe = (rng.randint(0, 200),)
+            assert index.count_before(probe) == bisect_left(reference, probe)
+            offset = rng.randint(0, len(reference))
+            assert index.slice(offset, 7) == reference[offset:offset + 7]
+
+def test_remove_missing_key_raises():
+    index = SortedIndex()
+    index.add((1, "a"))
+
+    with pytest.raises(KeyError):
+        index.remove((2, "b"))
+    with pytest.raises(KeyError):
+        index.remove((0, "z"))
+    with pytest.raises(KeyError):
+        index.replace((1, "b"), (1, "c"))
+    assert index.slice(0, 2) == [(1, "a")]
+
+def test_update_adds_batches(small_buckets):
+    rng = random.Random(8)
+    index = SortedIndex()
+    reference = []
+
+    # A batch is merged into the buckets, one smaller than the number of buckets is added key by key
+    for size in (50, 10, 200, 3, 120):
+        keys = [(rng.randint(0, 100), len(reference) + i) for i in range(size)]
+        index.update(keys)
+        reference = sorted(reference + keys)
+        index.add((50, -1))
+        reference.append((50, -1))
+        reference.sort()
+        index.remove((50, -1))
+        reference.remove((50, -1))
+
+        assert len(index) == len(reference)
+        assert index.slice(0, len(reference)) == reference
+        assert index.count_before((50,)) == bisect_left(reference, (50,))
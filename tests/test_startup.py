@@ -0,0 +1,75 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.middleware import ReadinessMiddleware
+from app.startup import StoreWarmUp
+from app.storage.database import Database, db
+from app.storage.persistence import WriteAheadLogBackend
+
+# Helpers
+def wal_db(directory):
+    return Database(WriteAheadLogBackend(str(directory)))
+
+# Tests
+def test_warm_up_loads_the_store_in_the_background(tmp_path):
+    source = wal_db(tmp_path)
+    source.open()
+    source.insert(source.players, {"id": "p1", "nickname": "Alpha", "elo": 1000.0, "team": None})
+    source.close()
+
+    database = wal_db(tmp_path)
+    warm_up = StoreWarmUp(database)
+    assert warm_up.status() == {"status": "loading"}
+    assert not database.ready.is_set()
+
+    warm_up.start()
+    warm_up.join()
+    assert warm_up.status()["status"] == "ready"
+    assert database.players.get("p1")["nickname"] == "Alpha"
+    # Indexes were built during the load
+    assert database.players.get_by("nickname", "Alpha")["id"] == "p1"
+    database.close()
+
+def test_failed_load_is_reported(tmp_path):
+    (tmp_path / "snapshot.ndjson").write_bytes(b"not json\n")
+    database = wal_db(tmp_path)
+    warm_up = StoreWarmUp(database)
+
+    warm_up.start()
+    warm_up.join()
+    status = warm_up.status()
+    assert status["status"] == "failed" and "JSONDecodeError" in status["detail"]
+    assert not database.ready.is_set()
+
+def test_requests_wait_for_the_store():
+    database = Database()
+    app = FastAPI()
+    app.add_middleware(ReadinessMiddleware, database=database)
+
+    @app.get("/players")
+    def players():
+        return []
+
+    @app.get("/ready")
+    def ready():
+        return {"status": "loading"}
+
+    client = TestClient(app)
+    response = client.get("/players")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert client.get("/ready").status_code == 200
+
+    database.open()
+    assert client.get("/players").json() == []
+
+def test_app_is_ready_after_startup():
+    from main import create_app
+    app = create_app()
+
+    with TestClient(app) as client:
+        app.state.warm_up.join()
+        response = client.get("/ready")
+        assert response.status_code == 200
+        assert response.json()["status"] == "ready"
+    assert db.ready.is_set()
@@ -0,0 +1,127 @@
+import io
+import random
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.models.match import Match
+from app.models.player import Player
+from app.services.backup_service import export_chunks, import_file
+from app.services.match_service import create_match, create_matches_bulk
+from app.services.player_service import create_player
+from app.services.rating_service import replay_ratings
+from app.services.stats_service import get_league_stats, get_team_stats
+from app.services.team_service import create_team
+from app.storage.database import ELO_BUCKET_WIDTH, db
+
+# Helpers
+def league(teams=4):
+    team_ids = []
+    for t in range(teams):
+        players = [create_player(Player(nickname=f"S{t}_{i}", hoursPlayed=t)) for i in range(5)]
+        team_ids.append(create_team(f"Stats{t}", [player.id for player in players]).id)
+    # A player with no team counts for the league only
+    create_player(Player(nickname="Free agent", elo=2345))
+    return team_ids
+
+def fixtures(team_ids, count, seed=3):
+    rng = random.Random(seed)
+    matches = []
+    for _ in range(count):
+        team1, team2 = rng.sample(team_ids, 2)
+        matches.append(Match(team1Id=team1, team2Id=team2, winningTeamId=rng.choice([team1, team2, None]),
+                             duration=rng.randint(1, 5)))
+    return matches
+
+def recomputed_team(team_id):
+    # The statistics the slow way, from the documents
+    players = [db.players.get(player_id) for player_id in db.teams.get(team_id)["players"]]
+    matches = [m for m in db.matches.all() if team_id in (m["team1Id"], m["team2Id"])]
+    wins = sum(m["winningTeamId"] == team_id for m in matches)
+    draws = sum(not m["winningTeamId"] for m in matches)
+    return {
+        "players": len(players),
+        "averageElo": pytest.approx(sum(p["elo"] for p in players) / len(players)),
+        "totalHoursPlayed": sum(p["hoursPlayed"] for p in players),
+        "matchesPlayed": len(matches), "wins": wins, "losses": len(matches) - wins - draws, "draws": draws,
+        "winRate": pytest.approx(wins / len(matches)) if matches else 0,
+    }
+
+def recomputed_league():
+    players, matches = db.players.all(), db.matches.all()
+    histogram = {}
+    for p in players:
+        bucket = p["elo"] // ELO_BUCKET_WIDTH * ELO_BUCKET_WIDTH
+        histogram[bucket] = histogram.get(bucket, 0) + 1
+    return {
+        "players": len(players), "teams": len(db.teams), "matches": len(matches),
+        "draws": sum(not m["winningTeamId"] for m in matches),
+        "averageElo": pytest.approx(sum(p["elo"] for p in players) / len(players)),
+        "totalHoursPlayed": sum(p["hoursPlayed"] for p in players),
+        "totalMatchHours": sum(m["duration"] for m in matches),
+        "eloHistogram": [{"minElo": bucket, "maxElo": bucket + ELO_BUCKET_WIDTH, "players": count}
+                         for bucket, count in sorted(histogram.items())],
+    }
+
+def assert_stats_match_documents(team_ids):
+    for team_id in team_ids:
+        stats = get_team_stats(team_id).model_dump()
+        assert {field: stats[field] for field in recomputed_team(team_id)} == recomputed_team(team_id)
+    assert get_league_stats().model_dump() == recomputed_league()
+
+# Tests
+def test_team_stats_after_a_match():
+    team1, team2 = league(2)
+    create_match(Match(team1Id=team1, team2Id=team2, winningTeamId=team1, duration=3))
+
+    stats = get_team_stats(team1)
+    assert stats.teamName == "Stats0"
+    assert (stats.matchesPlayed, stats.wins, stats.losses, stats.draws, stats.winRate) == (1, 1, 0, 0, 1.0)
+    assert stats.totalHoursPlayed == 5 * 3
+    assert stats.averageElo > get_team_stats(team2).averageElo
+    assert get_team_stats(team2).winRate == 0
+    assert_stats_match_documents([team1, team2])
+
+def test_stats_follow_every_write_path():
+    team_ids = league()
+    for match in fixtures(team_ids, 30):
+        create_match(match)
+    assert_stats_match_documents(team_ids)
+
+    create_matches_bulk(fixtures(team_ids, 50, seed=4))
+    assert_stats_match_documents(team_ids)
+
+    replay_ratings(initial_elo=1000)
+    assert_stats_match_documents(team_ids)
+
+    exported = io.BytesIO(b"".join(export_chunks()))
+    db.clear()
+    assert get_league_stats().players == 0
+    import_file(exported)
+    assert_stats_match_documents(team_ids)
+
+def test_stats_of_a_new_team_and_unknown_team():
+    team_id = league(1)[0]
+
+    stats = get_team_stats(team_id)
+    assert (stats.players, stats.averageElo, stats.matchesPlayed, stats.winRate) == (5, 0, 0, 0)
+    with pytest.raises(HTTPException) as error:
+        get_team_stats("missing")
+    assert error.value.status_code == 404
+
+def test_stats_endpoints():
+    from main import app
+    client = TestClient(app)
+    team1, team2 = league(2)
+    create_match(Match(team1Id=team1, team2Id=team2, winningTeamId=None, duration=2))
+
+    response = client.get(f"/teams/{team1}/stats")
+    assert response.status_code == 200
+    assert response.json()["draws"] == 1
+    assert client.get("/teams/missing/stats").status_code == 404
+
+    league_stats = client.get("/stats/league").json()
+    assert (league_stats["players"], league_stats["teams"], league_stats["matches"]) == (11, 2, 1)
+    assert league_stats["totalMatchHours"] == 2
+    assert sum(bucket["players"] for bucket in league_stats["eloHistogram"]) == 11
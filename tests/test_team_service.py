@@ -1,24 +1,22 @@
 import pytest
 from unittest.mock import patch
 from fastapi import HTTPException
-from tinydb import TinyDB, Query
-from tinydb.storages import MemoryStorage
 from uuid import uuid4
 
 from app.models.team import Team
 from app.models.player import Player
 from app.services.team_service import create_team, get_team_by_id, update_team_in_db
 from app.services.player_service import get_player
+from app.storage.database import Database
 
 # Fixtures
 @pytest.fixture
 def mock_db():
-    db = TinyDB(storage=MemoryStorage)
-    return db
+    return Database()
 
 @pytest.fixture
 def mock_players(mock_db):
-    players_table = mock_db.table("players")
+    players_table = mock_db.players
     players = [
         Player(id=str(uuid4()), nickname=f"Player{i+1}", team=None, elo=1000, hoursPlayed=10, wins=0, losses=0)
         for i in range(5)
@@ -29,12 +27,12 @@ def mock_players(mock_db):
 
 @pytest.fixture
 def mock_teams_table(mock_db):
-    return mock_db.table("teams")
+    return mock_db.teams
 
 # Test: Create Team
 def test_create_team(mock_db, mock_players):
-    teams_table = mock_db.table("teams")
-    players_table = mock_db.table("players")
+    teams_table = mock_db.teams
+    players_table = mock_db.players
 
     with patch("app.services.team_service.teams_table", teams_table), \
          patch("app.services.team_service.players_table", players_table), \
@@ -50,10 +48,11 @@ def test_create_team(mock_db, mock_players):
         assert len(team.players) == 5
         assert len(teams_table) == 1
         assert teams_table.all()[0]["teamName"] == team_name
+        assert teams_table.all()[0]["players"] == player_ids
 
         # Check that players have been assigned to the team
         for player_id in player_ids:
-            player_data = players_table.get(Query().id == player_id)
+            player_data = players_table.get(player_id)
             assert player_data["team"] == team.id
 
         # Test duplicate team name
@@ -64,13 +63,16 @@ def test_create_team(mock_db, mock_players):
 
 # Test: Get Team by ID
 def test_get_team_by_id(mock_db, mock_players):
-    teams_table = mock_db.table("teams")
+    teams_table = mock_db.teams
+
+    players_table = mock_db.players
 
     # Create a mock team
     team = Team(id=str(uuid4()), teamName="Team Bravo", players=mock_players)
-    teams_table.insert(team.model_dump())
+    teams_table.insert({"id": team.id, "teamName": team.teamName, "players": [p.id for p in mock_players]})
 
-    with patch("app.services.team_service.teams_table", teams_table):
+    with patch("app.services.team_service.teams_table", teams_table), \
+         patch("app.services.team_service.players_table", players_table):
         # Fetch the team by ID
         fetched_team = get_team_by_id(team.id)
 
@@ -85,16 +87,19 @@ def test_get_team_by_id(mock_db, mock_players):
 
 # Test: Update Team in DB
 def test_update_team_in_db(mock_db, mock_players):
-    teams_table = mock_db.table("teams")
+    teams_table = mock_db.teams
+
+    players_table = mock_db.players
 
     # Create a mock team
     team = Team(id=str(uuid4()), teamName="Team Charlie", players=mock_players)
-    teams_table.insert(team.model_dump())
+    teams_table.insert({"id": team.id, "teamName": team.teamName, "players": [p.id for p in mock_players]})
 
     updated_player = mock_players[0]
     updated_player.nickname = "UpdatedNickname"
 
-    with patch("app.services.team_service.teams_table", teams_table):
+    with patch("app.services.team_service.teams_table", teams_table), \
+         patch("app.services.team_service.players_table", players_table):
         # Update player in team
         update_team_in_db(team.id, updated_player)
 
@@ -103,3 +108,84 @@ def test_update_team_in_db(mock_db, mock_players):
 
         # Assertions
         assert updated_team.players[0].nickname == "UpdatedNickname"
+
+# Test: Team is assembled from the shared player documents
+def test_team_reads_shared_player_state():
+    from app.services.player_service import create_player, update_player_in_db
+
+    players = [create_player(Player(nickname=f"Shared{i}")) for i in range(5)]
+    team = create_team("Team Delta", [player.id for player in players])
+
+    # The player service sees the team assignment made by the team service
+    assert get_player(players[0].id).team == team.id
+
+    # A player update is visible through the team without rewriting the team document
+    player = get_player(players[0].id)
+    player.elo = 1234
+    update_player_in_db(player)
+    assert get_team_by_id(team.id).players[0].elo == 1234
+
+# Test: JSON fast path encodes the same team the model would
+def test_get_team_json_matches_model_serialization():
+    from app.services.player_service import create_player
+    from app.services.team_service import get_team_json
+
+    players = [create_player(Player(nickname=f"Json{i}", elo=1000 + i)) for i in range(5)]
+    team = create_team("Team Echo", [player.id for player in players])
+
+    assert get_team_json(team.id) == get_team_by_id(team.id).model_dump_json().encode()
+
+    with pytest.raises(HTTPException) as exc_info:
+        get_team_json(str(uuid4()))
+    assert exc_info.value.status_code == 404
+
+# Test: Bulk team creation
+def test_create_teams_bulk():
+    from app.models.team import TeamCreate
+    from app.services.player_service import create_players_bulk
+    from app.services.team_service import create_teams_bulk
+
+    players = create_players_bulk([Player(nickname=f"Bulk{i}") for i in range(15)])
+    requests = [TeamCreate(teamName=f"Bulk Team {t}", players=[p.id for p in players[t * 5:(t + 1) * 5]]) for t in range(3)]
+
+    teams = create_teams_bulk(requests)
+
+    assert [team.teamName for team in teams] == ["Bulk Team 0", "Bulk Team 1", "Bulk Team 2"]
+    for team in teams:
+        assert get_team_by_id(team.id) == team
+        assert all(get_player(player.id).team == team.id for player in team.players)
+
+def test_create_teams_bulk_reports_every_invalid_item():
+    from app.models.team import TeamCreate
+    from app.services.player_service import create_players_bulk
+    from app.services.team_service import create_teams_bulk
+    from app.storage.database import db
+
+    players = create_players_bulk([Player(nickname=f"Bulk{i}") for i in range(20)])
+    ids = [p.id for p in players]
+    create_team("Existing", ids[15:20])
+    requests = [
+        TeamCreate(teamName="Fine", players=ids[0:5]),
+        TeamCreate(teamName="Existing", players=ids[5:10]),
+        TeamCreate(teamName="Fine", players=ids[5:10]),
+        TeamCreate(teamName="Short", players=ids[5:9]),
+        TeamCreate(teamName="Ghost", players=ids[5:9] + [str(uuid4())]),
+        TeamCreate(teamName="Taken", players=ids[10:14] + [ids[15]]),
+        TeamCreate(teamName="Twice", players=ids[10:14] + [ids[0]]),
+    ]
+
+    with pytest.raises(HTTPException) as exc_info:
+        create_teams_bulk(requests)
+
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.detail == [
+        {"index": 1, "detail": "Team name must be unique"},
+        {"index": 2, "detail": "Team name must be unique"},
+        {"index": 3, "detail": "A team must have exactly 5 players"},
+        {"index": 4, "detail": "Player not found"},
+        {"index": 5, "detail": "Player Bulk15 is already in a team"},
+        {"index": 6, "detail": "Player Bulk10 is listed more than once"},
+    ]
+    # Nothing from the batch was applied
+    assert len(db.teams) == 1
+    assert get_player(ids[0]).team is None
@@ -0,0 +1,52 @@
+import pytest
+from uuid import uuid4
+
+from app.storage.table import IndexedTable
+from app.storage.unit_of_work import UnitOfWork
+
+# Fixtures
+@pytest.fixture
+def table():
+    table = IndexedTable("players", unique=("nickname",))
+    table.insert({"id": "p1", "nickname": "Alpha", "elo": 1000})
+    return table
+
+# Tests
+def test_commit_applies_merged_updates_and_inserts(table):
+    unit = UnitOfWork()
+    unit.update(table, "p1", {"elo": 1010})
+    unit.update(table, "p1", {"wins": 1})
+    unit.insert(table, {"id": "p2", "nickname": "Bravo"})
+
+    assert len(unit) == 2
+    unit.commit()
+
+    assert table.get("p1") == {"id": "p1", "nickname": "Alpha", "elo": 1010, "wins": 1}
+    assert table.get_by("nickname", "Bravo")["id"] == "p2"
+
+def test_failed_commit_applies_nothing(table):
+    unit = UnitOfWork()
+    unit.update(table, "p1", {"elo": 1010})
+    unit.update(table, str(uuid4()), {"elo": 900})
+
+    with pytest.raises(KeyError):
+        unit.commit()
+    assert table.get("p1")["elo"] == 1000
+
+    unit = UnitOfWork()
+    unit.update(table, "p1", {"elo": 1010})
+    unit.insert(table, {"id": "p3", "nickname": "Alpha"})
+
+    with pytest.raises(ValueError):
+        unit.commit()
+    assert table.get("p1")["elo"] == 1000
+    assert "p3" not in table
+
+def test_inserts_are_checked_against_each_other(table):
+    unit = UnitOfWork()
+    unit.insert(table, {"id": "p2", "nickname": "Bravo"})
+    unit.insert(table, {"id": "p3", "nickname": "Bravo"})
+
+    with pytest.raises(ValueError):
+        unit.commit()
+    assert len(table) == 1